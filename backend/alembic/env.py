@@ -32,7 +32,7 @@ def run_migrations_offline() -> None:
     here as well.  By skipping the Engine creation
     we don't even need a DBAPI to be available.
     """
-    url = settings.DATABASE_URL
+    url = settings.SYNC_DATABASE_URI
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -50,7 +50,7 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
     """
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = settings.DATABASE_URL
+    configuration["sqlalchemy.url"] = settings.SYNC_DATABASE_URI
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
@@ -0,0 +1,47 @@
+"""perfume search indexes
+
+Adds pg_trgm/unaccent, an immutable unaccent wrapper and trigram GIN indexes
+on the folded perfume and brand names used by ``app.services.search``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent() is only STABLE; index expressions need an IMMUTABLE function
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_perfumes_name_trgm "
+        "ON perfumes USING gin (lower(f_unaccent(name)) gin_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_brands_name_trgm "
+        "ON brands USING gin (lower(f_unaccent(name)) gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_brands_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_perfumes_name_trgm")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
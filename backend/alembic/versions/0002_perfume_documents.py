@@ -0,0 +1,109 @@
+"""perfume documents
+
+Stores the pre-rendered perfume detail JSON and keeps it fresh with triggers
+that drop a perfume's document whenever anything it is rendered from changes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables holding one row per perfume, and the column naming the perfume
+PERFUME_TABLES = {
+    "perfumes": "id",
+    "perfume_notes": "perfume_id",
+    "perfume_main_accords": "perfume_id",
+    "perfume_tags": "perfume_id",
+}
+
+# Lookup table -> (link table, perfume id column, link column); a rename
+# invalidates every perfume linked to the row
+LOOKUP_TABLES = {
+    "brands": ("perfumes", "id", "brand_id"),
+    "concentration": ("perfumes", "id", "concentration_id"),
+    "type": ("perfumes", "id", "type_id"),
+    "family": ("perfumes", "id", "family_id"),
+    "country": ("perfumes", "id", "country_id"),
+    "perfumer": ("perfumes", "id", "perfumer_id"),
+    "notes": ("perfume_notes", "perfume_id", "note_id"),
+    "main_accords": ("perfume_main_accords", "perfume_id", "accord_id"),
+    "tags": ("perfume_tags", "perfume_id", "tag_id"),
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "perfume_documents",
+        sa.Column("perfume_id", sa.Integer(), sa.ForeignKey("perfumes.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("document", sa.LargeBinary(), nullable=False),
+        sa.Column("rendered_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION perfume_documents_invalidate() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            target_id integer;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING OLD INTO target_id;
+                DELETE FROM perfume_documents d WHERE d.perfume_id = target_id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING NEW INTO target_id;
+                DELETE FROM perfume_documents d WHERE d.perfume_id = target_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION perfume_documents_invalidate_lookup() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            EXECUTE format(
+                'DELETE FROM perfume_documents d USING %I l WHERE d.perfume_id = l.%I AND l.%I = $1',
+                TG_ARGV[0], TG_ARGV[1], TG_ARGV[2]
+            ) USING NEW.id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+    for table, column in PERFUME_TABLES.items():
+        op.execute(
+            f"CREATE TRIGGER {table}_invalidate_documents "
+            f"AFTER INSERT OR UPDATE OR DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION perfume_documents_invalidate('{column}')"
+        )
+    for table, (link_table, perfume_column, link_column) in LOOKUP_TABLES.items():
+        op.execute(
+            f"CREATE TRIGGER {table}_invalidate_documents "
+            f"AFTER UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION "
+            f"perfume_documents_invalidate_lookup('{link_table}', '{perfume_column}', '{link_column}')"
+        )
+
+
+def downgrade() -> None:
+    for table in (*PERFUME_TABLES, *LOOKUP_TABLES):
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_invalidate_documents ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS perfume_documents_invalidate_lookup()")
+    op.execute("DROP FUNCTION IF EXISTS perfume_documents_invalidate()")
+    op.drop_table("perfume_documents")
@@ -0,0 +1,63 @@
+"""foreign key and filter indexes
+
+Indexes the foreign keys the search filters, facet counts and the document
+invalidation triggers join through, the non-leading columns of the
+association table primary keys, ``release_year``, and ``lower(gender)`` for
+the gender filter paged by id. PostgreSQL does not index foreign keys on its
+own, so each of these joins was a sequential scan of the referencing table.
+
+Indexes are built ``CONCURRENTLY`` outside the migration transaction so a
+live catalog keeps taking writes while they build.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Table -> single-column indexes, named like SQLAlchemy's ``index=True``
+COLUMN_INDEXES = {
+    "perfumes": (
+        "brand_id", "concentration_id", "type_id", "family_id", "country_id", "perfumer_id", "release_year",
+    ),
+    "perfume_notes": ("note_id",),
+    "perfume_main_accords": ("accord_id",),
+    "perfume_tags": ("tag_id",),
+    "notes": ("family_id",),
+    "note_mood_relations": ("mood_id",),
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, columns in COLUMN_INDEXES.items():
+            for column in columns:
+                op.create_index(
+                    f"ix_{table}_{column}", table, [column],
+                    postgresql_concurrently=True, if_not_exists=True,
+                )
+        op.create_index(
+            "ix_perfumes_gender_lower", "perfumes", [sa.text("lower(gender)"), "id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index("ix_perfumes_gender_lower", table_name="perfumes",
+                      postgresql_concurrently=True, if_exists=True)
+        for table, columns in reversed(COLUMN_INDEXES.items()):
+            for column in columns:
+                op.drop_index(f"ix_{table}_{column}", table_name=table,
+                              postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,67 @@
+"""reviews and rating aggregates
+
+Adds ``reviews`` and ``perfume_rating_stats``, the per-perfume aggregates
+(count, sum, star histogram, longevity and sillage votes, Bayesian score)
+that ``app.services.ratings`` maintains from batched review deltas. The
+score and count indexes serve ``sort=rating`` / ``sort=popularity`` and
+the rating leaderboards.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "reviews",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("perfume_id", sa.Integer(), sa.ForeignKey("perfumes.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("author", sa.String(100), nullable=False),
+        sa.Column("rating", sa.SmallInteger(), nullable=False),
+        sa.Column("longevity", sa.SmallInteger()),
+        sa.Column("sillage", sa.SmallInteger()),
+        sa.Column("title", sa.String(255)),
+        sa.Column("body", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.CheckConstraint("rating BETWEEN 1 AND 5", name="ck_reviews_rating"),
+    )
+    op.create_index("ix_reviews_perfume_id_id", "reviews", ["perfume_id", "id"])
+
+    op.create_table(
+        "perfume_rating_stats",
+        sa.Column(
+            "perfume_id", sa.Integer(), sa.ForeignKey("perfumes.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("rating_count", sa.Integer(), nullable=False),
+        sa.Column("rating_sum", sa.Integer(), nullable=False),
+        sa.Column("rating_histogram", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("longevity_votes", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("sillage_votes", postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index(
+        "ix_perfume_rating_stats_score", "perfume_rating_stats", [sa.text("score DESC"), "perfume_id"]
+    )
+    op.create_index(
+        "ix_perfume_rating_stats_count", "perfume_rating_stats", [sa.text("rating_count DESC"), "perfume_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("perfume_rating_stats")
+    op.drop_table("reviews")
@@ -0,0 +1,130 @@
+"""perfume document versions
+
+Replaces delete-on-change invalidation of ``perfume_documents`` with a
+per-perfume version counter. Deleting the row let a reader that rendered
+before a write commit store its stale render after the trigger had run, and
+nothing would ever remove it. The triggers now bump
+``perfume_document_versions`` instead, each document records the version it
+was rendered from, and a document only counts as stored while the two match.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The trigger functions keep the names 0002 attached them under, so only
+# their bodies change
+BUMP = (
+    "INSERT INTO perfume_document_versions AS v (perfume_id, version) VALUES (target_id, 1) "
+    "ON CONFLICT (perfume_id) DO UPDATE SET version = v.version + 1;"
+)
+
+
+def upgrade() -> None:
+    op.create_table(
+        "perfume_document_versions",
+        sa.Column("perfume_id", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+    )
+    # Existing documents were kept current by the delete triggers, so they
+    # match the implicit version 0 of a perfume without a counter row
+    op.add_column(
+        "perfume_documents",
+        sa.Column("source_version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION perfume_documents_invalidate() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            target_id integer;
+            old_id integer;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING OLD INTO target_id;
+                old_id := target_id;
+                {BUMP}
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING NEW INTO target_id;
+                IF old_id IS DISTINCT FROM target_id THEN
+                    {BUMP}
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    # DISTINCT: a perfume can link the same row twice (a note in the top and
+    # the base), and an upsert cannot touch one row twice
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION perfume_documents_invalidate_lookup() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            EXECUTE format(
+                'INSERT INTO perfume_document_versions AS v (perfume_id, version) '
+                'SELECT DISTINCT l.%I, 1 FROM %I l WHERE l.%I = $1 '
+                'ON CONFLICT (perfume_id) DO UPDATE SET version = v.version + 1',
+                TG_ARGV[1], TG_ARGV[0], TG_ARGV[2]
+            ) USING NEW.id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION perfume_documents_invalidate() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            target_id integer;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING OLD INTO target_id;
+                DELETE FROM perfume_documents d WHERE d.perfume_id = target_id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                EXECUTE format('SELECT ($1).%I', TG_ARGV[0]) USING NEW INTO target_id;
+                DELETE FROM perfume_documents d WHERE d.perfume_id = target_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION perfume_documents_invalidate_lookup() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            EXECUTE format(
+                'DELETE FROM perfume_documents d USING %I l WHERE d.perfume_id = l.%I AND l.%I = $1',
+                TG_ARGV[0], TG_ARGV[1], TG_ARGV[2]
+            ) USING NEW.id;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    # Documents may now be stale; the delete triggers only catch later changes
+    op.execute("DELETE FROM perfume_documents")
+    op.drop_column("perfume_documents", "source_version")
+    op.drop_table("perfume_document_versions")
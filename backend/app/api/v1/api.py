@@ -1,5 +1,7 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.core.config import settings
+from app.core.http_cache import cache_control
 from app.api.v1.endpoints import (
     perfumes,
     notes,
@@ -9,17 +11,37 @@ from app.api.v1.endpoints import (
     countries,
     families,
     concentrations,
-    perfumers
+    perfumers,
+    autocomplete,
+    images,
+    leaderboards,
+    reviews,
+    diagnostics
 )
 
 api_router = APIRouter()
 
-api_router.include_router(perfumes.router, prefix="/perfumes", tags=["perfumes"])
-api_router.include_router(brands.router, prefix="/brands", tags=["brands"])
-api_router.include_router(types.router, prefix="/types", tags=["types"])
-api_router.include_router(countries.router, prefix="/countries", tags=["countries"])
-api_router.include_router(families.router, prefix="/families", tags=["families"])
-api_router.include_router(concentrations.router, prefix="/concentrations", tags=["concentrations"])
-api_router.include_router(perfumers.router, prefix="/perfumers", tags=["perfumers"])
-api_router.include_router(notes.router, prefix="/notes", tags=["notes"])
-api_router.include_router(main_accords.router, prefix="/main-accords", tags=["main-accords"]) 
\ No newline at end of file
+def cached(policy: str) -> list:
+    return [Depends(cache_control(policy))] if settings.HTTP_CACHE_ENABLED else []
+
+reference = cached(settings.CACHE_CONTROL_REFERENCE)
+catalog = cached(settings.CACHE_CONTROL_CATALOG)
+
+api_router.include_router(perfumes.router, prefix="/perfumes", tags=["perfumes"], dependencies=catalog)
+api_router.include_router(reviews.router, prefix="/perfumes", tags=["reviews"],
+                          dependencies=cached(settings.CACHE_CONTROL_REVIEWS))
+api_router.include_router(brands.router, prefix="/brands", tags=["brands"], dependencies=reference)
+api_router.include_router(types.router, prefix="/types", tags=["types"], dependencies=reference)
+api_router.include_router(countries.router, prefix="/countries", tags=["countries"], dependencies=reference)
+api_router.include_router(families.router, prefix="/families", tags=["families"], dependencies=reference)
+api_router.include_router(concentrations.router, prefix="/concentrations", tags=["concentrations"], dependencies=reference)
+api_router.include_router(perfumers.router, prefix="/perfumers", tags=["perfumers"], dependencies=reference)
+api_router.include_router(notes.router, prefix="/notes", tags=["notes"], dependencies=catalog)
+api_router.include_router(main_accords.router, prefix="/main-accords", tags=["main-accords"], dependencies=reference) 
+api_router.include_router(autocomplete.router, prefix="/autocomplete", tags=["autocomplete"],
+                          dependencies=cached(settings.CACHE_CONTROL_SEARCH))
+api_router.include_router(leaderboards.router, prefix="/leaderboards", tags=["leaderboards"], dependencies=catalog)
+api_router.include_router(images.router, prefix="/images", tags=["images"])
+
+if settings.DIAGNOSTICS_ENABLED:
+    api_router.include_router(diagnostics.router, prefix="/diagnostics", tags=["diagnostics"])
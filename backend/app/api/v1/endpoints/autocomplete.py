@@ -0,0 +1,29 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from app.core.request_stats import TimedRoute
+from app.core.responses import respond
+from app.schemas.autocomplete import AutocompleteResult
+from app.services.autocomplete import KINDS, MAX_KEY_BYTES, MAX_SUGGESTIONS, autocomplete_index
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/", response_model=AutocompleteResult, response_model_exclude_none=True)
+async def autocomplete(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=MAX_KEY_BYTES),
+    types: Optional[str] = Query(None, description="Comma-separated subset of perfumes,brands,notes,perfumers"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)
+):
+    """
+    Typeahead suggestions whose name has a word starting with `q`, most popular first,
+    grouped by kind. Served from an in-memory prefix index without touching the database.
+    """
+    kinds = KINDS
+    if types:
+        kinds = tuple(kind.strip() for kind in types.split(",") if kind.strip())
+        unknown = [kind for kind in kinds if kind not in KINDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown suggestion types: {', '.join(unknown)}")
+    await autocomplete_index.ensure_fresh()
+    return respond(autocomplete_index.complete(q, kinds, limit), response)
@@ -0,0 +1,42 @@
+from typing import Any, Dict
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import profiler
+from app.core.cache import compressed_cache, reference_cache
+from app.core.config import settings
+from app.core.request_stats import TimedRoute
+from app.db.session import pool_stats
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/cache")
+async def get_cache_stats() -> Dict[str, Any]:
+    """
+    Hit/miss counters and occupancy of the in-process caches in this worker.
+    """
+    return {"reference": reference_cache.stats(), "compressed": compressed_cache.stats()}
+
+
+@router.get("/pool")
+async def get_pool_stats() -> Dict[str, Any]:
+    """
+    Connection pool occupancy, saturation and checkout wait times in this worker.
+    """
+    return pool_stats()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def get_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000)
+):
+    """
+    Sample the stacks of this worker for `seconds` while it keeps serving traffic.
+    Returns collapsed stacks (`frame;frame count`) for flamegraph.pl or speedscope.
+    """
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    if profiler.is_capturing():
+        raise HTTPException(status_code=409, detail="A profile is already being captured")
+    return await profiler.capture(seconds, interval_ms / 1000)
@@ -0,0 +1,43 @@
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.responses import FileResponse
+
+from app.core.config import settings
+from app.core.http_cache import etag_matches
+from app.core.request_stats import TimedRoute
+from app.services.images import SUPPORTED_FORMATS, ImageNotFoundError, get_derivative, negotiate_format
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/{width}/{path:path}", response_class=FileResponse)
+async def get_image(
+    width: int,
+    path: str,
+    format: Optional[str] = Query(None, description="avif, webp or jpeg; negotiated from Accept when omitted"),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    A static image (e.g. a perfume's `local_image_path` or `notes_images/<file>`) resized
+    to one of the configured widths and transcoded, cached on disk after the first request.
+    """
+    if width not in settings.IMAGE_WIDTHS:
+        raise HTTPException(status_code=400, detail=f"Width must be one of {settings.IMAGE_WIDTHS}")
+    if format is not None and format not in SUPPORTED_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of {list(SUPPORTED_FORMATS)}")
+    
+    try:
+        target, media_type = await get_derivative(path, width, format or negotiate_format(accept))
+    except ImageNotFoundError:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    stat = target.stat()
+    headers = {
+        "Cache-Control": settings.IMAGE_CACHE_CONTROL,
+        "ETag": f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+    }
+    if format is None:
+        headers["Vary"] = "Accept"
+    if etag_matches(headers["ETag"], if_none_match):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(target, media_type=media_type, headers=headers, stat_result=stat)
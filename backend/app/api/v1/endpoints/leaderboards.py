@@ -0,0 +1,35 @@
+from typing import Dict, List
+from fastapi import APIRouter, HTTPException, Query, Response
+
+from app.core.config import settings
+from app.core.request_stats import TimedRoute
+from app.schemas.perfume import PerfumeList
+from app.services.leaderboards import leaderboard_index
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/", response_model=Dict[str, List[PerfumeList]])
+async def read_leaderboards(
+    limit: int = Query(12, ge=1, le=settings.LEADERBOARD_SIZE)
+):
+    """
+    The top `limit` perfumes of every leaderboard (trending, top-rated, most-loved),
+    keyed by board, for the home page in one call. Served from precomputed
+    in-memory rankings refreshed every few minutes; no query runs per request.
+    """
+    await leaderboard_index.ensure_fresh()
+    return Response(content=leaderboard_index.render_all(limit), media_type="application/json")
+
+@router.get("/{board}", response_model=List[PerfumeList])
+async def read_leaderboard(
+    board: str,
+    limit: int = Query(12, ge=1, le=settings.LEADERBOARD_SIZE)
+):
+    """
+    The top `limit` perfumes of one leaderboard, best first.
+    """
+    await leaderboard_index.ensure_fresh()
+    content = leaderboard_index.render(board, limit)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Leaderboard not found")
+    return Response(content=content, media_type="application/json")
@@ -1,24 +1,29 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from app.db.session import get_db
+from app.core.pagination import set_next_cursor
+from app.core.request_stats import TimedRoute
+from app.core.responses import respond
+from app.crud.lookup import list_lookup
+from app.db.session import get_read_db
 from app.models.main_accord import MainAccord as MainAccordModel
 from app.schemas.main_accord import MainAccord
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/", response_model=List[MainAccord])
 async def read_main_accords(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Retrieve main accords.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
     """
-    query = select(MainAccordModel).offset(skip).limit(limit)
-    result = await db.execute(query)
-    main_accords = result.scalars().all()
-    return main_accords 
\ No newline at end of file
+    main_accords, next_page = await list_lookup(db, MainAccordModel, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_page)
+    return respond(main_accords, response) 
\ No newline at end of file
@@ -1,54 +1,63 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, and_
 from sqlalchemy.orm import selectinload
 
-from app.db.session import get_db
+from app.core.pagination import next_cursor, paginate, set_next_cursor
+from app.core.request_stats import TimedRoute
+from app.core.responses import respond
+from app.crud.lookup import list_lookup
+from app.db.session import get_read_db
 from app.models.note import Note as NoteModel, NoteFamily as NoteFamilyModel, NoteMood as NoteMoodModel
+from app.schemas.batch import BatchRequest
 from app.schemas.note import Note, NoteFamily, NoteMood, NoteList
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/families/", response_model=List[NoteFamily])
 async def get_note_families(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Get all note families.
     """
-    query = select(NoteFamilyModel).offset(skip).limit(limit)
-    result = await db.execute(query)
-    families = result.scalars().all()
-    return families
+    families, next_page = await list_lookup(db, NoteFamilyModel, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_page)
+    return respond(families, response)
 
 @router.get("/moods/", response_model=List[NoteMood])
 async def get_note_moods(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Get all note moods.
     """
-    query = select(NoteMoodModel).offset(skip).limit(limit)
-    result = await db.execute(query)
-    moods = result.scalars().all()
-    return moods
+    moods, next_page = await list_lookup(db, NoteMoodModel, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_page)
+    return respond(moods, response)
 
 @router.get("/", response_model=List[NoteList])
 async def get_notes(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     family: Optional[str] = None,
     mood: Optional[str] = None
 ):
     """
     Get all notes with optional filtering by family and mood names.
-    Returns only id, name, and image_filename.
+    Returns only id, name, and image_filename, ordered by name.
     """
     query = (
         select(
@@ -71,17 +80,21 @@ async def get_notes(
     if filters:
         query = query.filter(and_(*filters))
     
-    query = query.offset(skip).limit(limit)
+    query = paginate(query, NoteModel.name, NoteModel.id, skip=skip, limit=limit, cursor=cursor)
     result = await db.execute(query)
-    return [{"id": id, "name": name, "image_filename": image_filename} for id, name, image_filename in result]
+    notes = [{"id": id, "name": name, "image_filename": image_filename} for id, name, image_filename in result]
+    set_next_cursor(response, next_cursor(notes, limit, lambda note: (note["name"], note["id"])))
+    return respond(notes, response)
 
 @router.get("/search/", response_model=List[NoteList])
 async def search_notes(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     q: Optional[str] = None,
     family: Optional[str] = None,
     mood: Optional[str] = None,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Search notes by name and filter by family and mood names.
@@ -116,14 +129,38 @@ async def search_notes(
     if filters:
         query = query.filter(and_(*filters))
     
-    query = query.limit(limit)
+    query = paginate(query, NoteModel.name, NoteModel.id, limit=limit, cursor=cursor)
+    result = await db.execute(query)
+    notes = [{"id": id, "name": name, "image_filename": image_filename} for id, name, image_filename in result]
+    set_next_cursor(response, next_cursor(notes, limit, lambda note: (note["name"], note["id"])))
+    return respond(notes, response)
+
+@router.post("/batch", response_model=List[Note])
+async def get_notes_batch(
+    batch: BatchRequest,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get many notes by ID in one call, e.g. `{"ids": [3, 1, 8]}`.
+    Returns full note details in request order; unknown IDs are skipped.
+    Families and moods are loaded with one extra query each, whatever the batch size.
+    """
+    query = (
+        select(NoteModel)
+        .options(
+            selectinload(NoteModel.family),
+            selectinload(NoteModel.moods)
+        )
+        .filter(NoteModel.id.in_(batch.ids))
+    )
     result = await db.execute(query)
-    return [{"id": id, "name": name, "image_filename": image_filename} for id, name, image_filename in result]
+    notes = {note.id: note for note in result.scalars()}
+    return [notes[note_id] for note_id in batch.ids if note_id in notes]
 
 @router.get("/{note_id}", response_model=Note)
 async def get_note(
     note_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get a specific note by ID.
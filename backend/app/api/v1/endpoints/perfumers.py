@@ -1,24 +1,29 @@
-from typing import List
-from fastapi import APIRouter, Depends
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from app.db.session import get_db
+from app.core.pagination import set_next_cursor
+from app.core.request_stats import TimedRoute
+from app.core.responses import respond
+from app.crud.lookup import list_lookup
+from app.db.session import get_read_db
 from app.models.perfumer import Perfumer as PerfumerModel
 from app.schemas.perfumer import Perfumer
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/", response_model=List[Perfumer])
 async def read_perfumers(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Retrieve perfumers.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
     """
-    query = select(PerfumerModel).offset(skip).limit(limit)
-    result = await db.execute(query)
-    perfumers = result.scalars().all()
-    return perfumers 
\ No newline at end of file
+    perfumers, next_page = await list_lookup(db, PerfumerModel, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_page)
+    return respond(perfumers, response) 
\ No newline at end of file
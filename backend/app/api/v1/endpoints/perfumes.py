@@ -1,48 +1,76 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, HTTPException
+from typing import List, Optional, Union
+import numpy as np
+from fastapi import APIRouter, Depends, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_, and_
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import cast, func, literal_column, select, or_, and_, union_all
 
-from app.db.session import get_db
+from app.core.pagination import decode_cursor, next_cursor, paginate, set_next_cursor, slice_after_cursor
+from app.core.request_stats import TimedRoute
+from app.core.responses import respond
+from app.crud.lookup import list_lookup
+from app.crud.perfume import (
+    get_perfume_documents, get_perfume_list_items, get_sparse_items, parse_fields, with_fields
+)
+from app.crud.perfume_document import get_rendered_perfume, get_rendered_perfumes
+from app.crud.perfume_export import start_stream, stream_csv, stream_ndjson
+from app.crud.perfume_facets import get_facet_counts
+from app.db.session import get_read_db, read_engine
 from app.models.perfume import Perfume as PerfumeModel
 from app.models.perfume import Tag as TagModel
-from app.models.perfume import PerfumeNote as PerfumeNoteModel
-from app.models.note import Note as NoteModel
-from app.models.main_accord import MainAccord as MainAccordModel
-from app.schemas.perfume import Perfume, PerfumeList, Tag
+from app.models.review import PerfumeRatingStats as PerfumeRatingStatsModel
+from app.schemas.batch import BatchRequest
+from app.schemas.perfume import Perfume, PerfumeList, PerfumeSearchResult, Tag
 from app.models.brand import Brand as BrandModel
 from app.models.country import Country as CountryModel
 from app.models.type import Type as TypeModel
 from app.models.family import Family as FamilyModel
 from app.models.perfumer import Perfumer as PerfumerModel
 from app.models.concentration import Concentration as ConcentrationModel
+from app.services import search
+from app.services.note_index import UnknownNoteError, note_index
+from app.services.recommendations import similarity_index
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.get("/tags/", response_model=List[Tag])
 async def get_tags(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None
 ):
     """
     Get all tags.
     """
-    query = select(TagModel).offset(skip).limit(limit)
-    result = await db.execute(query)
-    tags = result.scalars().all()
-    return tags
+    tags, next_page = await list_lookup(db, TagModel, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, next_page)
+    return respond(tags, response)
 
 @router.get("/", response_model=List[PerfumeList])
 async def read_perfumes(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
     """
-    Retrieve perfumes with only id, name, brand name, and image path.
+    Retrieve perfumes with only id, name, brand name, and image path, ordered by id.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
+    `fields=name,season,tags` selects other perfume fields instead (id is always included);
+    only those columns and relationships are queried.
     """
+    fieldset = parse_fields(fields)
+    if fieldset:
+        query = with_fields(select(PerfumeModel.id).join(BrandModel), fieldset)
+        query = paginate(query, PerfumeModel.id, PerfumeModel.id, skip=skip, limit=limit, cursor=cursor)
+        perfumes = await get_sparse_items(db, (await db.execute(query)).all(), fieldset)
+        set_next_cursor(response, next_cursor(perfumes, limit, lambda perfume: (perfume["id"], perfume["id"])))
+        return respond(perfumes, response, sparse=True)
+    
     query = (
         select(
             PerfumeModel.id,
@@ -51,16 +79,55 @@ async def read_perfumes(
             PerfumeModel.local_image_path
         )
         .join(BrandModel)
-        .offset(skip)
-        .limit(limit)
     )
+    query = paginate(query, PerfumeModel.id, PerfumeModel.id, skip=skip, limit=limit, cursor=cursor)
     result = await db.execute(query)
-    return [{"id": id, "name": name, "brand_name": brand_name, "local_image_path": local_image_path} 
-            for id, name, brand_name, local_image_path in result]
+    perfumes = [{"id": id, "name": name, "brand_name": brand_name, "local_image_path": local_image_path} 
+                for id, name, brand_name, local_image_path in result]
+    set_next_cursor(response, next_cursor(perfumes, limit, lambda perfume: (perfume["id"], perfume["id"])))
+    return respond(perfumes, response)
+
+def rated_first(query, sort: str, skip: int, limit: int, cursor: Optional[str]):
+    """
+    One page of ``query`` with a ``sort_key`` column: rated perfumes by their
+    score (or rating count), best first, then unrated ones by id under the
+    key -1 (rated scores and counts are at least 1).
+
+    Each side is paged on its own index, ``ix_perfume_rating_stats_*`` for
+    the rated and the primary key for the unrated, and only the two short
+    pages are merged. Ordering one outer join by ``COALESCE(score, -1)``, or
+    a plain ``UNION ALL`` of both sides, sorts every match on every request.
+    """
+    stats = PerfumeRatingStatsModel
+    sort_key = stats.score if sort == "rating" else stats.rating_count
+    depth = limit if cursor else skip + limit
+
+    rated = query.join(stats, stats.perfume_id == PerfumeModel.id).filter(stats.rating_count > 0)
+    rated = paginate(rated.add_columns(sort_key.label("sort_key")), sort_key, PerfumeModel.id,
+                     limit=depth, cursor=cursor, descending=True)
 
-@router.get("/search/", response_model=List[PerfumeList])
+    rated_ids = select(stats.perfume_id).where(stats.perfume_id == PerfumeModel.id, stats.rating_count > 0)
+    unrated = query
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if sort_value == -1:
+            # Bound both sides of the anti-join; PostgreSQL does not carry the bound across on its own
+            unrated = unrated.filter(PerfumeModel.id > last_id)
+            rated_ids = rated_ids.where(stats.perfume_id > last_id)
+    # A typed constant rather than a bind parameter, so the planner can walk the primary key
+    unrated_key = cast(literal_column("-1"), sort_key.type)
+    unrated = unrated.filter(~rated_ids.exists()).add_columns(unrated_key.label("sort_key"))
+    unrated = unrated.order_by(PerfumeModel.id).limit(depth)
+
+    # Each page as a subquery: SQLite allows no ORDER BY / LIMIT on a UNION member
+    ranked = union_all(select(rated.subquery()), select(unrated.subquery())).subquery("ranked")
+    page = select(ranked).order_by(ranked.c.sort_key.desc(), ranked.c.id)
+    return page.limit(limit) if cursor else page.offset(skip).limit(limit)
+
+@router.get("/search/", response_model=Union[List[PerfumeList], PerfumeSearchResult])
 async def search_perfumes(
-    db: AsyncSession = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     q: Optional[str] = None,
     country: Optional[str] = None,
     gender: Optional[str] = Query(None, regex="^(Male|Female|Unisex)$"),
@@ -72,30 +139,42 @@ async def search_perfumes(
     perfumer: Optional[str] = None,
     tag: Optional[str] = None,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    facets: bool = False,
+    fields: Optional[str] = None,
+    sort: Optional[str] = Query(None, pattern="^(rating|popularity)$")
 ):
     """
     Search and filter perfumes with various criteria, returning only id, name, brand name, and image path.
+    Results are ranked by relevance when `q` is given, otherwise ordered by id.
+    `sort=rating` (Bayesian average rating) and `sort=popularity` (number of ratings) order by
+    the precomputed rating aggregates instead, best first, with unrated perfumes last by id.
+    With `facets=true` the page is wrapped as `{items, total, facets}` where `facets` holds
+    per-value counts of brand, gender, concentration, family, season and accord for the
+    current filters, all computed in one extra query.
+    `fields=` selects which perfume fields each item carries, as on `/perfumes/`.
     """
-    query = (
-        select(
-            PerfumeModel.id,
-            PerfumeModel.name,
-            BrandModel.name.label('brand_name'),
-            PerfumeModel.local_image_path
-        )
-        .join(BrandModel)
+    fieldset = parse_fields(fields)
+    list_columns = (
+        PerfumeModel.id,
+        PerfumeModel.name,
+        BrandModel.name.label('brand_name'),
+        PerfumeModel.local_image_path
     )
+    query = select(*(list_columns[:1] if fieldset else list_columns)).join(BrandModel)
 
     filters = []
+    is_postgres = search.is_postgres(db.get_bind().dialect.name)
+    use_sql_search = bool(q) and is_postgres
     
-    if q:
-        filters.append(
-            or_(
-                PerfumeModel.name.ilike(f"%{q}%"),
-                BrandModel.name.ilike(f"%{q}%")
-            )
-        )
+    if facets and not is_postgres:
+        raise HTTPException(status_code=400, detail="Facet counts require PostgreSQL")
+    if sort and q and not use_sql_search:
+        raise HTTPException(status_code=400, detail="Sorting search results requires PostgreSQL")
+    
+    if use_sql_search:
+        filters.append(search.search_predicate(q, PerfumeModel.name, BrandModel.name))
     
     # Country filter
     if country:
@@ -103,7 +182,7 @@ async def search_perfumes(
         filters.append(CountryModel.name.ilike(f"%{country}%"))
     
     if gender:
-        filters.append(PerfumeModel.gender.ilike(gender))
+        filters.append(func.lower(PerfumeModel.gender) == gender.lower())
     
     # Brand filter
     if brand:
@@ -140,73 +219,165 @@ async def search_perfumes(
     if filters:
         query = query.filter(and_(*filters))
     
-    query = query.offset(skip).limit(limit)
+    matched_ids = query.with_only_columns(PerfumeModel.id)
+    
+    if q and not use_sql_search:
+        # In-process fallback for dialects without pg_trgm (SQLite test runs)
+        result = await db.execute(query.with_only_columns(*list_columns))
+        ranked = search.rank_rows(q, result.all())
+        rank_key = lambda item: (item[0], item[1][0])
+        ranked = slice_after_cursor(ranked, cursor, rank_key, descending=True) if cursor else ranked[skip:]
+        ranked = ranked[:limit]
+        set_next_cursor(response, next_cursor(ranked, limit, rank_key))
+        if fieldset:
+            documents = await get_perfume_documents(db, [row[0] for _, row in ranked], fieldset)
+            return respond([documents[row[0]] for _, row in ranked if row[0] in documents], response, sparse=True)
+        return respond([{"id": id, "name": name, "brand_name": brand_name, "local_image_path": local_image_path}
+                        for _, (id, name, brand_name, local_image_path) in ranked], response)
+    
+    if fieldset:
+        query = with_fields(query, fieldset)
+    
+    if sort:
+        query = rated_first(query, sort, skip, limit, cursor)
+        cursor_key = lambda row: (row.sort_key, row.id)
+    elif use_sql_search:
+        rank = search.rank_expression(q, PerfumeModel.name, BrandModel.name).label("rank")
+        query = paginate(query.add_columns(rank), rank, PerfumeModel.id,
+                         skip=skip, limit=limit, cursor=cursor, descending=True)
+        cursor_key = lambda row: (row.rank, row.id)
+    else:
+        query = paginate(query, PerfumeModel.id, PerfumeModel.id, skip=skip, limit=limit, cursor=cursor)
+        cursor_key = lambda row: (row.id, row.id)
+    
     result = await db.execute(query)
-    return [{"id": id, "name": name, "brand_name": brand_name, "local_image_path": local_image_path} 
-            for id, name, brand_name, local_image_path in result]
+    rows = result.all()
+    set_next_cursor(response, next_cursor(rows, limit, cursor_key))
+    if fieldset:
+        items = await get_sparse_items(db, rows, fieldset)
+    else:
+        items = [{"id": row.id, "name": row.name, "brand_name": row.brand_name, "local_image_path": row.local_image_path}
+                 for row in rows]
+    
+    if not facets:
+        return respond(items, response, sparse=bool(fieldset))
+    
+    total, facet_counts = await get_facet_counts(db, matched_ids)
+    return respond({"items": items, "total": total, "facets": facet_counts}, response, sparse=bool(fieldset))
+
+@router.get("/by-notes/", response_model=List[PerfumeList])
+async def find_perfumes_by_notes(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    include: List[str] = Query([]),
+    exclude: List[str] = Query([]),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+):
+    """
+    Find perfumes by their notes, e.g. `include=base:vanilla&include=base:oud&exclude=patchouli`.
+    Each term is `[top|middle|base:]note` where note is a note name or id; without a layer
+    the note may sit in any layer. Results are ordered by id.
+    """
+    await note_index.ensure_fresh()
+    try:
+        include_terms = [note_index.resolve(term) for term in include]
+        exclude_terms = [note_index.resolve(term) for term in exclude]
+    except UnknownNoteError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    
+    matches = note_index.find(include_terms, exclude_terms)
+    if cursor:
+        _, last_id = decode_cursor(cursor)
+        start = int(np.searchsorted(matches, last_id, side="right"))
+    else:
+        start = skip
+    page = matches[start:start + limit].tolist()
+    
+    set_next_cursor(response, next_cursor(page, limit, lambda perfume_id: (perfume_id, perfume_id)))
+    return respond(await get_perfume_list_items(db, page), response)
+
+@router.get("/export")
+async def export_perfumes(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$")
+):
+    """
+    Stream the whole catalog (brand, notes, accords and tags included) as
+    NDJSON or CSV, in the bulk import feed format. Requires PostgreSQL.
+    """
+    if not search.is_postgres(read_engine.dialect.name):
+        raise HTTPException(status_code=400, detail="Catalog export requires PostgreSQL")
+    if format == "csv":
+        return StreamingResponse(
+            await start_stream(stream_csv()),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="perfumes.csv"'}
+        )
+    return StreamingResponse(
+        await start_stream(stream_ndjson()),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="perfumes.ndjson"'}
+    )
+
+@router.post("/batch", response_model=List[Perfume])
+async def get_perfumes_batch(
+    batch: BatchRequest,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get many perfumes by ID in one call, e.g. `{"ids": [12, 7, 40]}`.
+    Returns full perfume details in request order from the pre-rendered document
+    store; unknown IDs are skipped. The number of queries does not depend on how
+    many IDs are requested.
+    """
+    rendered = await get_rendered_perfumes(db, batch.ids)
+    content = b"[" + b",".join(rendered[perfume_id] for perfume_id in batch.ids if perfume_id in rendered) + b"]"
+    return Response(content=content, media_type="application/json")
 
 @router.get("/{perfume_id}", response_model=Perfume)
 async def get_perfume(
     perfume_id: int,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db),
+    fields: Optional[str] = None
 ):
     """
     Get a specific perfume by ID.
-    Returns full perfume details including all relationships.
+    Returns full perfume details including all relationships, served from the
+    pre-rendered document store. `fields=name,brand,perfume_notes` returns only
+    those fields (plus id), loading just the columns and relationships they need.
     """
-    query = (
-        select(PerfumeModel)
-        .options(
-            selectinload(PerfumeModel.brand),
-            selectinload(PerfumeModel.type),
-            selectinload(PerfumeModel.family),
-            selectinload(PerfumeModel.concentration),
-            selectinload(PerfumeModel.country),
-            selectinload(PerfumeModel.perfumer),
-            selectinload(PerfumeModel.main_accords),
-            selectinload(PerfumeModel.perfume_notes).selectinload(PerfumeNoteModel.note),
-            selectinload(PerfumeModel.perfume_notes).selectinload(PerfumeNoteModel.note).selectinload(NoteModel.family),
-            selectinload(PerfumeModel.perfume_notes).selectinload(PerfumeNoteModel.note).selectinload(NoteModel.moods),
-            selectinload(PerfumeModel.tags)
-        )
-        .filter(PerfumeModel.id == perfume_id)
-    )
-    result = await db.execute(query)
-    perfume = result.scalar_one_or_none()
+    fieldset = parse_fields(fields)
+    if fieldset:
+        document = (await get_perfume_documents(db, [perfume_id], fieldset)).get(perfume_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Perfume not found")
+        return respond(document, sparse=True)
+    
+    content = await get_rendered_perfume(db, perfume_id)
     
-    if perfume is None:
+    if content is None:
         raise HTTPException(status_code=404, detail="Perfume not found")
     
-    # Create a dict with the concentration name instead of the object
-    perfume_data = {
-        "id": perfume.id,
-        "name": perfume.name,
-        "local_image_path": perfume.local_image_path,
-        "gender": perfume.gender,
-        "category": perfume.category,
-        "release_year": perfume.release_year,
-        "description": perfume.description,
-        "longevity": perfume.longevity,
-        "sillage": perfume.sillage,
-        "occasion": perfume.occasion,
-        "season": perfume.season,
-        "inspiration": perfume.inspiration,
-        "brand": perfume.brand.name if perfume.brand else None,
-        "concentration": perfume.concentration.name if perfume.concentration else None,
-        "type": perfume.type.name if perfume.type else None,
-        "family": perfume.family.name if perfume.family else None,
-        "country": perfume.country.name if perfume.country else None,
-        "perfumer": perfume.perfumer.name if perfume.perfumer else None,
-        "perfume_notes": [
-            {
-                "note_type": note.note_type,
-                "note": note.note.name,
-                "image_filename": note.note.image_filename if note.note else None
-            }
-            for note in perfume.perfume_notes
-        ] if perfume.perfume_notes else [],
-        "main_accords": [accord.name for accord in perfume.main_accords] if perfume.main_accords else [],
-        "tags": [tag.name for tag in perfume.tags] if perfume.tags else []
-    }
-    
-    return Perfume.model_validate(perfume_data) 
\ No newline at end of file
+    return Response(content=content, media_type="application/json")
+
+@router.get("/{perfume_id}/similar", response_model=List[PerfumeList])
+async def get_similar_perfumes(
+    perfume_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """
+    Perfumes most similar to this one by notes (weighted by layer), main accords and tags.
+    """
+    await similarity_index.ensure_fresh()
+    similar = similarity_index.similar(perfume_id, limit)
+    
+    if similar is None:
+        exists = await db.scalar(select(PerfumeModel.id).where(PerfumeModel.id == perfume_id))
+        if exists is None:
+            raise HTTPException(status_code=404, detail="Perfume not found")
+        return []
+    
+    return respond(await get_perfume_list_items(db, [similar_id for similar_id, _ in similar]), response)
@@ -0,0 +1,59 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import set_next_cursor
+from app.core.request_stats import TimedRoute
+from app.core.responses import respond
+from app.crud.review import create_review, get_rating_stats, list_reviews, perfume_exists
+from app.db.session import get_db, get_read_db
+from app.schemas.review import RatingStats, Review, ReviewCreate
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/{perfume_id}/ratings", response_model=RatingStats)
+async def read_rating_stats(
+    perfume_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Rating count, mean, star histogram and longevity / sillage votes for a perfume.
+    Aggregates are maintained incrementally and trail new reviews by a few seconds.
+    """
+    stats = await get_rating_stats(db, perfume_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Perfume not found")
+    return respond(stats, response)
+
+@router.get("/{perfume_id}/reviews", response_model=List[Review])
+async def read_reviews(
+    perfume_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """
+    A perfume's reviews, newest first.
+    Pass the `X-Next-Cursor` response header back as `cursor` for the next page.
+    """
+    reviews, next_page = await list_reviews(db, perfume_id, skip=skip, limit=limit, cursor=cursor)
+    if not reviews and not cursor and not skip and not await perfume_exists(db, perfume_id):
+        raise HTTPException(status_code=404, detail="Perfume not found")
+    set_next_cursor(response, next_page)
+    return respond(reviews, response)
+
+@router.post("/{perfume_id}/reviews", response_model=Review, status_code=201)
+async def add_review(
+    perfume_id: int,
+    review: ReviewCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Review a perfume with a 1-5 star rating and optional longevity / sillage votes.
+    """
+    if not await perfume_exists(db, perfume_id):
+        raise HTTPException(status_code=404, detail="Perfume not found")
+    return await create_review(db, perfume_id, review)
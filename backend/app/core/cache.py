@@ -0,0 +1,84 @@
+"""
+In-process TTL + LRU cache.
+
+Entries are keyed by tuples whose first element is a namespace (the table
+name for reference data) so a whole namespace can be dropped at once. The
+cache is per worker process: explicit invalidation only reaches the current
+process, and the TTL bounds how stale the other workers can be.
+"""
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Any:
+        """Return the cached value or ``MISSING``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, namespace: Optional[Hashable] = None) -> int:
+        """Drop every entry, or only those in ``namespace``. Returns the number dropped."""
+        with self._lock:
+            if namespace is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+                return dropped
+            keys = [key for key in self._entries if key[0] == namespace]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+reference_cache = TTLCache(
+    maxsize=settings.REFERENCE_CACHE_MAXSIZE,
+    ttl=settings.REFERENCE_CACHE_TTL_SECONDS,
+)
+
+# Compressed response bodies keyed by (namespace, etag, encoding), see app.core.compression
+compressed_cache = TTLCache(
+    maxsize=settings.COMPRESSION_CACHE_MAXSIZE,
+    ttl=settings.COMPRESSION_CACHE_TTL_SECONDS,
+)
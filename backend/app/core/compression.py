@@ -0,0 +1,208 @@
+"""
+Response compression negotiated through ``Accept-Encoding``.
+
+Bodies of compressible types (JSON, NDJSON, CSV, text) at or above
+``COMPRESSION_MIN_SIZE`` bytes are sent as brotli when the client accepts it
+and the ``brotli`` package is installed, otherwise as gzip. Single-chunk
+bodies that carry an ETag (see ``app.core.http_cache``) are cached
+compressed under ``(etag, encoding)``, so a hot perfume page or lookup list
+is compressed once per worker rather than on every hit. Streaming
+responses are compressed chunk by chunk.
+
+A compressed representation gets its own strong ETag (``"<hash>-br"``). The
+suffix is removed from incoming ``If-None-Match`` headers before they reach
+the conditional-GET middleware, so revalidation still ends in a 304.
+"""
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from app.core.cache import MISSING, compressed_cache
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported coding in ``Accept-Encoding`` (brotli wins ties), or None."""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best = max(ENCODINGS, key=lambda coding: weights.get(coding, wildcard))
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+class _StreamCompressor:
+    def __init__(self, encoding: str) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+            self._gzip = None
+        else:
+            self._brotli = None
+            self._gzip = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._brotli.process(chunk) if self._brotli else self._gzip.compress(chunk)
+
+    def finish(self) -> bytes:
+        return self._brotli.finish() if self._brotli else self._gzip.flush()
+
+
+def _header(headers: Headers, name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _without(headers: Headers, *names: bytes) -> Headers:
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _suffixed(etag: str, encoding: str) -> str:
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+
+def _strip_etag_suffixes(if_none_match: str) -> Tuple[str, Optional[str]]:
+    """Remove ``-br``/``-gzip`` from each entity tag; returns the header and the suffix seen."""
+    seen = None
+    tags = []
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        for encoding in ("br", "gzip"):
+            suffix = f'-{encoding}"'
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)] + '"'
+                seen = seen or encoding
+                break
+        tags.append(tag)
+    return ", ".join(tags), seen
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; single-chunk bodies are compressed whole, streams incrementally."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = scope["headers"]
+        encoding = negotiate_encoding(_header(request_headers, b"accept-encoding"))
+        if encoding is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        client_suffix = None
+        if_none_match = _header(request_headers, b"if-none-match")
+        if if_none_match:
+            stripped, client_suffix = _strip_etag_suffixes(if_none_match)
+            # In place: outer middleware reads what the router adds to this scope (e.g. "route")
+            scope["headers"] = (
+                _without(request_headers, b"if-none-match") + [(b"if-none-match", stripped.encode("latin-1"))]
+            )
+
+        start_message = None
+        passthrough = False
+        stream = None
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message, passthrough, stream
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers: Headers = list(message.get("headers", []))
+                etag = _header(headers, b"etag")
+                if message["status"] == 304 and etag and client_suffix:
+                    headers = _without(headers, b"etag") + [(b"etag", _suffixed(etag, client_suffix).encode("latin-1"))]
+                    message = {**message, "headers": headers}
+                content_type = _header(headers, b"content-type") or ""
+                if (
+                    message["status"] < 200 or message["status"] in (204, 304)
+                    or _header(headers, b"content-encoding") is not None
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                vary = _header(headers, b"vary")
+                headers = _without(headers, b"vary") + [(b"vary", f"{vary}, Accept-Encoding".encode() if vary else b"Accept-Encoding")]
+                start_message = {**message, "headers": headers}
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            headers = start_message["headers"]
+
+            if stream is None and not more_body:
+                passthrough = True
+                if len(body) < settings.COMPRESSION_MIN_SIZE:
+                    await send(start_message)
+                    await send(message)
+                    return
+                etag = _header(headers, b"etag")
+                compressed = compressed_cache.get(("compressed", etag, encoding)) if etag else MISSING
+                if compressed is MISSING:
+                    compressed = compress(body, encoding)
+                    if etag and len(body) <= settings.COMPRESSION_CACHE_MAX_BODY:
+                        compressed_cache.set(("compressed", etag, encoding), compressed)
+                headers = _without(headers, b"content-length", b"etag") + [
+                    (b"content-encoding", encoding.encode()),
+                    (b"content-length", str(len(compressed)).encode()),
+                ]
+                if etag:
+                    headers.append((b"etag", _suffixed(etag, encoding).encode("latin-1")))
+                await send({**start_message, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            if stream is None:
+                stream = _StreamCompressor(encoding)
+                etag = _header(headers, b"etag")
+                headers = _without(headers, b"content-length", b"etag") + [(b"content-encoding", encoding.encode())]
+                if etag:
+                    headers.append((b"etag", _suffixed(etag, encoding).encode("latin-1")))
+                await send({**start_message, "headers": headers})
+
+            chunk = stream.compress(body)
+            if not more_body:
+                chunk += stream.finish()
+                passthrough = True
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, validator
 
@@ -17,10 +17,98 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = "mydatabase"
     POSTGRES_PORT: str = "5432"
     
+    # Full database URL override (e.g. sqlite+aiosqlite:///perfumes.db for local test runs)
+    DATABASE_URL: Optional[str] = None
+    
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
         return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @property
+    def SYNC_DATABASE_URI(self) -> str:
+        # Alembic and other blocking tools need a synchronous driver
+        return (
+            self.SQLALCHEMY_DATABASE_URI
+            .replace("+asyncpg", "+psycopg2")
+            .replace("+aiosqlite", "")
+        )
+    
+    # Optional read replica for the read-only endpoints (same URL format)
+    DATABASE_READ_REPLICA_URL: Optional[str] = None
+    
+    # Connection pool, per worker process and per engine
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statement cache per connection (0 when behind pgbouncer)
+    DB_STATEMENT_CACHE_SIZE: int = 256
+    # Log every SQL statement (development only)
+    DB_ECHO: bool = False
+    
+    # Server-Timing header, per-request SQL counts and the slow-query log
+    REQUEST_TIMING_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    # Requests running more statements than this are logged (likely N+1)
+    QUERY_COUNT_WARNING: int = 50
+    
+    # Prometheus /metrics (set PROMETHEUS_MULTIPROC_DIR when running several workers)
+    METRICS_ENABLED: bool = True
+    METRICS_REFRESH_SECONDS: float = 5.0
+    
+    # Encode trusted list rows with orjson, skipping response_model validation
+    FAST_JSON_RESPONSES: bool = False
+    
+    # HTTP caching: Cache-Control per router group, ETags and 304s
+    HTTP_CACHE_ENABLED: bool = True
+    CACHE_CONTROL_REFERENCE: str = "public, max-age=300, stale-while-revalidate=3600"
+    CACHE_CONTROL_CATALOG: str = "public, max-age=60, stale-while-revalidate=600"
+    CACHE_CONTROL_SEARCH: str = "public, max-age=30, stale-while-revalidate=120"
+    # A posted review shows on the next load: clients revalidate against the ETag every time
+    CACHE_CONTROL_REVIEWS: str = "no-cache"
+    
+    # gzip/brotli response compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 5
+    # Precompressed bodies of ETagged responses, per worker
+    COMPRESSION_CACHE_MAXSIZE: int = 2048
+    COMPRESSION_CACHE_TTL_SECONDS: int = 3600
+    COMPRESSION_CACHE_MAX_BODY: int = 262144
+    
+    # Image derivatives served by /images (see app/services/images.py)
+    STATIC_DIR: str = "static"
+    IMAGE_CACHE_DIR: str = "image_cache"
+    IMAGE_WIDTHS: List[int] = [160, 320, 640, 1024]
+    IMAGE_QUALITY: int = 80
+    IMAGE_WORKERS: int = 2
+    IMAGE_CACHE_CONTROL: str = "public, max-age=604800"
+    
+    # Most ids accepted by the POST /perfumes/batch and /notes/batch endpoints
+    BATCH_MAX_IDS: int = 100
+
+    # Home page leaderboards, rebuilt in memory on a timer: top-rated and most-loved from
+    # the rating aggregates, plus one board per curated tag (board name -> tag name)
+    LEADERBOARD_TAGS: Dict[str, str] = {"trending": "trending"}
+    LEADERBOARD_SIZE: int = 100
+    LEADERBOARD_REFRESH_SECONDS: float = 300.0
+
+    # Review aggregates are buffered per worker and written to perfume_rating_stats this often
+    RATING_FLUSH_SECONDS: float = 5.0
+
+    # Reference data cache (brands, types, tags, ...)
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+    REFERENCE_CACHE_MAXSIZE: int = 1024
+    
+    # Expose /diagnostics endpoints (cache stats, pool occupancy, ...); keep off in production
+    DIAGNOSTICS_ENABLED: bool = False
+    # Allow /diagnostics/profile to sample live stacks
+    PROFILER_ENABLED: bool = False
+    
     # JWT Configuration
     SECRET_KEY: str = "your-secret-key-here"  # Change in production
     ALGORITHM: str = "HS256"
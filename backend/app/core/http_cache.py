@@ -0,0 +1,120 @@
+"""
+HTTP caching for the catalog endpoints: Cache-Control, strong ETags and 304s.
+
+Routers opt in with ``Depends(cache_control(policy))`` in
+``app/api/v1/api.py``, where ``policy`` is a Cache-Control value such as
+``"public, max-age=60, stale-while-revalidate=600"``. The dependency only
+records the policy on the request.
+
+``ConditionalGetMiddleware`` handles every successful GET/HEAD response
+whose request carries a policy. It sets ``Cache-Control`` and a strong
+``ETag``, which is a BLAKE2b hash of the body. When ``If-None-Match``
+already names that ETag it answers ``304 Not Modified`` with no body, so
+browsers and CDNs revalidate without downloading the payload again.
+Streaming responses, such as the catalog export, get the Cache-Control
+header but no ETag, because hashing them would mean buffering the whole
+stream.
+"""
+from hashlib import blake2b
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+
+_STATE_KEY = "cache_control"
+
+# Headers a 304 must repeat from the 200 it stands for (RFC 9110 15.4.5)
+_NOT_MODIFIED_HEADERS = {b"cache-control", b"content-location", b"date", b"etag", b"expires", b"vary"}
+
+
+def cache_control(policy: str) -> Callable[[Request], None]:
+    """Router dependency applying the Cache-Control ``policy`` to GET responses."""
+    def apply_policy(request: Request) -> None:
+        setattr(request.state, _STATE_KEY, policy)
+    return apply_policy
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    """Weak comparison, as required for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in if_none_match.split(","))
+
+
+def _header(headers: Iterable[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ConditionalGetMiddleware:
+    """Pure ASGI middleware; buffers only single-chunk bodies, which it has to hash anyway."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = _header(scope["headers"], b"if-none-match")
+        start_message = None
+        passthrough = False
+
+        async def send_with_validators(message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                policy = scope.get("state", {}).get(_STATE_KEY)
+                if message["status"] != 200 or policy is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                headers: List[Tuple[bytes, bytes]] = list(message.get("headers", []))
+                if _header(headers, b"cache-control") is None:
+                    headers.append((b"cache-control", policy.encode("latin-1")))
+                start_message = {**message, "headers": headers}
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            passthrough = True
+            if message.get("more_body", False):
+                # Streaming: no ETag without buffering the whole stream
+                await send(start_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = start_message["headers"]
+            etag = _header(headers, b"etag")
+            if etag is None:
+                etag = make_etag(body)
+                headers.append((b"etag", etag.encode("latin-1")))
+
+            if etag_matches(etag, if_none_match):
+                await send({
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(key, value) for key, value in headers if key.lower() in _NOT_MODIFIED_HEADERS],
+                })
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start_message)
+            await send(message)
+
+        await self.app(scope, receive, send_with_validators)
@@ -0,0 +1,188 @@
+"""
+Prometheus metrics for the API.
+
+``MetricsMiddleware`` records request latency and response size per route
+template (``/api/v1/perfumes/{perfume_id}``, never the raw path, to keep
+label cardinality bounded), plus the number of in-flight requests. Each
+observation is one ``prometheus_client`` mmap write.
+
+Pool and cache statistics are worker-local counters, so each worker copies
+them into gauges every ``METRICS_REFRESH_SECONDS`` instead of at scrape time;
+the scrape may be answered by a different worker.
+
+With several uvicorn workers, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty
+directory before starting. ``/metrics`` then aggregates every worker's
+values through ``MultiProcessCollector``, and gauges use ``livesum``, so a
+worker's samples are dropped once it exits (``mark_process_dead``).
+"""
+import asyncio
+import logging
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.cache import compressed_cache, reference_cache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template.",
+    ("method", "route", "status"),
+    buckets=(0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Response body size by route template.",
+    ("method", "route"),
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served.",
+    multiprocess_mode="livesum",
+)
+POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "Connections per pool and state (checked_out, checked_in, overflow, size).",
+    ("pool", "state"),
+    multiprocess_mode="livesum",
+)
+POOL_SATURATION = Gauge(
+    "db_pool_saturation_ratio",
+    "Checked-out connections over pool capacity.",
+    ("pool",),
+    multiprocess_mode="max",
+)
+POOL_WAIT = Gauge(
+    "db_pool_checkout_wait_seconds_total",
+    "Cumulative time spent waiting for a pool connection.",
+    ("pool",),
+    multiprocess_mode="livesum",
+)
+POOL_EVENTS = Gauge(
+    "db_pool_checkouts_total",
+    "Pool checkouts by outcome (ok, waited, timeout).",
+    ("pool", "outcome"),
+    multiprocess_mode="livesum",
+)
+CACHE_LOOKUPS = Gauge(
+    "cache_lookups_total",
+    "Cache lookups by result (hit, miss); hit ratio = hit / (hit + miss).",
+    ("cache", "result"),
+    multiprocess_mode="livesum",
+)
+CACHE_ENTRIES = Gauge(
+    "cache_entries",
+    "Entries currently held in the cache.",
+    ("cache",),
+    multiprocess_mode="livesum",
+)
+
+
+def _route_template(scope) -> str:
+    """``/api/v1/perfumes/{perfume_id}`` for ``/api/v1/perfumes/42``; "unmatched" for 404s."""
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if not path_format:
+        return "unmatched"
+    # Routes of included routers may only know the path below their prefix,
+    # so keep the request path's leading segments and put the template after them
+    template = path_format.split("/")[1:]
+    segments = scope["path"].split("/")
+    return "/".join(segments[:max(len(segments) - len(template), 1)] + template)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streaming responses are measured without buffering."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_and_measure(message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            IN_FLIGHT.dec()
+            route = _route_template(scope)
+            REQUEST_LATENCY.labels(scope["method"], route, str(status)).observe(time.perf_counter() - started)
+            RESPONSE_SIZE.labels(scope["method"], route).observe(size)
+
+
+def update_runtime_gauges() -> None:
+    # Imported here so the metrics module doesn't create the engines
+    from app.db.session import pool_stats
+
+    for pool, stats in pool_stats().items():
+        if stats is None or "size" not in stats:
+            continue
+        for state in ("checked_out", "checked_in", "overflow", "size"):
+            POOL_CONNECTIONS.labels(pool, state).set(stats[state])
+        POOL_SATURATION.labels(pool).set(stats["saturation"] or 0)
+        if "checkouts" in stats:
+            POOL_WAIT.labels(pool).set(stats["wait_ms_total"] / 1000)
+            POOL_EVENTS.labels(pool, "ok").set(stats["checkouts"])
+            POOL_EVENTS.labels(pool, "waited").set(stats["waited"])
+            POOL_EVENTS.labels(pool, "timeout").set(stats["timeouts"])
+
+    for name, cache in (("reference", reference_cache), ("compressed", compressed_cache)):
+        stats = cache.stats()
+        CACHE_LOOKUPS.labels(name, "hit").set(stats["hits"])
+        CACHE_LOOKUPS.labels(name, "miss").set(stats["misses"])
+        CACHE_ENTRIES.labels(name).set(stats["size"])
+
+
+async def refresh_runtime_gauges() -> None:
+    """Copy pool and cache stats into the gauges until cancelled."""
+    while True:
+        try:
+            update_runtime_gauges()
+        except Exception:
+            logger.exception("Updating runtime metrics failed")
+        await asyncio.sleep(settings.METRICS_REFRESH_SECONDS)
+
+
+def mark_process_dead() -> None:
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        update_runtime_gauges()
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
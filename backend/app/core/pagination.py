@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+A cursor is an opaque url-safe token encoding the ``(sort_key, id)`` of the
+last row on the page. Passing it back as ``cursor=`` continues strictly after
+that row with an index-friendly range predicate instead of ``OFFSET``. When no
+cursor is given, ``skip`` keeps working as before for compatibility.
+"""
+import base64
+import binascii
+import json
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, and_, or_, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, id: int) -> str:
+    payload = json.dumps([sort_value, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> Tuple[Any, int]:
+    try:
+        payload = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        sort_value, id = json.loads(payload)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, id
+
+
+def after_cursor(
+    cursor: str,
+    sort_column,
+    id_column,
+    descending: bool = False
+):
+    """Predicate selecting rows strictly after the cursor in ``(sort, id)`` order."""
+    sort_value, last_id = decode_cursor(cursor)
+    if sort_column is id_column:
+        return id_column < last_id if descending else id_column > last_id
+    if descending:
+        return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column > last_id))
+    return tuple_(sort_column, id_column) > tuple_(sort_value, last_id)
+
+
+def slice_after_cursor(
+    items: Sequence,
+    cursor: str,
+    key: Callable[[Any], Tuple[Any, int]],
+    descending: bool = False
+) -> Sequence:
+    """In-memory equivalent of ``after_cursor`` for rows already sorted by ``key``."""
+    sort_value, last_id = decode_cursor(cursor)
+    for index, item in enumerate(items):
+        item_sort, item_id = key(item)
+        if descending:
+            is_after = item_sort < sort_value or (item_sort == sort_value and item_id > last_id)
+        else:
+            is_after = (item_sort, item_id) > (sort_value, last_id)
+        if is_after:
+            return items[index:]
+    return items[:0]
+
+
+def paginate(
+    query: Select,
+    sort_column,
+    id_column,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Select:
+    """Order ``query`` by ``(sort_column, id_column)`` and apply a cursor or offset page."""
+    order = sort_column.desc() if descending else sort_column
+    query = query.order_by(order) if sort_column is id_column else query.order_by(order, id_column)
+    if cursor:
+        query = query.filter(after_cursor(cursor, sort_column, id_column, descending))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+
+def next_cursor(
+    rows: Sequence,
+    limit: int,
+    key: Callable[[Any], Tuple[Any, int]]
+) -> Optional[str]:
+    """Cursor for the page after ``rows``, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(*key(rows[-1]))
+
+
+def set_next_cursor(response: Response, token: Optional[str]) -> None:
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
@@ -0,0 +1,50 @@
+"""
+Low-overhead sampling profiler for live hot-path capture.
+
+A background thread snapshots the stacks of every other thread with
+``sys._current_frames()`` at a fixed interval, while the event loop keeps
+serving requests. The result is in "collapsed stack" format (one
+``frame;frame;frame count`` line per distinct stack), which flamegraph.pl
+and speedscope read directly. Only one capture runs at a time.
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List
+
+_capture_lock = asyncio.Lock()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})"
+
+
+def _sample(seconds: float, interval: float) -> Counter:
+    stacks: Counter = Counter()
+    own_thread = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            labels: List[str] = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def is_capturing() -> bool:
+    return _capture_lock.locked()
+
+
+async def capture(seconds: float, interval: float) -> str:
+    """Sample all threads for ``seconds``; returns collapsed stacks, hottest first."""
+    async with _capture_lock:
+        stacks = await asyncio.to_thread(_sample, seconds, interval)
+    return "\n".join(f"{stack} {count}" for stack, count in stacks.most_common()) + "\n"
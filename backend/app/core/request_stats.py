@@ -0,0 +1,98 @@
+"""
+Per-request timing: SQL statement count, DB time and serialization time.
+
+``RequestTimingMiddleware`` opens a ``RequestStats`` for every HTTP request
+in a context variable. The engine hooks in ``app.db.query_log`` add each
+statement's duration to it. ``TimedRoute`` notes when the endpoint function
+returned, so the time until the response starts is response-model
+validation plus JSON rendering. The totals go out as a ``Server-Timing``
+header, e.g. ``db;dur=4.1;desc="3 queries", ser;dur=0.7, app;dur=6.2``,
+which browser devtools show per request. Requests that run more than
+``QUERY_COUNT_WARNING`` statements are logged as likely N+1 patterns.
+"""
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from fastapi.routing import APIRoute
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    __slots__ = ("started", "queries", "db_seconds", "endpoint_finished")
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.endpoint_finished: Optional[float] = None
+
+    def record_query(self, seconds: float) -> None:
+        self.queries += 1
+        self.db_seconds += seconds
+
+    def server_timing(self, now: float) -> str:
+        metrics = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"']
+        if self.endpoint_finished is not None:
+            metrics.append(f"ser;dur={(now - self.endpoint_finished) * 1000:.2f}")
+        metrics.append(f"app;dur={(now - self.started) * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+class TimedRoute(APIRoute):
+    """Route that records when its endpoint returned, to split out serialization time."""
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args: Any, **kwargs: Any) -> Any:
+            result = await endpoint(*args, **kwargs)
+            stats = _current.get()
+            if stats is not None:
+                stats.endpoint_finished = time.perf_counter()
+            return result
+
+        super().__init__(path, timed_endpoint, **kwargs)
+
+
+class RequestTimingMiddleware:
+    """Pure ASGI middleware so streaming responses pass straight through."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing(time.perf_counter()).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if stats.queries > settings.QUERY_COUNT_WARNING:
+                logger.warning(
+                    "%s %s ran %d SQL statements (%.1f ms in the database)",
+                    scope["method"], scope["path"], stats.queries, stats.db_seconds * 1000,
+                )
@@ -0,0 +1,41 @@
+"""
+Opt-in fast JSON path for endpoints that return trusted rows.
+
+The list endpoints build plain dicts straight from database rows, already
+shaped like their ``response_model``. By default FastAPI still validates
+them against the model before encoding. With ``FAST_JSON_RESPONSES`` on,
+``respond`` encodes them with orjson instead and returns the finished
+response, skipping that second validation. The declared ``response_model``
+still documents the shape in OpenAPI.
+"""
+from typing import Any, Optional
+
+import orjson
+from fastapi import Response
+
+from app.core.config import settings
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def respond(content: Any, response: Optional[Response] = None, sparse: bool = False) -> Any:
+    """
+    ``content`` unchanged for FastAPI to validate and encode, or a pre-encoded
+    ``FastJSONResponse`` in fast mode. Headers already set on the injected
+    ``response`` (e.g. ``X-Next-Cursor``) are carried over. ``sparse`` content
+    (a ``fields=`` selection) never matches the ``response_model`` and is
+    always encoded directly.
+    """
+    if not settings.FAST_JSON_RESPONSES and not sparse:
+        return content
+    fast = FastJSONResponse(content)
+    if response is not None:
+        fast.headers.update({
+            key: value for key, value in response.headers.items() if key != "content-length"
+        })
+    return fast
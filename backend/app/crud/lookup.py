@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MISSING, reference_cache
+from app.core.pagination import next_cursor, paginate
+from app.db.events import on_commit
+
+
+async def list_lookup(
+    db: AsyncSession,
+    model: Any,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Page through an ``(id, name)`` lookup table ordered by name.
+    Returns the rows and the cursor for the next page; pages are served from
+    ``reference_cache`` keyed on ``(table, skip, limit, cursor)``.
+    """
+    key = (model.__tablename__, skip, limit, cursor)
+    cached = reference_cache.get(key)
+    if cached is not MISSING:
+        return cached
+
+    query = paginate(
+        select(model.id, model.name), model.name, model.id,
+        skip=skip, limit=limit, cursor=cursor
+    )
+    result = await db.execute(query)
+    rows = [{"id": id, "name": name} for id, name in result]
+    page = rows, next_cursor(rows, limit, lambda row: (row["name"], row["id"]))
+    reference_cache.set(key, page)
+    return page
+
+
+@on_commit
+def invalidate_lookups(changes: Dict[str, List[Any]]) -> None:
+    for table in changes:
+        reference_cache.invalidate(table)
@@ -0,0 +1,238 @@
+"""
+Perfume detail documents loaded with two fixed statements.
+
+The first statement fetches the perfume row with every lookup name joined in
+as a scalar column; the second fetches notes, accords and tags for all the
+requested perfumes as one ``UNION ALL``. Both are built once at import time
+with an expanding ``perfume_ids`` parameter, so SQLAlchemy compiles them once
+and the same two round-trips serve one perfume or a whole batch. Rows are
+turned into plain dicts shaped like ``app.schemas.perfume.Perfume`` without
+hydrating ORM objects.
+
+Sparse fieldsets (``fields=name,brand,tags``) reuse the same builders: the
+row statement then selects only the requested columns and joins only the
+lookups they name, and the children statement unions only the requested
+relationships, or is skipped altogether. Each fieldset's statements are
+built once and cached.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import String, bindparam, cast, literal, literal_column, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.brand import Brand as BrandModel
+from app.models.concentration import Concentration as ConcentrationModel
+from app.models.country import Country as CountryModel
+from app.models.family import Family as FamilyModel
+from app.models.main_accord import MainAccord as MainAccordModel
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.models.perfume import Tag as TagModel
+from app.models.perfume import perfume_main_accords, perfume_tags
+from app.models.perfumer import Perfumer as PerfumerModel
+from app.models.type import Type as TypeModel
+
+NOTE_LAYER_ORDER = {"top": 0, "middle": 1, "base": 2}
+
+PERFUME_COLUMNS = (
+    "id", "name", "local_image_path", "gender", "category", "release_year",
+    "description", "longevity", "sillage", "occasion", "season", "inspiration",
+)
+
+# Lookup name fields and the foreign key each one is joined through
+LOOKUP_FIELDS = {
+    "brand": (BrandModel, PerfumeModel.brand_id),
+    "concentration": (ConcentrationModel, PerfumeModel.concentration_id),
+    "type": (TypeModel, PerfumeModel.type_id),
+    "family": (FamilyModel, PerfumeModel.family_id),
+    "country": (CountryModel, PerfumeModel.country_id),
+    "perfumer": (PerfumerModel, PerfumeModel.perfumer_id),
+}
+
+# Relationship fields and the ``kind`` their rows carry in the children statement
+CHILD_FIELDS = {"perfume_notes": "note", "main_accords": "accord", "tags": "tag"}
+
+DETAIL_FIELDS = (*PERFUME_COLUMNS, *LOOKUP_FIELDS)
+
+# Everything ``fields=`` accepts: the detail schema plus ``brand_name`` from the list view
+FIELDS = (*DETAIL_FIELDS, "brand_name", *CHILD_FIELDS)
+
+_perfume_ids = bindparam("perfume_ids", expanding=True)
+
+
+def parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    ``"name,brand,tags"`` as a de-duplicated tuple that always starts with ``id``;
+    None when no fieldset was requested.
+    """
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(FIELDS)}"
+        )
+    return tuple(dict.fromkeys(["id", *requested]))
+
+
+def with_fields(query, fields: Sequence[str]):
+    """
+    Add the scalar columns named in ``fields`` to a ``select`` over perfumes,
+    outer-joining only the lookup tables they need. Each lookup is joined
+    under its own alias so this composes with joins added for filtering.
+    Relationship fields are skipped (see ``load_children``), as is ``id``.
+    """
+    for field in fields:
+        if field == "id" or field in CHILD_FIELDS:
+            continue
+        if field in LOOKUP_FIELDS or field == "brand_name":
+            model, foreign_key = LOOKUP_FIELDS["brand" if field == "brand_name" else field]
+            lookup = aliased(model)
+            query = query.outerjoin(lookup, foreign_key == lookup.id).add_columns(lookup.name.label(field))
+        else:
+            query = query.add_columns(getattr(PerfumeModel, field).label(field))
+    return query
+
+
+@lru_cache(maxsize=256)
+def rows_statement(fields: Tuple[str, ...] = DETAIL_FIELDS):
+    """Perfume rows for ``perfume_ids`` with the scalar ``fields``; built once per fieldset."""
+    return with_fields(select(PerfumeModel.id), fields).where(PerfumeModel.id.in_(_perfume_ids))
+
+
+_child_selects = {
+    "perfume_notes": lambda: (
+        select(
+            PerfumeNoteModel.perfume_id.label("perfume_id"),
+            literal("note").label("kind"),
+            cast(PerfumeNoteModel.note_type, String).label("note_type"),
+            NoteModel.name.label("name"),
+            NoteModel.image_filename.label("image_filename"),
+        )
+        .join(NoteModel, PerfumeNoteModel.note_id == NoteModel.id)
+        .where(PerfumeNoteModel.perfume_id.in_(_perfume_ids))
+    ),
+    "main_accords": lambda: (
+        select(
+            perfume_main_accords.c.perfume_id.label("perfume_id"),
+            literal("accord").label("kind"),
+            cast(null(), String).label("note_type"),
+            MainAccordModel.name.label("name"),
+            cast(null(), String).label("image_filename"),
+        )
+        .join(MainAccordModel, perfume_main_accords.c.accord_id == MainAccordModel.id)
+        .where(perfume_main_accords.c.perfume_id.in_(_perfume_ids))
+    ),
+    "tags": lambda: (
+        select(
+            perfume_tags.c.perfume_id.label("perfume_id"),
+            literal("tag").label("kind"),
+            cast(null(), String).label("note_type"),
+            TagModel.name.label("name"),
+            cast(null(), String).label("image_filename"),
+        )
+        .join(TagModel, perfume_tags.c.tag_id == TagModel.id)
+        .where(perfume_tags.c.perfume_id.in_(_perfume_ids))
+    ),
+}
+
+
+@lru_cache(maxsize=8)
+def children_statement(fields: Tuple[str, ...] = tuple(CHILD_FIELDS)):
+    """Notes, accords and/or tags for ``perfume_ids`` as one ``UNION ALL``; built once per combination."""
+    return union_all(*(_child_selects[field]() for field in CHILD_FIELDS if field in fields)).order_by(
+        literal_column("perfume_id"), literal_column("kind"), literal_column("name")
+    )
+
+
+perfume_rows_statement = rows_statement()
+perfume_children_statement = children_statement()
+
+
+async def load_children(
+    db: AsyncSession,
+    documents: Dict[int, Dict[str, Any]],
+    fields: Sequence[str] = tuple(CHILD_FIELDS)
+) -> None:
+    """Fill the relationship ``fields`` of ``documents`` in place with one statement."""
+    fields = tuple(field for field in CHILD_FIELDS if field in fields)
+    if not fields or not documents:
+        return
+    for document in documents.values():
+        for field in fields:
+            document[field] = []
+
+    result = await db.execute(children_statement(fields), {"perfume_ids": list(documents)})
+    for perfume_id, kind, note_type, name, image_filename in result:
+        document = documents[perfume_id]
+        if kind == "note":
+            document["perfume_notes"].append(
+                {"note_type": note_type, "note": name, "image_filename": image_filename}
+            )
+        elif kind == "accord":
+            document["main_accords"].append(name)
+        else:
+            document["tags"].append(name)
+
+    if "perfume_notes" in fields:
+        for document in documents.values():
+            document["perfume_notes"].sort(key=lambda note: NOTE_LAYER_ORDER.get(note["note_type"], 3))
+
+
+async def get_perfume_documents(
+    db: AsyncSession,
+    perfume_ids: Sequence[int],
+    fields: Optional[Tuple[str, ...]] = None
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Load detail documents for ``perfume_ids``; unknown ids are simply absent.
+    With ``fields`` (see ``parse_fields``) only those columns and relationships
+    are queried, and the relationship statement is skipped when none is asked for.
+    """
+    if not perfume_ids:
+        return {}
+    if fields is None:
+        scalar_fields, child_fields = DETAIL_FIELDS, tuple(CHILD_FIELDS)
+    else:
+        scalar_fields = tuple(field for field in fields if field not in CHILD_FIELDS)
+        child_fields = tuple(field for field in fields if field in CHILD_FIELDS)
+
+    result = await db.execute(rows_statement(scalar_fields), {"perfume_ids": list(perfume_ids)})
+    documents = {row.id: dict(row._mapping) for row in result}
+    await load_children(db, documents, child_fields)
+    return documents
+
+
+async def get_sparse_items(
+    db: AsyncSession,
+    rows: Sequence[Any],
+    fields: Tuple[str, ...]
+) -> List[Dict[str, Any]]:
+    """Rows selected through ``with_fields`` as dicts of exactly ``fields``, relationships included."""
+    documents = {row.id: {field: row._mapping[field] for field in fields if field not in CHILD_FIELDS} for row in rows}
+    await load_children(db, documents, fields)
+    return list(documents.values())
+
+
+async def get_perfume_document(db: AsyncSession, perfume_id: int) -> Optional[Dict[str, Any]]:
+    documents = await get_perfume_documents(db, [perfume_id])
+    return documents.get(perfume_id)
+
+
+async def get_perfume_list_items(db: AsyncSession, perfume_ids: Sequence[int]) -> List[Dict[str, Any]]:
+    """``PerfumeList`` rows for ``perfume_ids`` in the given order; unknown ids are skipped."""
+    if not perfume_ids:
+        return []
+    result = await db.execute(
+        select(PerfumeModel.id, PerfumeModel.name, BrandModel.name.label("brand_name"), PerfumeModel.local_image_path)
+        .join(BrandModel, PerfumeModel.brand_id == BrandModel.id)
+        .where(PerfumeModel.id.in_(list(perfume_ids)))
+    )
+    items = {row.id: dict(row._mapping) for row in result}
+    return [items[perfume_id] for perfume_id in perfume_ids if perfume_id in items]
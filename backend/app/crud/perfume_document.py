@@ -0,0 +1,185 @@
+"""
+Materialized perfume detail documents.
+
+``perfume_documents`` holds the detail JSON exactly as ``GET /perfumes/{id}``
+returns it, so the hot path is a primary-key lookup returning bytes. On
+PostgreSQL, triggers (migrations ``0002`` and ``0005``) bump a perfume's
+counter in ``perfume_document_versions`` whenever its perfume, notes,
+accords, tags or any referenced lookup name changes. Each document records
+the version it was rendered from and is only served while that is still
+current; otherwise the read re-renders it. A render that raced a write is
+stored under the version it read, so it is never served once the write
+commits, and never overwrites a newer one. Other dialects have no triggers
+and always render on the fly.
+"""
+import logging
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.perfume import get_perfume_document, get_perfume_documents
+from app.db.session import async_session
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume_document import PerfumeDocument as PerfumeDocumentModel
+from app.models.perfume_document import PerfumeDocumentVersion as PerfumeDocumentVersionModel
+from app.schemas.perfume import Perfume
+
+logger = logging.getLogger(__name__)
+
+# {perfume_id: (source version, rendered bytes)}
+Rendered = Dict[int, Tuple[int, bytes]]
+
+_current_version = func.coalesce(PerfumeDocumentVersionModel.version, 0)
+
+
+def render_document(document: dict) -> bytes:
+    return Perfume.model_validate(document).model_dump_json().encode()
+
+
+def _is_postgres(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def store_documents(db: AsyncSession, rendered: Rendered) -> None:
+    """Upsert ``{perfume_id: (version, bytes)}`` and commit; never replaces a newer version."""
+    if not rendered:
+        return
+    statement = insert(PerfumeDocumentModel).values([
+        {"perfume_id": perfume_id, "source_version": version, "document": content}
+        for perfume_id, (version, content) in rendered.items()
+    ])
+    excluded = statement.excluded
+    statement = statement.on_conflict_do_update(
+        index_elements=[PerfumeDocumentModel.perfume_id],
+        set_={"document": excluded.document, "source_version": excluded.source_version,
+              "rendered_at": excluded.rendered_at},
+        where=PerfumeDocumentModel.source_version < excluded.source_version,
+    )
+    await db.execute(statement)
+    await db.commit()
+
+
+async def _store_detached(rendered: Rendered) -> None:
+    """
+    Store renders from a read path in their own short transaction on the
+    primary, leaving the request's session read-only. A failed store only
+    costs the next read another render.
+    """
+    try:
+        async with async_session() as db:
+            await store_documents(db, rendered)
+    except Exception:
+        logger.exception("Storing %d perfume documents failed", len(rendered))
+
+
+async def _lookup(
+    db: AsyncSession,
+    perfume_ids: Sequence[int]
+) -> Tuple[Dict[int, bytes], Dict[int, int]]:
+    """
+    Current stored documents of ``perfume_ids``, and the version of every
+    other existing perfume, read in one statement before anything renders.
+    """
+    result = await db.execute(
+        select(PerfumeModel.id, _current_version, PerfumeDocumentModel.source_version,
+               PerfumeDocumentModel.document)
+        .outerjoin(PerfumeDocumentVersionModel, PerfumeDocumentVersionModel.perfume_id == PerfumeModel.id)
+        .outerjoin(PerfumeDocumentModel, PerfumeDocumentModel.perfume_id == PerfumeModel.id)
+        .where(PerfumeModel.id.in_(perfume_ids))
+    )
+    stored, missing = {}, {}
+    for perfume_id, version, source_version, document in result:
+        if document is not None and source_version == version:
+            stored[perfume_id] = document
+        else:
+            missing[perfume_id] = version
+    return stored, missing
+
+
+async def get_rendered_perfume(db: AsyncSession, perfume_id: int) -> Optional[bytes]:
+    """Stored detail JSON for ``perfume_id``, rendering and storing it on a miss."""
+    if not _is_postgres(db):
+        document = await get_perfume_document(db, perfume_id)
+        return render_document(document) if document else None
+
+    stored, missing = await _lookup(db, [perfume_id])
+    if perfume_id in stored:
+        return stored[perfume_id]
+    if perfume_id not in missing:
+        return None
+
+    document = await get_perfume_document(db, perfume_id)
+    if document is None:
+        return None
+    content = render_document(document)
+    await _store_detached({perfume_id: (missing[perfume_id], content)})
+    return content
+
+
+async def get_rendered_perfumes(db: AsyncSession, perfume_ids: Sequence[int]) -> Dict[int, bytes]:
+    """
+    Stored detail JSON for many perfumes; unknown ids are simply absent.
+    Misses are rendered together, so a batch costs at most four statements
+    whatever its size.
+    """
+    perfume_ids = list(dict.fromkeys(perfume_ids))
+    if not perfume_ids:
+        return {}
+    if not _is_postgres(db):
+        documents = await get_perfume_documents(db, perfume_ids)
+        return {perfume_id: render_document(document) for perfume_id, document in documents.items()}
+
+    rendered, missing = await _lookup(db, perfume_ids)
+    if missing:
+        documents = await get_perfume_documents(db, list(missing))
+        fresh = {perfume_id: render_document(document) for perfume_id, document in documents.items()}
+        await _store_detached(
+            {perfume_id: (missing[perfume_id], content) for perfume_id, content in fresh.items()}
+        )
+        rendered.update(fresh)
+    return rendered
+
+
+async def refresh_documents(
+    db: AsyncSession,
+    perfume_ids: Optional[Iterable[int]] = None,
+    batch_size: int = 500
+) -> int:
+    """
+    Re-render documents for ``perfume_ids``, or for every perfume whose
+    document is missing or out of date. Returns the number of documents
+    rendered.
+    """
+    if perfume_ids is None:
+        result = await db.execute(
+            select(PerfumeModel.id)
+            .outerjoin(PerfumeDocumentVersionModel, PerfumeDocumentVersionModel.perfume_id == PerfumeModel.id)
+            .outerjoin(PerfumeDocumentModel, PerfumeDocumentModel.perfume_id == PerfumeModel.id)
+            .where(PerfumeDocumentModel.source_version.is_distinct_from(_current_version))
+            .order_by(PerfumeModel.id)
+        )
+        perfume_ids = result.scalars().all()
+    perfume_ids = list(perfume_ids)
+
+    written = 0
+    for start in range(0, len(perfume_ids), batch_size):
+        batch = perfume_ids[start:start + batch_size]
+        result = await db.execute(
+            select(PerfumeDocumentVersionModel.perfume_id, PerfumeDocumentVersionModel.version)
+            .where(PerfumeDocumentVersionModel.perfume_id.in_(batch))
+        )
+        versions = dict(result.all())
+        documents = await get_perfume_documents(db, batch)
+        await store_documents(db, {
+            perfume_id: (versions.get(perfume_id, 0), render_document(document))
+            for perfume_id, document in documents.items()
+        })
+        written += len(documents)
+    return written
+
+
+async def clear_documents(db: AsyncSession) -> None:
+    await db.execute(delete(PerfumeDocumentModel))
+    await db.commit()
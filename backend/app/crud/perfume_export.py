@@ -0,0 +1,143 @@
+"""
+Full-catalog export streamed from a server-side cursor.
+
+Every perfume is one row of a single statement (lookup names joined in, note
+layers, accords and tags aggregated by correlated subqueries on the indexed
+link tables), read ``yield_per`` rows at a time, so memory stays flat no
+matter how large the catalog is. Records use the same field names as the
+``app/db/import_catalog.py`` feed format, so an export can be re-imported.
+The statement uses PostgreSQL's ordered ``array_agg``; callers check the
+dialect first.
+"""
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+from sqlalchemy import String, cast, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.crud.perfume import PERFUME_COLUMNS
+from app.db.session import read_session
+from app.models.brand import Brand as BrandModel
+from app.models.concentration import Concentration as ConcentrationModel
+from app.models.country import Country as CountryModel
+from app.models.family import Family as FamilyModel
+from app.models.main_accord import MainAccord as MainAccordModel
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.models.perfume import Tag as TagModel
+from app.models.perfume import perfume_main_accords, perfume_tags
+from app.models.perfumer import Perfumer as PerfumerModel
+from app.models.type import Type as TypeModel
+
+EXPORT_FIELDS = (
+    *PERFUME_COLUMNS, "brand", "concentration", "type", "family", "country", "perfumer",
+    "top_notes", "middle_notes", "base_notes", "main_accords", "tags",
+)
+LIST_FIELDS = {"occasion", "season", "top_notes", "middle_notes", "base_notes", "main_accords", "tags"}
+
+
+def _names(model: Any, link_table: Any, on_clause: Any, *where: Any) -> Any:
+    """Correlated ``array_agg`` of ``model.name`` over a perfume link table."""
+    return (
+        select(func.array_agg(aggregate_order_by(model.name, model.name)))
+        .select_from(link_table)
+        .join(model, on_clause)
+        .where(*where)
+        .scalar_subquery()
+    )
+
+
+def _note_layer(note_type: str) -> Any:
+    return _names(
+        NoteModel, PerfumeNoteModel, PerfumeNoteModel.note_id == NoteModel.id,
+        PerfumeNoteModel.perfume_id == PerfumeModel.id,
+        cast(PerfumeNoteModel.note_type, String) == note_type,
+    )
+
+
+export_statement = (
+    select(
+        *(getattr(PerfumeModel, column) for column in PERFUME_COLUMNS),
+        BrandModel.name.label("brand"),
+        ConcentrationModel.name.label("concentration"),
+        TypeModel.name.label("type"),
+        FamilyModel.name.label("family"),
+        CountryModel.name.label("country"),
+        PerfumerModel.name.label("perfumer"),
+        _note_layer("top").label("top_notes"),
+        _note_layer("middle").label("middle_notes"),
+        _note_layer("base").label("base_notes"),
+        _names(
+            MainAccordModel, perfume_main_accords, perfume_main_accords.c.accord_id == MainAccordModel.id,
+            perfume_main_accords.c.perfume_id == PerfumeModel.id,
+        ).label("main_accords"),
+        _names(
+            TagModel, perfume_tags, perfume_tags.c.tag_id == TagModel.id,
+            perfume_tags.c.perfume_id == PerfumeModel.id,
+        ).label("tags"),
+    )
+    .outerjoin(BrandModel, PerfumeModel.brand_id == BrandModel.id)
+    .outerjoin(ConcentrationModel, PerfumeModel.concentration_id == ConcentrationModel.id)
+    .outerjoin(TypeModel, PerfumeModel.type_id == TypeModel.id)
+    .outerjoin(FamilyModel, PerfumeModel.family_id == FamilyModel.id)
+    .outerjoin(CountryModel, PerfumeModel.country_id == CountryModel.id)
+    .outerjoin(PerfumerModel, PerfumeModel.perfumer_id == PerfumerModel.id)
+    .order_by(PerfumeModel.id)
+)
+
+
+async def stream_records(batch_size: int = 1000) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the catalog in lists of up to ``batch_size`` export records."""
+    async with read_session() as db:
+        result = await db.stream(export_statement.execution_options(yield_per=batch_size))
+        async for partition in result.mappings().partitions():
+            yield [
+                {field: (row[field] or [] if field in LIST_FIELDS else row[field]) for field in EXPORT_FIELDS}
+                for row in partition
+            ]
+
+
+async def stream_ndjson(batch_size: int = 1000) -> AsyncIterator[str]:
+    async for records in stream_records(batch_size):
+        yield "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+async def stream_csv(batch_size: int = 1000) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for records in stream_records(batch_size):
+        for record in records:
+            writer.writerow(
+                "|".join(record[field]) if field in LIST_FIELDS else record[field]
+                for field in EXPORT_FIELDS
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def start_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Run ``chunks`` up to its first chunk before the response starts, so a
+    failing statement surfaces as an error response rather than a 200 cut
+    off mid-body. Returns an iterator over every chunk, the first included.
+    """
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def resumed() -> AsyncIterator[str]:
+        if first is None:
+            return
+        yield first
+        async for chunk in chunks:
+            yield chunk
+
+    return resumed()
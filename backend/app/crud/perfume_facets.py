@@ -0,0 +1,73 @@
+"""
+Facet counts for the perfume browser computed in one statement.
+
+The filtered perfume ids become a CTE and every facet is a ``GROUP BY`` over
+it, glued together with ``UNION ALL``, so the total and all facet counts
+cost a single round-trip instead of one ``COUNT`` per facet.
+"""
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Select, String, func, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.brand import Brand as BrandModel
+from app.models.concentration import Concentration as ConcentrationModel
+from app.models.family import Family as FamilyModel
+from app.models.main_accord import MainAccord as MainAccordModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import perfume_main_accords
+
+FACETS = ("brand", "gender", "concentration", "family", "season", "accord")
+
+
+def _facet(name: str, matched: Any, value: Any, *joins: Tuple[Any, Any]) -> Select:
+    query = (
+        select(literal(name).label("facet"), value.label("value"), func.count().label("count"))
+        .select_from(matched)
+        .join(PerfumeModel, PerfumeModel.id == matched.c.id)
+    )
+    for target, on_clause in joins:
+        query = query.join(target, on_clause)
+    return query.where(value.is_not(None)).group_by(value)
+
+
+def facet_statement(matched_ids: Select) -> Any:
+    matched = matched_ids.distinct().cte("matched")
+    seasons = (
+        select(PerfumeModel.id.label("id"), func.unnest(PerfumeModel.season).label("value"))
+        .where(PerfumeModel.id.in_(select(matched.c.id)))
+        .subquery()
+    )
+    return union_all(
+        select(literal("total"), null().cast(String), func.count()).select_from(matched),
+        _facet("brand", matched, BrandModel.name, (BrandModel, PerfumeModel.brand_id == BrandModel.id)),
+        _facet("gender", matched, PerfumeModel.gender),
+        _facet("concentration", matched, ConcentrationModel.name,
+               (ConcentrationModel, PerfumeModel.concentration_id == ConcentrationModel.id)),
+        _facet("family", matched, FamilyModel.name, (FamilyModel, PerfumeModel.family_id == FamilyModel.id)),
+        select(literal("season"), seasons.c.value, func.count()).group_by(seasons.c.value),
+        _facet("accord", matched, MainAccordModel.name,
+               (perfume_main_accords, perfume_main_accords.c.perfume_id == PerfumeModel.id),
+               (MainAccordModel, perfume_main_accords.c.accord_id == MainAccordModel.id)),
+    )
+
+
+async def get_facet_counts(
+    db: AsyncSession,
+    matched_ids: Select
+) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    """
+    Total and per-facet value counts for the perfumes selected by ``matched_ids``
+    (a select of ``perfumes.id`` with the search filters applied).
+    """
+    result = await db.execute(facet_statement(matched_ids))
+    total = 0
+    facets: Dict[str, List[Dict[str, Any]]] = {facet: [] for facet in FACETS}
+    for facet, value, count in result:
+        if facet == "total":
+            total = count
+        else:
+            facets[facet].append({"value": value, "count": count})
+    for counts in facets.values():
+        counts.sort(key=lambda item: (-item["count"], item["value"]))
+    return total, facets
@@ -0,0 +1,147 @@
+"""
+Reviews and their per-perfume rating aggregates.
+
+Review writes go through the ORM so ``app.services.ratings`` sees them and
+folds them into ``perfume_rating_stats`` on its next flush; reads of the
+aggregates are a primary-key lookup. ``recompute_rating_stats`` rebuilds the
+aggregates from ``reviews`` with ``GROUP BY`` and is only for reconciling.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import array, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import next_cursor, paginate
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.review import LONGEVITY_VOTES, RATING_MAX, SILLAGE_VOTES
+from app.models.review import PerfumeRatingStats as PerfumeRatingStatsModel
+from app.models.review import Review as ReviewModel
+from app.schemas.review import ReviewCreate
+from app.services.ratings import score
+
+
+def _vote(labels: Tuple[str, ...], position: Optional[int]) -> Optional[str]:
+    return None if position is None else labels[position]
+
+
+def _position(labels: Tuple[str, ...], label: Optional[str]) -> Optional[int]:
+    return None if label is None else labels.index(label)
+
+
+def review_item(review: ReviewModel) -> Dict[str, Any]:
+    return {
+        "id": review.id,
+        "perfume_id": review.perfume_id,
+        "author": review.author,
+        "rating": review.rating,
+        "longevity": _vote(LONGEVITY_VOTES, review.longevity),
+        "sillage": _vote(SILLAGE_VOTES, review.sillage),
+        "title": review.title,
+        "body": review.body,
+        "created_at": review.created_at,
+    }
+
+
+async def perfume_exists(db: AsyncSession, perfume_id: int) -> bool:
+    return await db.scalar(select(PerfumeModel.id).where(PerfumeModel.id == perfume_id)) is not None
+
+
+async def list_reviews(
+    db: AsyncSession,
+    perfume_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """A perfume's reviews, newest first, and the cursor for the next page."""
+    query = paginate(
+        select(ReviewModel).where(ReviewModel.perfume_id == perfume_id), ReviewModel.id, ReviewModel.id,
+        skip=skip, limit=limit, cursor=cursor, descending=True
+    )
+    reviews = [review_item(review) for review in (await db.execute(query)).scalars()]
+    return reviews, next_cursor(reviews, limit, lambda review: (review["id"], review["id"]))
+
+
+async def create_review(db: AsyncSession, perfume_id: int, data: ReviewCreate) -> Dict[str, Any]:
+    review = ReviewModel(
+        perfume_id=perfume_id,
+        author=data.author,
+        rating=data.rating,
+        longevity=_position(LONGEVITY_VOTES, data.longevity),
+        sillage=_position(SILLAGE_VOTES, data.sillage),
+        title=data.title,
+        body=data.body,
+    )
+    db.add(review)
+    await db.commit()
+    await db.refresh(review)
+    return review_item(review)
+
+
+def rating_stats_item(perfume_id: int, stats: Optional[PerfumeRatingStatsModel]) -> Dict[str, Any]:
+    count = stats.rating_count if stats is not None else 0
+    if count <= 0:
+        return {
+            "perfume_id": perfume_id, "count": 0, "mean": None,
+            "histogram": {str(star): 0 for star in range(1, RATING_MAX + 1)},
+            "longevity": dict.fromkeys(LONGEVITY_VOTES, 0),
+            "sillage": dict.fromkeys(SILLAGE_VOTES, 0),
+        }
+    return {
+        "perfume_id": perfume_id,
+        "count": count,
+        "mean": round(stats.rating_sum / count, 2),
+        "histogram": {str(star): votes for star, votes in enumerate(stats.rating_histogram, start=1)},
+        "longevity": dict(zip(LONGEVITY_VOTES, stats.longevity_votes)),
+        "sillage": dict(zip(SILLAGE_VOTES, stats.sillage_votes)),
+    }
+
+
+async def get_rating_stats(db: AsyncSession, perfume_id: int) -> Optional[Dict[str, Any]]:
+    """Aggregates for ``perfume_id`` (zeros when unrated); None when the perfume does not exist."""
+    stats = await db.get(PerfumeRatingStatsModel, perfume_id)
+    if stats is None and not await perfume_exists(db, perfume_id):
+        return None
+    return rating_stats_item(perfume_id, stats)
+
+
+async def recompute_rating_stats(db: AsyncSession) -> int:
+    """
+    Rebuild every perfume's aggregates from ``reviews`` and commit; returns
+    the perfumes rated. Deltas still buffered by running workers are added
+    on top when they flush, so run it while review writes are quiet.
+    """
+    count = func.count()
+    total = func.sum(ReviewModel.rating)
+
+    def counts(column: Any, values: range) -> Any:
+        return array([func.count().filter(column == value) for value in values])
+
+    aggregates = (
+        select(
+            ReviewModel.perfume_id,
+            count,
+            total,
+            counts(ReviewModel.rating, range(1, RATING_MAX + 1)),
+            counts(ReviewModel.longevity, range(len(LONGEVITY_VOTES))),
+            counts(ReviewModel.sillage, range(len(SILLAGE_VOTES))),
+            score(count, cast(total, Float)),
+        )
+        .group_by(ReviewModel.perfume_id)
+    )
+    columns = ("perfume_id", "rating_count", "rating_sum", "rating_histogram", "longevity_votes",
+               "sillage_votes", "score")
+    statement = insert(PerfumeRatingStatsModel).from_select(columns, aggregates)
+    statement = statement.on_conflict_do_update(
+        index_elements=[PerfumeRatingStatsModel.perfume_id],
+        set_={**{name: statement.excluded[name] for name in columns[1:]}, "updated_at": func.now()},
+    )
+    await db.execute(
+        delete(PerfumeRatingStatsModel).where(
+            PerfumeRatingStatsModel.perfume_id.not_in(select(ReviewModel.perfume_id))
+        )
+    )
+    await db.execute(statement)
+    await db.commit()
+    return await db.scalar(select(func.count()).select_from(PerfumeRatingStatsModel))
@@ -1,3 +1,13 @@
 # Import all models here for Alembic to detect them
 from app.db.base_class import Base
-from app.models.perfume import Perfume  # noqa 
\ No newline at end of file
+from app.models.brand import Brand  # noqa
+from app.models.concentration import Concentration  # noqa
+from app.models.country import Country  # noqa
+from app.models.family import Family  # noqa
+from app.models.main_accord import MainAccord  # noqa
+from app.models.note import Note  # noqa
+from app.models.perfume import Perfume  # noqa 
+from app.models.perfumer import Perfumer  # noqa
+from app.models.type import Type  # noqa
+from app.models.perfume_document import PerfumeDocument, PerfumeDocumentVersion  # noqa
+from app.models.review import PerfumeRatingStats, Review  # noqa
@@ -1,4 +1,5 @@
 from typing import Any
+from sqlalchemy import ARRAY, JSON
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import DeclarativeBase
 
@@ -9,4 +10,8 @@ class Base(DeclarativeBase):
     # Generate __tablename__ automatically
     @declared_attr
     def __tablename__(cls) -> str:
-        return cls.__name__.lower() 
\ No newline at end of file
+        return cls.__name__.lower()
+
+def array_of(item_type: Any) -> ARRAY:
+    """ARRAY column type; a JSON list on SQLite so test databases build with ``create_all``."""
+    return ARRAY(item_type).with_variant(JSON(), "sqlite")
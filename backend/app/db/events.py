@@ -0,0 +1,70 @@
+"""
+Post-commit change notifications for in-process caches and indexes.
+
+ORM instances added, changed or deleted in a flush are collected per table
+and handed to the registered callbacks once the transaction commits, so
+readers never invalidate on work that is later rolled back. Writes that
+bypass the ORM (raw SQL, dumps) are not seen here.
+
+Callbacks that need old values register an ``on_flush`` capture: it runs
+inside the flush, while attribute history is still available, and what it
+returns reaches the commit callbacks under its own key.
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+ChangeCallback = Callable[[Dict[str, List[Any]]], None]
+# capture(operation, instance) with operation "insert", "update" or "delete"
+FlushCapture = Callable[[str, Any], Iterable[Any]]
+
+_PENDING_KEY = "pending_changes"
+_callbacks: List[ChangeCallback] = []
+_captures: Dict[str, List[Tuple[str, FlushCapture]]] = defaultdict(list)
+
+
+def on_commit(callback: ChangeCallback) -> ChangeCallback:
+    """Register ``callback(changes)`` where ``changes`` maps table name to instances."""
+    _callbacks.append(callback)
+    return callback
+
+
+def on_flush(table: str, key: str) -> Callable[[FlushCapture], FlushCapture]:
+    """
+    Register ``capture(operation, instance)`` for flushed instances of
+    ``table``; the items it returns are passed to commit callbacks as
+    ``changes[key]``.
+    """
+    def register(capture: FlushCapture) -> FlushCapture:
+        _captures[table].append((key, capture))
+        return capture
+    return register
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session: Session, flush_context) -> None:
+    pending = session.info.setdefault(_PENDING_KEY, defaultdict(list))
+    for operation, instances in (("insert", session.new), ("update", session.dirty), ("delete", session.deleted)):
+        for instance in instances:
+            table = getattr(instance, "__tablename__", None)
+            if not table:
+                continue
+            pending[table].append(instance)
+            for key, capture in _captures.get(table, ()):
+                pending[key].extend(capture(operation, instance))
+
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+    for callback in _callbacks:
+        callback(dict(pending))
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,230 @@
+"""
+Streaming bulk importer for CSV / JSONL catalog feeds.
+
+Each record describes one perfume::
+
+    {"name": "Terre d'Hermès", "brand": "Hermès", "concentration": "EDT",
+     "type": "...", "family": "...", "country": "...", "perfumer": "...",
+     "gender": "Male", "category": "...", "release_year": 2006,
+     "description": "...", "longevity": "...", "sillage": "...",
+     "occasion": ["day"], "season": ["spring"], "inspiration": "...",
+     "local_image_path": "...", "top_notes": ["Orange"], "middle_notes": [...],
+     "base_notes": [...], "main_accords": ["citrus"], "tags": ["trending"]}
+
+CSV feeds use the same column names with list values separated by ``|``.
+
+Records are processed in batches: unseen lookup names are inserted with
+``ON CONFLICT DO NOTHING`` and resolved through in-memory name -> id maps
+that are preloaded once, perfumes are upserted on ``(brand, folded name)``
+with one multi-row insert and one bulk update per batch, and the perfume's
+notes, accords and tags are replaced with multi-row inserts. Each batch is
+its own transaction.
+
+    python app/db/import_catalog.py catalog.jsonl --batch-size 5000
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_session
+from app.models.brand import Brand as BrandModel
+from app.models.concentration import Concentration as ConcentrationModel
+from app.models.country import Country as CountryModel
+from app.models.family import Family as FamilyModel
+from app.models.main_accord import MainAccord as MainAccordModel
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.models.perfume import Tag as TagModel
+from app.models.perfume import perfume_main_accords, perfume_tags
+from app.models.perfumer import Perfumer as PerfumerModel
+from app.models.type import Type as TypeModel
+from app.services.search import fold
+
+# Record field -> lookup model referenced through a perfume foreign key
+FOREIGN_KEYS = {
+    "brand": (BrandModel, "brand_id"),
+    "concentration": (ConcentrationModel, "concentration_id"),
+    "type": (TypeModel, "type_id"),
+    "family": (FamilyModel, "family_id"),
+    "country": (CountryModel, "country_id"),
+    "perfumer": (PerfumerModel, "perfumer_id"),
+}
+SCALAR_FIELDS = (
+    "gender", "category", "release_year", "description", "longevity",
+    "sillage", "occasion", "season", "inspiration", "local_image_path",
+)
+LIST_FIELDS = ("occasion", "season", "top_notes", "middle_notes", "base_notes", "main_accords", "tags")
+NOTE_LAYERS = {"top_notes": "top", "middle_notes": "middle", "base_notes": "base"}
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream records from a ``.csv`` or ``.jsonl`` file without loading it."""
+    with open(path, newline="", encoding="utf-8") as feed:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(feed):
+                record = {key: (value or None) for key, value in row.items()}
+                for field in LIST_FIELDS:
+                    if record.get(field):
+                        record[field] = [item.strip() for item in record[field].split("|") if item.strip()]
+                if record.get("release_year"):
+                    record["release_year"] = int(record["release_year"])
+                yield record
+            return
+        for line in feed:
+            if line.strip():
+                yield json.loads(line)
+
+
+def batched(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(records)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class NameMaps:
+    """In-memory name -> id maps for lookups, notes and existing perfumes."""
+
+    def __init__(self) -> None:
+        self.lookups: Dict[Any, Dict[str, int]] = {}
+        self.notes: Dict[str, int] = {}
+        self.perfumes: Dict[Tuple[int, str], int] = {}
+
+    async def load(self, db: AsyncSession) -> None:
+        for model in (*(model for model, _ in FOREIGN_KEYS.values()), MainAccordModel, TagModel):
+            result = await db.execute(select(model.name, model.id))
+            self.lookups[model] = dict(result.all())
+        result = await db.execute(select(NoteModel.normalized_name, NoteModel.id))
+        self.notes = dict(result.all())
+        result = await db.execute(select(PerfumeModel.brand_id, PerfumeModel.name, PerfumeModel.id))
+        self.perfumes = {(brand_id, fold(name)): id for brand_id, name, id in result}
+
+    async def resolve_lookups(self, db: AsyncSession, model: Any, names: Iterable[str]) -> None:
+        known = self.lookups[model]
+        missing = sorted({name for name in names if name and name not in known})
+        if not missing:
+            return
+        await db.execute(
+            pg_insert(model).on_conflict_do_nothing(index_elements=[model.name]),
+            [{"name": name} for name in missing],
+        )
+        result = await db.execute(select(model.name, model.id).where(model.name.in_(missing)))
+        known.update(result.all())
+
+    async def resolve_notes(self, db: AsyncSession, names: Iterable[str]) -> None:
+        missing = {}
+        for name in names:
+            normalized = fold(name)
+            if normalized not in self.notes:
+                missing.setdefault(normalized, name)
+        if not missing:
+            return
+        await db.execute(
+            pg_insert(NoteModel).on_conflict_do_nothing(index_elements=[NoteModel.normalized_name]),
+            [{"name": name, "normalized_name": normalized} for normalized, name in missing.items()],
+        )
+        result = await db.execute(
+            select(NoteModel.normalized_name, NoteModel.id).where(NoteModel.normalized_name.in_(list(missing)))
+        )
+        self.notes.update(result.all())
+
+
+async def import_batch(db: AsyncSession, maps: NameMaps, records: List[Dict[str, Any]]) -> int:
+    records = [record for record in records if record.get("name") and record.get("brand")]
+
+    for field, (model, _) in FOREIGN_KEYS.items():
+        await maps.resolve_lookups(db, model, (record.get(field) for record in records))
+    await maps.resolve_lookups(db, MainAccordModel, (name for r in records for name in r.get("main_accords") or []))
+    await maps.resolve_lookups(db, TagModel, (name for r in records for name in r.get("tags") or []))
+    await maps.resolve_notes(db, (name for r in records for layer in NOTE_LAYERS for name in r.get(layer) or []))
+
+    # Last occurrence wins when a feed repeats a perfume within a batch
+    rows: Dict[Tuple[int, str], Dict[str, Any]] = {}
+    sources: Dict[Tuple[int, str], Dict[str, Any]] = {}
+    for record in records:
+        row = {"name": record["name"], **{field: record.get(field) for field in SCALAR_FIELDS}}
+        for field, (model, column) in FOREIGN_KEYS.items():
+            row[column] = maps.lookups[model].get(record.get(field))
+        key = (row["brand_id"], fold(record["name"]))
+        rows[key], sources[key] = row, record
+
+    new_keys = [key for key in rows if key not in maps.perfumes]
+    existing = [{"id": maps.perfumes[key], **rows[key]} for key in rows if key in maps.perfumes]
+    if new_keys:
+        result = await db.execute(
+            insert(PerfumeModel).returning(PerfumeModel.id, PerfumeModel.brand_id, PerfumeModel.name, sort_by_parameter_order=True),
+            [rows[key] for key in new_keys],
+        )
+        for id, brand_id, name in result:
+            maps.perfumes[(brand_id, fold(name))] = id
+    if existing:
+        await db.execute(update(PerfumeModel), existing)
+
+    perfume_ids = [maps.perfumes[key] for key in rows]
+    await db.execute(delete(PerfumeNoteModel).where(PerfumeNoteModel.perfume_id.in_(perfume_ids)))
+    await db.execute(delete(perfume_main_accords).where(perfume_main_accords.c.perfume_id.in_(perfume_ids)))
+    await db.execute(delete(perfume_tags).where(perfume_tags.c.perfume_id.in_(perfume_ids)))
+
+    note_rows, accord_rows, tag_rows = {}, {}, {}
+    for key, record in sources.items():
+        perfume_id = maps.perfumes[key]
+        for layer, note_type in NOTE_LAYERS.items():
+            for name in record.get(layer) or []:
+                note_id = maps.notes[fold(name)]
+                note_rows[(perfume_id, note_id, note_type)] = {
+                    "perfume_id": perfume_id, "note_id": note_id, "note_type": note_type
+                }
+        for name in record.get("main_accords") or []:
+            accord_id = maps.lookups[MainAccordModel][name]
+            accord_rows[(perfume_id, accord_id)] = {"perfume_id": perfume_id, "accord_id": accord_id}
+        for name in record.get("tags") or []:
+            tag_id = maps.lookups[TagModel][name]
+            tag_rows[(perfume_id, tag_id)] = {"perfume_id": perfume_id, "tag_id": tag_id}
+
+    if note_rows:
+        await db.execute(insert(PerfumeNoteModel), list(note_rows.values()))
+    if accord_rows:
+        await db.execute(insert(perfume_main_accords), list(accord_rows.values()))
+    if tag_rows:
+        await db.execute(insert(perfume_tags), list(tag_rows.values()))
+    await db.commit()
+    return len(rows)
+
+
+async def import_catalog(path: str, batch_size: int = 5000) -> int:
+    """Import the feed at ``path``; returns the number of perfumes written."""
+    started = time.perf_counter()
+    total = 0
+    async with async_session() as db:
+        maps = NameMaps()
+        await maps.load(db)
+        for batch in batched(read_records(path), batch_size):
+            batch_started = time.perf_counter()
+            written = await import_batch(db, maps, batch)
+            total += written
+            elapsed = time.perf_counter() - batch_started
+            print(f"Imported {written} perfumes in {elapsed:.2f}s ({written / elapsed:,.0f} rows/s), {total} total")
+    elapsed = time.perf_counter() - started
+    print(f"Catalog import finished: {total} perfumes in {elapsed:.1f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import a CSV or JSONL perfume catalog.")
+    parser.add_argument("path")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(import_catalog(args.path, args.batch_size))
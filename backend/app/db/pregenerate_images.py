@@ -0,0 +1,69 @@
+"""
+Pre-generate image derivatives for the whole catalog.
+
+Walks every perfume ``local_image_path`` and note ``image_filename`` and
+renders each configured width and format that is missing or older than its
+source, using the same process pool and cache layout as ``/images``.
+
+    python app/db/pregenerate_images.py --widths 160 320 --formats webp avif
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db import base  # noqa: F401  registers every model for the mappers
+from app.db.session import async_session
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.services import images
+
+async def catalog_image_paths() -> List[str]:
+    async with async_session() as db:
+        perfumes = await db.scalars(select(PerfumeModel.local_image_path).where(PerfumeModel.local_image_path.is_not(None)))
+        notes = await db.scalars(select(NoteModel.image_filename).where(NoteModel.image_filename.is_not(None)))
+        return sorted({*perfumes, *(f"notes_images/{filename}" for filename in notes)})
+
+async def pregenerate(widths: List[int], formats: List[str], concurrency: int) -> None:
+    """Render every missing derivative of every catalog image."""
+    paths = await catalog_image_paths()
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"rendered": 0, "missing": 0}
+
+    async def render(path: str) -> None:
+        async with semaphore:
+            for width in widths:
+                for image_format in formats:
+                    try:
+                        await images.get_derivative(path, width, image_format)
+                    except images.ImageNotFoundError:
+                        counts["missing"] += 1
+                        return
+                    counts["rendered"] += 1
+
+    try:
+        await asyncio.gather(*(render(path) for path in paths))
+    finally:
+        images.shutdown_pool()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{len(paths)} images, {counts['rendered']} derivatives ready, "
+        f"{counts['missing']} sources missing, in {elapsed:.1f}s"
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate resized image derivatives for the catalog.")
+    parser.add_argument("--widths", type=int, nargs="+", default=settings.IMAGE_WIDTHS)
+    parser.add_argument("--formats", nargs="+", default=["webp"], choices=images.SUPPORTED_FORMATS)
+    parser.add_argument("--concurrency", type=int, default=settings.IMAGE_WORKERS * 2)
+    args = parser.parse_args()
+    asyncio.run(pregenerate(args.widths, args.formats, args.concurrency))
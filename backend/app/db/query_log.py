@@ -0,0 +1,56 @@
+"""
+Engine hooks feeding per-request SQL stats and the slow-query log.
+
+Every statement's duration is added to the current request's
+``RequestStats``. Statements slower than ``SLOW_QUERY_THRESHOLD_MS`` go to
+the ``app.slow_queries`` logger with their parameters, whatever context they
+ran in.
+"""
+import logging
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.request_stats import current_stats
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+
+MAX_LOGGED_PARAMS = 500
+
+
+def _format_params(parameters) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_LOGGED_PARAMS:
+        return text[:MAX_LOGGED_PARAMS] + f"... ({len(text)} chars)"
+    return text
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    stats = current_stats()
+    if stats is not None:
+        stats.record_query(elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        slow_query_logger.warning(
+            "Slow query (%.1f ms): %s | params=%s", elapsed * 1000, statement, _format_params(parameters)
+        )
+
+
+def _handle_error(exception_context) -> None:
+    # Keep the start-time stack balanced when a statement fails
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
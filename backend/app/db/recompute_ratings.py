@@ -0,0 +1,18 @@
+import asyncio
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.crud.review import recompute_rating_stats
+from app.db.session import async_session
+
+async def recompute_ratings() -> None:
+    """Rebuild perfume_rating_stats from the reviews table."""
+    async with async_session() as db:
+        rated = await recompute_rating_stats(db)
+    print(f"Recomputed rating aggregates for {rated} perfumes")
+
+if __name__ == "__main__":
+    asyncio.run(recompute_ratings())
@@ -0,0 +1,23 @@
+import argparse
+import asyncio
+import os
+import sys
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from app.crud.perfume_document import clear_documents, refresh_documents
+from app.db.session import async_session
+
+async def render_documents(rebuild: bool) -> None:
+    """Render every missing perfume detail document (all of them with --rebuild)."""
+    async with async_session() as db:
+        if rebuild:
+            await clear_documents(db)
+        written = await refresh_documents(db)
+    print(f"Rendered {written} perfume documents")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render perfume detail documents.")
+    parser.add_argument("--rebuild", action="store_true", help="drop and re-render every document")
+    asyncio.run(render_documents(parser.parse_args().rebuild))
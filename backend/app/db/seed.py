@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import os
 import sys
@@ -5,7 +6,18 @@ import sys
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
+from app.db.import_catalog import import_catalog
 from app.db.init_db import init_db
 
+async def seed(catalog_path: str | None, batch_size: int) -> None:
+    """Create missing tables, then bulk import the catalog feed if one is given."""
+    await init_db()
+    if catalog_path:
+        await import_catalog(catalog_path, batch_size)
+
 if __name__ == "__main__":
-    asyncio.run(init_db()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Initialize the database and optionally load a catalog feed.")
+    parser.add_argument("catalog", nargs="?", help="CSV or JSONL catalog feed")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(seed(args.catalog, args.batch_size))
@@ -1,22 +1,59 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from typing import Any, Dict, Optional
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db import events  # noqa: F401  registers the post-commit change hooks
+from app.db.pool import TimedQueuePool, pool_status
+from app.db.query_log import instrument_engine
 
-# Create async engine
-engine = create_async_engine(
-    settings.SQLALCHEMY_DATABASE_URI,
-    echo=True,
-    future=True
-)
-
-# Create async session factory
-async_session = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+def engine_options(url: str) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO, "future": True}
+    if make_url(url).get_backend_name() == "sqlite":
+        # SQLite files are local; keep SQLAlchemy's default pool for them
+        return options
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # asyncpg's own statement cache and SQLAlchemy's prepared statement
+        # cache; both must be 0 behind pgbouncer in transaction mode
+        connect_args={
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+    return options
+
+def make_session_factory(bind: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+# Create async engine (primary, takes all writes)
+engine = create_async_engine(settings.SQLALCHEMY_DATABASE_URI, **engine_options(settings.SQLALCHEMY_DATABASE_URI))
+
+# Read-only endpoints go to the replica when one is configured
+read_engine: AsyncEngine = engine
+if settings.DATABASE_READ_REPLICA_URL:
+    read_engine = create_async_engine(
+        settings.DATABASE_READ_REPLICA_URL, **engine_options(settings.DATABASE_READ_REPLICA_URL)
+    )
+
+instrument_engine(engine)
+if read_engine is not engine:
+    instrument_engine(read_engine)
+
+# Create async session factories
+async_session = make_session_factory(engine)
+read_session = make_session_factory(read_engine)
 
 # Dependency
 async def get_db() -> AsyncSession:
@@ -24,4 +61,18 @@ async def get_db() -> AsyncSession:
         try:
             yield session
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
+
+# Dependency for endpoints that never write
+async def get_read_db() -> AsyncSession:
+    async with read_session() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+def pool_stats() -> Dict[str, Optional[Dict[str, Any]]]:
+    return {
+        "primary": pool_status(engine.pool),
+        "replica": pool_status(read_engine.pool) if read_engine is not engine else None,
+    }
@@ -1,16 +1,57 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.api import api_router
+from app.core import metrics
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.http_cache import ConditionalGetMiddleware
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.request_stats import RequestTimingMiddleware
+from app.services import images
+from app.services.autocomplete import autocomplete_index
+from app.services.leaderboards import leaderboard_index
+from app.services.note_index import note_index
+from app.services.ratings import rating_aggregator
+from app.services.recommendations import similarity_index
 from fastapi.staticfiles import StaticFiles
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build in-memory indexes in the background so startup isn't blocked
+    tasks = [
+        asyncio.create_task(index.ensure_fresh())
+        for index in (similarity_index, note_index, autocomplete_index, leaderboard_index)
+    ]
+    tasks.append(asyncio.create_task(leaderboard_index.refresh_every(settings.LEADERBOARD_REFRESH_SECONDS)))
+    tasks.append(asyncio.create_task(rating_aggregator.flush_every(settings.RATING_FLUSH_SECONDS)))
+    if settings.METRICS_ENABLED:
+        tasks.append(asyncio.create_task(metrics.refresh_runtime_gauges()))
+    yield
+    for task in tasks:
+        task.cancel()
+    # Write out review aggregates still buffered in this worker
+    await rating_aggregator.flush()
+    metrics.mark_process_dead()
+    images.shutdown_pool()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", StaticFiles(directory=settings.STATIC_DIR), name="static")
+
+# ETags and 304s; inside CORS so 304s still carry the CORS headers
+if settings.HTTP_CACHE_ENABLED:
+    app.add_middleware(ConditionalGetMiddleware)
 
+# Compresses outside the ETag middleware so cached bodies are keyed by ETag
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
 
 # Add CORS middleware
 app.add_middleware(
@@ -19,8 +60,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+if settings.REQUEST_TIMING_ENABLED:
+    app.add_middleware(RequestTimingMiddleware)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+    app.add_route("/metrics", metrics.metrics_endpoint, include_in_schema=False)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
 if __name__ == "__main__":
@@ -20,7 +20,7 @@ class NoteMoodRelation(Base):
     __tablename__ = "note_mood_relations"
     
     note_id = Column(Integer, ForeignKey("notes.id"), primary_key=True)
-    mood_id = Column(Integer, ForeignKey("note_moods.id"), primary_key=True)
+    mood_id = Column(Integer, ForeignKey("note_moods.id"), primary_key=True, index=True)
 
 class Note(Base):
     __tablename__ = "notes"
@@ -29,7 +29,7 @@ class Note(Base):
     name = Column(String(255), nullable=False)
     image_filename = Column(String(255))
     description = Column(Text)
-    family_id = Column(Integer, ForeignKey("note_families.id"))
+    family_id = Column(Integer, ForeignKey("note_families.id"), index=True)
     source = Column(String(255))
     cultural_significance = Column(Text)
     normalized_name = Column(String(255), unique=True, nullable=False)
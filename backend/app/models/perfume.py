@@ -1,19 +1,19 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, ARRAY, Enum
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Table, Enum, Index, func
 from sqlalchemy.orm import relationship
-from app.db.base_class import Base
+from app.db.base_class import Base, array_of
 
 perfume_main_accords = Table(
     'perfume_main_accords',
     Base.metadata,
     Column('perfume_id', Integer, ForeignKey('perfumes.id'), primary_key=True),
-    Column('accord_id', Integer, ForeignKey('main_accords.id'), primary_key=True)
+    Column('accord_id', Integer, ForeignKey('main_accords.id'), primary_key=True, index=True)
 )
 
 perfume_tags = Table(
     'perfume_tags',
     Base.metadata,
     Column('perfume_id', Integer, ForeignKey('perfumes.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True, index=True)
 )
 
 class Tag(Base):
@@ -27,7 +27,7 @@ class PerfumeNote(Base):
     __tablename__ = "perfume_notes"
 
     perfume_id = Column(Integer, ForeignKey('perfumes.id'), primary_key=True)
-    note_id = Column(Integer, ForeignKey('notes.id'), primary_key=True)
+    note_id = Column(Integer, ForeignKey('notes.id'), primary_key=True, index=True)
     note_type = Column(Enum('top', 'middle', 'base', name='note_type'), primary_key=True)
 
     note = relationship("Note", back_populates="perfume_notes")
@@ -38,21 +38,21 @@ class Perfume(Base):
 
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
-    brand_id = Column(Integer, ForeignKey('brands.id'))
-    concentration_id = Column(Integer, ForeignKey('concentration.id'))
+    brand_id = Column(Integer, ForeignKey('brands.id'), index=True)
+    concentration_id = Column(Integer, ForeignKey('concentration.id'), index=True)
     local_image_path = Column(String(255))
     gender = Column(String(50))
-    type_id = Column(Integer, ForeignKey('type.id'))
-    family_id = Column(Integer, ForeignKey('family.id'))
+    type_id = Column(Integer, ForeignKey('type.id'), index=True)
+    family_id = Column(Integer, ForeignKey('family.id'), index=True)
     category = Column(String(255))
-    release_year = Column(Integer)
-    country_id = Column(Integer, ForeignKey('country.id'))
+    release_year = Column(Integer, index=True)
+    country_id = Column(Integer, ForeignKey('country.id'), index=True)
     description = Column(Text)
     longevity = Column(String(255))
     sillage = Column(String(255))
-    occasion = Column(ARRAY(String))
-    season = Column(ARRAY(String))
-    perfumer_id = Column(Integer, ForeignKey('perfumer.id'))
+    occasion = Column(array_of(String))
+    season = Column(array_of(String))
+    perfumer_id = Column(Integer, ForeignKey('perfumer.id'), index=True)
     inspiration = Column(Text)
 
     # Relationships
@@ -64,4 +64,7 @@ class Perfume(Base):
     perfumer = relationship("Perfumer", back_populates="perfumes")
     perfume_notes = relationship("PerfumeNote", back_populates="perfume")
     main_accords = relationship("MainAccord", secondary=perfume_main_accords, back_populates="perfumes")
-    tags = relationship("Tag", secondary=perfume_tags, back_populates="perfumes") 
\ No newline at end of file
+    tags = relationship("Tag", secondary=perfume_tags, back_populates="perfumes")
+
+# Gender filter (case-insensitive equality) paged by id
+Index("ix_perfumes_gender_lower", func.lower(Perfume.gender), Perfume.id)
@@ -0,0 +1,22 @@
+from sqlalchemy import BigInteger, Column, Integer, LargeBinary, DateTime, ForeignKey, func
+from app.db.base_class import Base
+
+class PerfumeDocument(Base):
+    """Pre-rendered JSON of the perfume detail page (``app.schemas.perfume.Perfume``)."""
+    __tablename__ = "perfume_documents"
+
+    perfume_id = Column(Integer, ForeignKey('perfumes.id', ondelete='CASCADE'), primary_key=True)
+    document = Column(LargeBinary, nullable=False)
+    source_version = Column(BigInteger, nullable=False, server_default="0")  # version it was rendered from
+    rendered_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class PerfumeDocumentVersion(Base):
+    """
+    Per-perfume counter bumped by triggers whenever anything a document is
+    rendered from changes; a perfume without a row is at version 0. No
+    foreign key, so a deleted perfume's triggers can still bump it.
+    """
+    __tablename__ = "perfume_document_versions"
+
+    perfume_id = Column(Integer, primary_key=True, autoincrement=False)
+    version = Column(BigInteger, nullable=False)
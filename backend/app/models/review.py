@@ -0,0 +1,48 @@
+from sqlalchemy import (
+    CheckConstraint, Column, DateTime, Float, ForeignKey, Index, Integer, SmallInteger, String, Text, func
+)
+from app.db.base_class import Base, array_of
+
+RATING_MAX = 5
+# Vote scales; reviews store the position of the chosen label
+LONGEVITY_VOTES = ("very weak", "weak", "moderate", "long lasting", "eternal")
+SILLAGE_VOTES = ("intimate", "moderate", "strong", "enormous")
+
+class Review(Base):
+    __tablename__ = "reviews"
+
+    id = Column(Integer, primary_key=True)
+    perfume_id = Column(Integer, ForeignKey('perfumes.id', ondelete='CASCADE'), nullable=False)
+    author = Column(String(100), nullable=False)
+    rating = Column(SmallInteger, nullable=False)
+    longevity = Column(SmallInteger)  # index into LONGEVITY_VOTES
+    sillage = Column(SmallInteger)  # index into SILLAGE_VOTES
+    title = Column(String(255))
+    body = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint(f"rating BETWEEN 1 AND {RATING_MAX}", name="ck_reviews_rating"),
+        # A perfume's reviews, newest first
+        Index("ix_reviews_perfume_id_id", "perfume_id", "id"),
+    )
+
+class PerfumeRatingStats(Base):
+    """
+    Review aggregates per perfume, kept by ``app.services.ratings`` from
+    batched deltas rather than computed on read.
+    """
+    __tablename__ = "perfume_rating_stats"
+
+    perfume_id = Column(Integer, ForeignKey('perfumes.id', ondelete='CASCADE'), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_histogram = Column(array_of(Integer), nullable=False)  # reviews per star, 1 to RATING_MAX
+    longevity_votes = Column(array_of(Integer), nullable=False)  # votes per LONGEVITY_VOTES label
+    sillage_votes = Column(array_of(Integer), nullable=False)  # votes per SILLAGE_VOTES label
+    score = Column(Float, nullable=False)  # Bayesian average rating, the sort=rating key
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+# sort=rating and sort=popularity, paged by (key desc, perfume_id)
+Index("ix_perfume_rating_stats_score", PerfumeRatingStats.score.desc(), PerfumeRatingStats.perfume_id)
+Index("ix_perfume_rating_stats_count", PerfumeRatingStats.rating_count.desc(), PerfumeRatingStats.perfume_id)
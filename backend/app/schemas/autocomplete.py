@@ -0,0 +1,13 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class Suggestion(BaseModel):
+    id: int
+    name: str
+    brand_name: Optional[str] = None
+
+class AutocompleteResult(BaseModel):
+    perfumes: List[Suggestion] = []
+    brands: List[Suggestion] = []
+    notes: List[Suggestion] = []
+    perfumers: List[Suggestion] = []
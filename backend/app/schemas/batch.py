@@ -0,0 +1,7 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+class BatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=settings.BATCH_MAX_IDS)
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from .note import Note
 from .main_accord import MainAccord
@@ -57,4 +57,13 @@ class PerfumeList(BaseModel):
     local_image_path: Optional[str] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+class PerfumeSearchResult(BaseModel):
+    items: List[PerfumeList]
+    total: int
+    facets: Dict[str, List[FacetCount]]
@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Dict, Literal, Optional
+from pydantic import BaseModel, Field
+
+from app.models.review import LONGEVITY_VOTES, RATING_MAX, SILLAGE_VOTES
+
+LongevityVote = Literal[LONGEVITY_VOTES]
+SillageVote = Literal[SILLAGE_VOTES]
+
+class ReviewCreate(BaseModel):
+    author: str = Field(..., min_length=1, max_length=100)
+    rating: int = Field(..., ge=1, le=RATING_MAX)
+    longevity: Optional[LongevityVote] = None
+    sillage: Optional[SillageVote] = None
+    title: Optional[str] = Field(None, max_length=255)
+    body: Optional[str] = Field(None, max_length=10000)
+
+class Review(BaseModel):
+    id: int
+    perfume_id: int
+    author: str
+    rating: int
+    longevity: Optional[LongevityVote] = None
+    sillage: Optional[SillageVote] = None
+    title: Optional[str] = None
+    body: Optional[str] = None
+    created_at: datetime
+
+class RatingStats(BaseModel):
+    perfume_id: int
+    count: int
+    mean: Optional[float] = None
+    # Keyed by star ("1" to "5") and by vote label
+    histogram: Dict[str, int]
+    longevity: Dict[str, int]
+    sillage: Dict[str, int]
@@ -0,0 +1,200 @@
+"""
+Typeahead suggestions for perfumes, brands, notes and perfumers.
+
+Each kind has its own ``PrefixTable``. Every name is folded (lower-cased,
+accents stripped) and indexed once per word start, so "herm" finds
+"Terre d'Hermès". The keys go into one sorted fixed-width bytes array, and a
+parallel ``int32`` array holds the entry each key belongs to. Entries are
+numbered in popularity order, so the best k matches for a prefix are the k
+smallest distinct entry numbers in the key range that ``searchsorted``
+returns. The very short prefixes, whose ranges are the widest, are answered
+from a precomputed top-k.
+
+Popularity is the number of perfumes for brands, notes and perfumers, and
+the number of tags (trending, bestseller, ...) for perfumes. Committed ORM
+changes mark the index stale and it is rebuilt in the background (see
+``RefreshableIndex``); the table building runs in a worker thread.
+"""
+import asyncio
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from sqlalchemy import distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.events import on_commit
+from app.models.brand import Brand as BrandModel
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.models.perfume import perfume_tags
+from app.models.perfumer import Perfumer as PerfumerModel
+from app.services.refreshable import RefreshableIndex
+from app.services.search import fold
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("perfumes", "brands", "notes", "perfumers")
+MAX_SUGGESTIONS = 25
+# Keys (and queries) are compared on their first MAX_KEY_BYTES folded bytes
+MAX_KEY_BYTES = 32
+PRECOMPUTED_PREFIX_BYTES = 2
+
+_WORD_START = re.compile(r"\b\w")
+
+# (id, display name, brand name or None, popularity, names to index)
+Entry = Tuple[int, str, Optional[str], int, Tuple[str, ...]]
+
+
+def prefix_keys(names: Iterable[str]) -> Set[bytes]:
+    """Folded suffixes of ``names`` starting at each word."""
+    keys = set()
+    for name in names:
+        folded = fold(name or "")
+        for match in _WORD_START.finditer(folded):
+            keys.add(folded[match.start():].encode()[:MAX_KEY_BYTES])
+    return keys
+
+
+def smallest_unique(values: np.ndarray, k: int) -> np.ndarray:
+    """The ``k`` smallest distinct values, without sorting the whole array when it is large."""
+    if len(values) > 4 * k:
+        head = np.unique(np.partition(values, 4 * k)[:4 * k + 1])
+        if len(head) >= k:
+            return head[:k]
+    return np.unique(values)[:k]
+
+
+class PrefixTable:
+    """Suggestions of one kind ranked by popularity behind a sorted key array."""
+
+    def __init__(self, entries: List[Entry]) -> None:
+        entries.sort(key=lambda entry: (-entry[3], len(entry[1]), fold(entry[1]), entry[0]))
+        self.ids = np.fromiter((entry[0] for entry in entries), dtype=np.int32, count=len(entries))
+        self.names = [entry[1] for entry in entries]
+        self.brand_names = [entry[2] for entry in entries] if any(entry[2] for entry in entries) else None
+
+        keys: List[bytes] = []
+        ranks: List[int] = []
+        for rank, entry in enumerate(entries):
+            for key in prefix_keys(entry[4]):
+                keys.append(key)
+                ranks.append(rank)
+        key_array = np.array(keys, dtype=f"S{MAX_KEY_BYTES}")
+        order = np.argsort(key_array, kind="stable")
+        self.keys = key_array[order]
+        self.ranks = np.asarray(ranks, dtype=np.int32)[order]
+
+        self.top: Dict[bytes, np.ndarray] = {}
+        for length in range(1, PRECOMPUTED_PREFIX_BYTES + 1):
+            for prefix in np.unique(self.keys.astype(f"S{length}")).tolist():
+                self.top[prefix] = self._scan(prefix, MAX_SUGGESTIONS)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _scan(self, prefix: bytes, k: int) -> np.ndarray:
+        # No UTF-8 sequence contains 0xff, so this bounds every key starting with prefix
+        start = np.searchsorted(self.keys, prefix, side="left")
+        end = np.searchsorted(self.keys, prefix + b"\xff", side="left")
+        return smallest_unique(self.ranks[start:end], k)
+
+    def suggest(self, prefix: bytes, limit: int) -> List[Dict[str, object]]:
+        if len(prefix) <= PRECOMPUTED_PREFIX_BYTES:
+            ranks = self.top.get(prefix, np.empty(0, dtype=np.int32))[:limit]
+        else:
+            ranks = self._scan(prefix, limit)
+        suggestions = []
+        for rank in ranks.tolist():
+            suggestion = {"id": int(self.ids[rank]), "name": self.names[rank]}
+            if self.brand_names is not None:
+                suggestion["brand_name"] = self.brand_names[rank]
+            suggestions.append(suggestion)
+        return suggestions
+
+
+async def load_entries(db: AsyncSession) -> Dict[str, List[Entry]]:
+    entries: Dict[str, List[Entry]] = {kind: [] for kind in KINDS}
+
+    tag_counts = (
+        select(perfume_tags.c.perfume_id, func.count().label("tags"))
+        .group_by(perfume_tags.c.perfume_id)
+        .subquery()
+    )
+    result = await db.stream(
+        select(PerfumeModel.id, PerfumeModel.name, BrandModel.name, func.coalesce(tag_counts.c.tags, 0))
+        .outerjoin(BrandModel, PerfumeModel.brand_id == BrandModel.id)
+        .outerjoin(tag_counts, tag_counts.c.perfume_id == PerfumeModel.id)
+        .execution_options(yield_per=10000)
+    )
+    async for id, name, brand_name, tags in result:
+        entries["perfumes"].append((id, name, brand_name, tags, (name,)))
+
+    for kind, model, column in (
+        ("brands", BrandModel, PerfumeModel.brand_id),
+        ("perfumers", PerfumerModel, PerfumeModel.perfumer_id),
+    ):
+        result = await db.execute(
+            select(model.id, model.name, func.count(PerfumeModel.id))
+            .outerjoin(PerfumeModel, column == model.id)
+            .group_by(model.id, model.name)
+        )
+        entries[kind] = [(id, name, None, count, (name,)) for id, name, count in result]
+
+    result = await db.execute(
+        select(NoteModel.id, NoteModel.name, NoteModel.normalized_name, func.count(distinct(PerfumeNoteModel.perfume_id)))
+        .outerjoin(PerfumeNoteModel, PerfumeNoteModel.note_id == NoteModel.id)
+        .group_by(NoteModel.id, NoteModel.name, NoteModel.normalized_name)
+    )
+    entries["notes"] = [
+        (id, name, None, count, (name, normalized_name)) for id, name, normalized_name, count in result
+    ]
+    return entries
+
+
+def build_tables(entries: Dict[str, List[Entry]]) -> Dict[str, PrefixTable]:
+    return {kind: PrefixTable(entries[kind]) for kind in KINDS}
+
+
+class AutocompleteIndex(RefreshableIndex):
+    name = "autocomplete index"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._tables = build_tables({kind: [] for kind in KINDS})
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        self._is_stale = False
+        entries = await load_entries(db)
+        tables = await asyncio.to_thread(build_tables, entries)
+        async with self._lock:
+            self._tables = tables
+            self._is_built = True
+        logger.info(
+            "Autocomplete index built: %s", ", ".join(f"{len(tables[kind])} {kind}" for kind in KINDS)
+        )
+
+    def complete(
+        self,
+        q: str,
+        kinds: Sequence[str] = KINDS,
+        limit: int = 10
+    ) -> Dict[str, List[Dict[str, object]]]:
+        """Top ``limit`` suggestions per kind whose name has a word starting with ``q``."""
+        prefix = fold(q).encode()[:MAX_KEY_BYTES]
+        tables = self._tables
+        return {
+            kind: tables[kind].suggest(prefix, limit) if prefix and kind in kinds else []
+            for kind in KINDS
+        }
+
+
+autocomplete_index = AutocompleteIndex()
+
+
+@on_commit
+def mark_autocomplete_stale(changes) -> None:
+    if changes.keys() & {"perfumes", "brands", "notes", "perfumers"}:
+        autocomplete_index.mark_stale()
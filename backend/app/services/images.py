@@ -0,0 +1,135 @@
+"""
+Resized and transcoded derivatives of the images under ``static/``.
+
+A derivative is one source image (``Perfume.local_image_path`` or
+``notes_images/<Note.image_filename>``) scaled down to one of
+``IMAGE_WIDTHS`` and encoded as WebP, AVIF (when this Pillow build supports
+it) or JPEG. Derivatives are written under ``IMAGE_CACHE_DIR`` as
+``<format>/<width>/<source path>.<format>`` and rebuilt when the source is
+newer. Decoding and encoding run in a ``ProcessPoolExecutor``, so the event
+loop never blocks on Pillow, and concurrent requests for the same missing
+derivative share a single render.
+"""
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageOps, features
+
+from app.core.config import settings
+
+FORMATS = {
+    "avif": ("AVIF", "image/avif"),
+    "webp": ("WEBP", "image/webp"),
+    "jpeg": ("JPEG", "image/jpeg"),
+}
+# Preferred first when negotiating from the Accept header
+NEGOTIATION_ORDER = ("avif", "webp")
+
+
+class ImageNotFoundError(LookupError):
+    pass
+
+
+def _is_supported(image_format: str) -> bool:
+    try:
+        return image_format == "jpeg" or bool(features.check(image_format))
+    except ValueError:
+        return False
+
+
+SUPPORTED_FORMATS = tuple(image_format for image_format in FORMATS if _is_supported(image_format))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_rendering: Dict[Path, "asyncio.Future[None]"] = {}
+
+
+def static_root() -> Path:
+    return Path(settings.STATIC_DIR).resolve()
+
+
+def resolve_source(path: str) -> Path:
+    """
+    Absolute path of the source image for a ``static/``-relative ``path``.
+    Windows separators from old imports are accepted; anything that escapes
+    the static directory or doesn't exist raises ``ImageNotFoundError``.
+    """
+    root = static_root()
+    source = (root / path.replace("\\", "/").lstrip("/")).resolve()
+    if not source.is_relative_to(root) or not source.is_file():
+        raise ImageNotFoundError(path)
+    return source
+
+
+def derivative_path(source: Path, width: int, image_format: str) -> Path:
+    relative = source.relative_to(static_root())
+    return Path(settings.IMAGE_CACHE_DIR).resolve() / image_format / str(width) / f"{relative}.{image_format}"
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    accept = accept or ""
+    for image_format in NEGOTIATION_ORDER:
+        if image_format in SUPPORTED_FORMATS and FORMATS[image_format][1] in accept:
+            return image_format
+    return "jpeg"
+
+
+def render_derivative(source: str, target: str, width: int, image_format: str, quality: int) -> None:
+    """Resize ``source`` to at most ``width`` pixels wide and write ``target``; runs in a worker process."""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        if image_format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGBA")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temporary = f"{target}.{os.getpid()}.tmp"
+        image.save(temporary, FORMATS[image_format][0], quality=quality)
+    os.replace(temporary, target)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def is_fresh(source: Path, target: Path) -> bool:
+    try:
+        return target.stat().st_mtime >= source.stat().st_mtime
+    except FileNotFoundError:
+        return False
+
+
+async def get_derivative(path: str, width: int, image_format: str) -> Tuple[Path, str]:
+    """Path and media type of the derivative, rendering it in the process pool if needed."""
+    source = resolve_source(path)
+    target = derivative_path(source, width, image_format)
+    if is_fresh(source, target):
+        return target, FORMATS[image_format][1]
+
+    pending = _rendering.get(target)
+    if pending is None:
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(
+            get_pool(), render_derivative, str(source), str(target), width, image_format, settings.IMAGE_QUALITY
+        )
+        _rendering[target] = pending
+        pending.add_done_callback(lambda _: _rendering.pop(target, None))
+    try:
+        await asyncio.shield(pending)
+    except Image.UnidentifiedImageError:
+        raise ImageNotFoundError(path)
+    return target, FORMATS[image_format][1]
@@ -0,0 +1,121 @@
+"""
+Precomputed home page leaderboards (trending, top rated, most loved, ...).
+
+Each board is a ranked list of up to ``LEADERBOARD_SIZE`` perfumes, stored
+as already-encoded ``PerfumeList`` JSON items so a request only slices and
+joins bytes. Boards are rebuilt from the database every
+``LEADERBOARD_REFRESH_SECONDS`` in the background (see ``RefreshableIndex``);
+requests never aggregate.
+
+A board is a ranking statement returning perfume ids, best first:
+"top-rated" and "most-loved" read the rating aggregates (Bayesian average
+and number of ratings), and each of ``LEADERBOARD_TAGS`` lists the perfumes
+carrying a curated tag, newest (highest id) first.
+"""
+import logging
+import time
+from typing import Dict, List, Optional
+
+import orjson
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.brand import Brand as BrandModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import Tag as TagModel
+from app.models.perfume import perfume_tags
+from app.models.review import PerfumeRatingStats as PerfumeRatingStatsModel
+from app.services.refreshable import RefreshableIndex
+
+logger = logging.getLogger(__name__)
+
+
+def tagged(tag_name: str) -> Select:
+    """
+    Perfumes carrying ``tag_name``, newest first. Membership is the signal:
+    the curators' tag is what makes a perfume trending, as on the home page
+    before boards existed, and the catalog records no views or sales to rank
+    by. Newest first keeps the order stable and puts fresh additions on top.
+    """
+    return (
+        select(perfume_tags.c.perfume_id)
+        .join(TagModel, perfume_tags.c.tag_id == TagModel.id)
+        .where(TagModel.name == tag_name)
+        .order_by(perfume_tags.c.perfume_id.desc())
+    )
+
+
+def rated_by(key) -> Select:
+    """Rated perfumes, highest ``key`` of their rating aggregates first."""
+    return (
+        select(PerfumeRatingStatsModel.perfume_id)
+        .where(PerfumeRatingStatsModel.rating_count > 0)
+        .order_by(key.desc(), PerfumeRatingStatsModel.perfume_id)
+    )
+
+
+def board_rankings() -> Dict[str, Select]:
+    """``{board name: ranking statement}`` in display order."""
+    boards = {board: tagged(tag_name) for board, tag_name in settings.LEADERBOARD_TAGS.items()}
+    boards["top-rated"] = rated_by(PerfumeRatingStatsModel.score)
+    boards["most-loved"] = rated_by(PerfumeRatingStatsModel.rating_count)
+    return boards
+
+
+async def load_board(db: AsyncSession, ranking: Select, size: int) -> List[bytes]:
+    """The top ``size`` perfumes of ``ranking`` as encoded ``PerfumeList`` items."""
+    ids = list((await db.execute(ranking.limit(size))).scalars())
+    if not ids:
+        return []
+    result = await db.execute(
+        select(PerfumeModel.id, PerfumeModel.name, BrandModel.name, PerfumeModel.local_image_path)
+        .join(BrandModel, PerfumeModel.brand_id == BrandModel.id)
+        .where(PerfumeModel.id.in_(ids))
+    )
+    items = {
+        perfume_id: orjson.dumps({"id": perfume_id, "name": name, "brand_name": brand_name, "local_image_path": image})
+        for perfume_id, name, brand_name, image in result
+    }
+    return [items[perfume_id] for perfume_id in ids if perfume_id in items]
+
+
+class LeaderboardIndex(RefreshableIndex):
+    name = "leaderboards"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._boards: Dict[str, List[bytes]] = {}
+        self.built_at = 0.0
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        self._is_stale = False
+        started = time.perf_counter()
+        boards = {
+            board: await load_board(db, ranking, settings.LEADERBOARD_SIZE)
+            for board, ranking in board_rankings().items()
+        }
+        async with self._lock:
+            self._boards = boards
+            self._is_built = True
+            self.built_at = time.time()
+        logger.info(
+            "Leaderboards built in %.0f ms: %s", (time.perf_counter() - started) * 1000,
+            ", ".join(f"{board} {len(items)}" for board, items in boards.items()),
+        )
+
+    def render(self, board: str, limit: int) -> Optional[bytes]:
+        """The top ``limit`` of ``board`` as a JSON array; None for an unknown board."""
+        items = self._boards.get(board)
+        if items is None:
+            return None
+        return b"[" + b",".join(items[:limit]) + b"]"
+
+    def render_all(self, limit: int) -> bytes:
+        """Every board's top ``limit`` as one JSON object keyed by board."""
+        return b"{" + b",".join(
+            orjson.dumps(board) + b":" + self.render(board, limit) for board in self._boards
+        ) + b"}"
+
+
+leaderboard_index = LeaderboardIndex()
@@ -0,0 +1,133 @@
+"""
+Inverted index from notes to the perfumes that contain them.
+
+For every note there is one posting list per layer (top / middle / base) and
+one for "any layer"; each posting list is a sorted ``int32`` NumPy array of
+perfume ids. A query such as "vanilla and oud in the base, no patchouli"
+intersects the include lists smallest-first and subtracts the exclude lists
+in memory instead of issuing one self-join of ``perfume_notes`` per note.
+
+The index is rebuilt from the database whenever committed ORM changes touch
+perfumes, notes or perfume notes (see ``RefreshableIndex``).
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.events import on_commit
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.services.refreshable import RefreshableIndex
+from app.services.search import fold
+
+logger = logging.getLogger(__name__)
+
+NOTE_LAYERS = ("top", "middle", "base")
+EMPTY = np.empty(0, dtype=np.int32)
+
+# (note_id, layer) where layer None means "in any layer"
+NoteTerm = Tuple[int, Optional[str]]
+
+
+class UnknownNoteError(ValueError):
+    pass
+
+
+class NoteIndex(RefreshableIndex):
+    name = "note index"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._postings: Dict[NoteTerm, np.ndarray] = {}
+        self._all_perfumes = EMPTY
+        self._note_ids: Dict[str, int] = {}
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        self._is_stale = False
+        perfume_ids = (await db.execute(select(PerfumeModel.id).order_by(PerfumeModel.id))).scalars().all()
+        notes = (await db.execute(select(NoteModel.id, NoteModel.name, NoteModel.normalized_name))).all()
+        result = await db.execute(
+            select(PerfumeNoteModel.note_id, cast(PerfumeNoteModel.note_type, String), PerfumeNoteModel.perfume_id)
+        )
+        rows = result.all()
+
+        postings: Dict[NoteTerm, np.ndarray] = {}
+        if rows:
+            note_column, layer_column, perfume_column = (np.asarray(column) for column in zip(*rows))
+            note_column = note_column.astype(np.int32)
+            perfume_column = perfume_column.astype(np.int32)
+            for layer in (*NOTE_LAYERS, None):
+                mask = layer_column == layer if layer else slice(None)
+                postings.update(self._group(note_column[mask], perfume_column[mask], layer))
+
+        note_ids = {}
+        for id, name, normalized_name in notes:
+            note_ids[fold(name)] = id
+            note_ids.setdefault(fold(normalized_name), id)
+
+        async with self._lock:
+            self._postings = postings
+            self._all_perfumes = np.asarray(perfume_ids, dtype=np.int32)
+            self._note_ids = note_ids
+            self._is_built = True
+        logger.info("Note index built: %d perfumes, %d posting lists", len(perfume_ids), len(postings))
+
+    @staticmethod
+    def _group(note_ids: np.ndarray, perfume_ids: np.ndarray, layer: Optional[str]) -> Dict[NoteTerm, np.ndarray]:
+        """Split ``(note, perfume)`` pairs into one sorted, de-duplicated perfume array per note."""
+        if not len(note_ids):
+            return {}
+        order = np.lexsort((perfume_ids, note_ids))
+        note_ids, perfume_ids = note_ids[order], perfume_ids[order]
+        keys, starts = np.unique(note_ids, return_index=True)
+        return {
+            (int(note_id), layer): np.unique(chunk)
+            for note_id, chunk in zip(keys.tolist(), np.split(perfume_ids, starts[1:]))
+        }
+
+    def resolve(self, term: str) -> NoteTerm:
+        """
+        Parse ``"[layer:]note"`` where note is an id or a name, e.g. ``"base:vanilla"``.
+        Raises ``UnknownNoteError`` for notes or layers that don't exist.
+        """
+        layer, _, note = term.rpartition(":")
+        layer = layer.strip().lower() or None
+        if layer is not None and layer not in NOTE_LAYERS:
+            raise UnknownNoteError(f"Unknown note layer '{layer}'")
+        note = note.strip()
+        if note.isdigit():
+            return int(note), layer
+        note_id = self._note_ids.get(fold(note))
+        if note_id is None:
+            raise UnknownNoteError(f"Unknown note '{note}'")
+        return note_id, layer
+
+    def find(self, include: List[NoteTerm], exclude: List[NoteTerm]) -> np.ndarray:
+        """Sorted ids of perfumes containing every ``include`` term and no ``exclude`` term."""
+        if include:
+            lists = sorted((self._postings.get(term, EMPTY) for term in include), key=len)
+            matches = lists[0]
+            for posting in lists[1:]:
+                if not len(matches):
+                    break
+                matches = np.intersect1d(matches, posting, assume_unique=True)
+        else:
+            matches = self._all_perfumes
+        for term in exclude:
+            if not len(matches):
+                break
+            matches = np.setdiff1d(matches, self._postings.get(term, EMPTY), assume_unique=True)
+        return matches
+
+
+note_index = NoteIndex()
+
+
+@on_commit
+def mark_note_index_stale(changes) -> None:
+    if changes.keys() & {"perfumes", "notes", "perfume_notes"}:
+        note_index.mark_stale()
@@ -0,0 +1,200 @@
+"""
+Write-behind rating aggregates.
+
+Every committed review insert, edit or delete becomes a delta on its
+perfume's counters (rating count and sum, star histogram, longevity and
+sillage votes). Deltas are taken from the ORM flush, so they carry the old
+values of an edit, and are held per worker until the transaction commits.
+``RatingAggregator`` merges them in memory and ``flush`` adds them to
+``perfume_rating_stats`` in a single upsert every ``RATING_FLUSH_SECONDS``,
+so a burst of reviews on a popular perfume costs one row update, and reads
+never run ``AVG()``. Deltas are additive, so several workers flushing their
+own share stay correct.
+
+A worker that dies loses at most one interval of deltas, and writes that
+bypass the ORM are not seen; ``app.db.recompute_ratings`` rebuilds the
+table from ``reviews`` to reconcile.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, cast, func, inspect
+from sqlalchemy.dialects.postgresql import array, insert
+
+from app.db.events import on_commit, on_flush
+from app.db.session import async_session
+from app.models.review import LONGEVITY_VOTES, RATING_MAX, SILLAGE_VOTES
+from app.models.review import PerfumeRatingStats as PerfumeRatingStatsModel
+from app.models.review import Review as ReviewModel
+
+logger = logging.getLogger(__name__)
+
+# score = (PRIOR_WEIGHT * PRIOR_MEAN + rating sum) / (PRIOR_WEIGHT + rating count): a
+# perfume needs a few reviews before it can outrank well-established ones
+PRIOR_MEAN = 3.5
+PRIOR_WEIGHT = 5
+
+_DELTAS_KEY = "rating_deltas"
+
+# (perfume_id, rating, longevity, sillage) of one review version
+ReviewValues = Tuple[int, int, Optional[int], Optional[int]]
+
+
+def score(count: Any, total: Any) -> Any:
+    """
+    Bayesian average rating; works on numbers and SQL expressions alike.
+    Counts are clamped at 0 by the callers: another worker's unflushed
+    inserts can briefly leave a perfume's count negative.
+    """
+    return (PRIOR_WEIGHT * PRIOR_MEAN + total) / (PRIOR_WEIGHT + count)
+
+
+class RatingDelta:
+    __slots__ = ("count", "total", "histogram", "longevity", "sillage")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.histogram = [0] * RATING_MAX
+        self.longevity = [0] * len(LONGEVITY_VOTES)
+        self.sillage = [0] * len(SILLAGE_VOTES)
+
+    def add(self, rating: int, longevity: Optional[int], sillage: Optional[int], sign: int) -> None:
+        self.count += sign
+        self.total += sign * rating
+        self.histogram[rating - 1] += sign
+        if longevity is not None:
+            self.longevity[longevity] += sign
+        if sillage is not None:
+            self.sillage[sillage] += sign
+
+    def merge(self, other: "RatingDelta") -> None:
+        self.count += other.count
+        self.total += other.total
+        for mine, theirs in ((self.histogram, other.histogram), (self.longevity, other.longevity),
+                             (self.sillage, other.sillage)):
+            for position, value in enumerate(theirs):
+                mine[position] += value
+
+
+def _added(stored: Any, delta: Any, length: int) -> Any:
+    """Element-wise ``stored + delta`` of two integer array columns."""
+    return array([stored[position] + delta[position] for position in range(1, length + 1)])
+
+
+class RatingAggregator:
+    def __init__(self) -> None:
+        self._pending: Dict[int, RatingDelta] = {}
+        self._flush_lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def record(self, changes: List[Tuple[int, ReviewValues]]) -> None:
+        for sign, (perfume_id, rating, longevity, sillage) in changes:
+            delta = self._pending.get(perfume_id)
+            if delta is None:
+                delta = self._pending[perfume_id] = RatingDelta()
+            delta.add(rating, longevity, sillage, sign)
+
+    async def flush(self) -> int:
+        """Add the pending deltas to ``perfume_rating_stats``; returns the perfumes updated."""
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            # Row locks taken in perfume order, so concurrent workers' upserts cannot deadlock
+            rows = [
+                {
+                    "perfume_id": perfume_id,
+                    "rating_count": delta.count,
+                    "rating_sum": delta.total,
+                    "rating_histogram": delta.histogram,
+                    "longevity_votes": delta.longevity,
+                    "sillage_votes": delta.sillage,
+                    "score": score(max(delta.count, 0), delta.total),
+                }
+                for perfume_id, delta in sorted(pending.items())
+            ]
+            stats = PerfumeRatingStatsModel.__table__.c
+            statement = insert(PerfumeRatingStatsModel).values(rows)
+            excluded = statement.excluded
+            count = stats.rating_count + excluded.rating_count
+            total = stats.rating_sum + excluded.rating_sum
+            statement = statement.on_conflict_do_update(
+                index_elements=[stats.perfume_id],
+                set_={
+                    "rating_count": count,
+                    "rating_sum": total,
+                    "rating_histogram": _added(stats.rating_histogram, excluded.rating_histogram, RATING_MAX),
+                    "longevity_votes": _added(stats.longevity_votes, excluded.longevity_votes, len(LONGEVITY_VOTES)),
+                    "sillage_votes": _added(stats.sillage_votes, excluded.sillage_votes, len(SILLAGE_VOTES)),
+                    "score": score(func.greatest(count, 0), cast(total, Float)),
+                    "updated_at": func.now(),
+                },
+            )
+            try:
+                async with async_session() as db:
+                    await db.execute(statement)
+                    await db.commit()
+            except Exception:
+                # Put the batch back so the next flush retries it
+                for perfume_id, delta in pending.items():
+                    current = self._pending.get(perfume_id)
+                    if current is None:
+                        self._pending[perfume_id] = delta
+                    else:
+                        current.merge(delta)
+                raise
+            return len(rows)
+
+    async def flush_every(self, seconds: float) -> None:
+        """Flush every ``seconds`` until cancelled."""
+        while True:
+            await asyncio.sleep(seconds)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Flushing rating aggregates failed; %d perfumes pending", self.pending)
+
+
+rating_aggregator = RatingAggregator()
+
+
+def _values(review: ReviewModel) -> ReviewValues:
+    return review.perfume_id, review.rating, review.longevity, review.sillage
+
+
+def _previous_values(review: ReviewModel) -> Optional[ReviewValues]:
+    """Values before this flush, or None when none of the aggregated columns changed."""
+    state = inspect(review)
+    previous = []
+    changed = False
+    for name in ("perfume_id", "rating", "longevity", "sillage"):
+        history = state.attrs[name].history
+        if history.has_changes():
+            # A change from NULL has nothing in deleted, e.g. a first sillage vote
+            previous.append(history.deleted[0] if history.deleted else None)
+            changed = True
+        else:
+            previous.append(getattr(review, name))
+    return tuple(previous) if changed else None
+
+
+@on_flush(ReviewModel.__tablename__, _DELTAS_KEY)
+def _capture_deltas(operation: str, review: ReviewModel) -> List[Tuple[int, ReviewValues]]:
+    if operation == "insert":
+        return [(1, _values(review))]
+    if operation == "delete":
+        return [(-1, _values(review))]
+    previous = _previous_values(review)
+    return [] if previous is None else [(-1, previous), (1, _values(review))]
+
+
+@on_commit
+def _record_deltas(changes) -> None:
+    deltas = changes.get(_DELTAS_KEY)
+    if deltas:
+        rating_aggregator.record(deltas)
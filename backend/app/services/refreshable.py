@@ -0,0 +1,73 @@
+"""
+Base for in-memory indexes rebuilt from the database.
+
+Subclasses implement ``rebuild`` (full load) and may override ``refresh``
+(apply pending changes; defaults to a full rebuild). The first caller of
+``ensure_fresh`` builds the index; afterwards pending changes are applied in
+a background task while queries keep reading the current snapshot. Indexes
+over data no commit hook sees (aggregates) are refreshed on a timer with
+``refresh_every``.
+"""
+import abc
+import asyncio
+import logging
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import read_session
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshableIndex(abc.ABC):
+    name = "index"
+
+    def __init__(self) -> None:
+        self._is_built = False
+        self._is_stale = False
+        self._lock = asyncio.Lock()
+        self._build_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_built(self) -> bool:
+        return self._is_built
+
+    def mark_stale(self) -> None:
+        self._is_stale = True
+
+    @abc.abstractmethod
+    async def rebuild(self, db: AsyncSession) -> None:
+        """
+        Load the whole index. Clear ``_is_stale`` before reading, so changes
+        committed while it loads stay marked for the next refresh.
+        """
+
+    async def refresh(self, db: AsyncSession) -> None:
+        await self.rebuild(db)
+
+    async def ensure_fresh(self) -> None:
+        """Build on first use; afterwards apply pending changes in the background."""
+        if not self._is_built:
+            async with self._build_lock:
+                if not self._is_built:
+                    async with read_session() as db:
+                        await self.rebuild(db)
+            return
+        if self._is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def refresh_every(self, seconds: float) -> None:
+        """Mark the index stale every ``seconds`` and refresh it, until cancelled."""
+        while True:
+            await asyncio.sleep(seconds)
+            self.mark_stale()
+            await self.ensure_fresh()
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            async with read_session() as db:
+                await self.refresh(db)
+        except Exception:
+            logger.exception("Refreshing the %s failed", self.name)
@@ -0,0 +1,109 @@
+"""
+Perfume name search with accent/case folding and relevance ranking.
+
+On PostgreSQL matching and ranking run in SQL against the trigram indexes
+created by the ``0001_perfume_search_indexes`` migration. Other dialects
+(SQLite test runs) rank the filtered candidate rows in process using the
+same folding rules and an approximation of ``pg_trgm.word_similarity``.
+"""
+import unicodedata
+from typing import Iterable, List, Sequence, Set, Tuple
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+# Matches the pg_trgm default for ``pg_trgm.word_similarity_threshold``
+WORD_SIMILARITY_THRESHOLD = 0.6
+BRAND_WEIGHT = 0.6
+PREFIX_BOOST = 1.0
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents so 'Hermès' and 'hermes' compare equal."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def is_postgres(dialect_name: str) -> bool:
+    return dialect_name == "postgresql"
+
+
+# --- PostgreSQL ---------------------------------------------------------------
+
+def folded_column(column) -> ColumnElement:
+    # Must stay identical to the indexed expression in the search migration
+    return func.lower(func.f_unaccent(column))
+
+
+def search_predicate(q: str, name_column, brand_column) -> ColumnElement:
+    folded = fold(q)
+    pattern = f"%{escape_like(folded)}%"
+    name, brand = folded_column(name_column), folded_column(brand_column)
+    return or_(
+        name.like(pattern, escape="\\"),
+        brand.like(pattern, escape="\\"),
+        name.op("%>")(folded),
+        brand.op("%>")(folded),
+    )
+
+
+def rank_expression(q: str, name_column, brand_column) -> ColumnElement:
+    folded = fold(q)
+    name, brand = folded_column(name_column), folded_column(brand_column)
+    return (
+        func.word_similarity(folded, name)
+        + BRAND_WEIGHT * func.word_similarity(folded, brand)
+        + case((name.like(f"{escape_like(folded)}%", escape="\\"), PREFIX_BOOST), else_=0.0)
+    )
+
+
+# --- In-process fallback ------------------------------------------------------
+
+def trigrams(text: str) -> Set[str]:
+    """Trigram set built the way pg_trgm does: per word, padded with blanks."""
+    grams: Set[str] = set()
+    for word in "".join(c if c.isalnum() else " " for c in text).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_similarity(query: str, text: str) -> float:
+    query_grams = trigrams(query)
+    if not query_grams:
+        return 0.0
+    return len(query_grams & trigrams(text)) / len(query_grams)
+
+
+def rank_candidate(folded_query: str, name: str, brand: str) -> float:
+    """Score one row; 0.0 means the row does not match at all."""
+    folded_name, folded_brand = fold(name), fold(brand or "")
+    name_similarity = word_similarity(folded_query, folded_name)
+    brand_similarity = word_similarity(folded_query, folded_brand)
+    is_match = (
+        folded_query in folded_name
+        or folded_query in folded_brand
+        or max(name_similarity, brand_similarity) >= WORD_SIMILARITY_THRESHOLD
+    )
+    if not is_match:
+        return 0.0
+    score = name_similarity + BRAND_WEIGHT * brand_similarity
+    if folded_name.startswith(folded_query):
+        score += PREFIX_BOOST
+    return score or 1e-6
+
+
+def rank_rows(q: str, rows: Iterable[Sequence]) -> List[Tuple[float, Sequence]]:
+    """
+    Rank ``(id, name, brand_name, ...)`` rows for ``q``, best match first.
+    Ties are broken by id so paging over the result is stable.
+    """
+    folded = fold(q)
+    ranked = [(rank_candidate(folded, row[1], row[2]), row) for row in rows]
+    ranked = [item for item in ranked if item[0] > 0]
+    ranked.sort(key=lambda item: (-item[0], item[1][0]))
+    return ranked
@@ -0,0 +1,51 @@
+"""
+Lookup latency of the in-memory autocomplete index.
+
+Builds the index from the configured database, replays prefixes (1-8
+characters) of perfume, brand, note and perfumer names and fails with exit
+code 1 when p50/p99 of a lookup miss the sub-millisecond targets. HTTP
+overhead is left out on purpose; ``benchmarks.search`` covers the endpoint
+path.
+
+    python -m benchmarks.autocomplete --iterations 20000 --p99-ms 1
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+
+from app.services.autocomplete import KINDS, autocomplete_index
+from benchmarks.common import meets_targets, print_summary, summarize
+
+
+async def run(args: argparse.Namespace) -> bool:
+    await autocomplete_index.ensure_fresh()
+    names = [name for kind in KINDS for name in autocomplete_index._tables[kind].names]
+    if not names:
+        raise SystemExit("Nothing to autocomplete; load a catalog first.")
+
+    rng = random.Random(args.seed)
+    queries = []
+    for _ in range(args.iterations):
+        name = rng.choice(names)
+        queries.append(name[: rng.randint(1, 8)])
+
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        autocomplete_index.complete(q, KINDS, args.limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    summary = summarize("autocomplete index q=<prefix>", samples)
+    print_summary(summary)
+    return meets_targets(summary, args.p50_ms, args.p99_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--p50-ms", type=float, default=0.2)
+    parser.add_argument("--p99-ms", type=float, default=1.0)
+    sys.exit(0 if asyncio.run(run(parser.parse_args())) else 1)
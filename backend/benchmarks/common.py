@@ -0,0 +1,62 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks drive the FastAPI app in process through httpx's ASGI transport,
+against whatever database ``app.core.config.settings`` points at.
+"""
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+from app.main import app
+
+
+def app_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def measure(call: Callable[[int], Awaitable[None]], iterations: int, warmup: int = 10) -> List[float]:
+    """Run ``call(i)`` sequentially and return per-call latencies in milliseconds."""
+    for i in range(warmup):
+        await call(i)
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await call(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(name: str, samples: List[float]) -> Dict[str, float]:
+    total_ms = sum(samples)
+    return {
+        "name": name,
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(total_ms / len(samples), 3) if samples else 0.0,
+        "rps": round(len(samples) / (total_ms / 1000), 1) if total_ms else 0.0,
+    }
+
+
+def print_summary(summary: Dict[str, float]) -> None:
+    print(
+        f"{summary['name']:<40} n={summary['count']:<6} p50={summary['p50_ms']:>8.2f}ms "
+        f"p99={summary['p99_ms']:>8.2f}ms rps={summary['rps']:>8.1f}"
+    )
+
+
+def meets_targets(summary: Dict[str, float], p50_ms: float, p99_ms: float) -> bool:
+    is_ok = summary["p50_ms"] <= p50_ms and summary["p99_ms"] <= p99_ms
+    if not is_ok:
+        print(f"FAIL {summary['name']}: targets p50<={p50_ms}ms p99<={p99_ms}ms")
+    return is_ok
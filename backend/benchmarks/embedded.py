@@ -0,0 +1,31 @@
+"""
+Throwaway local PostgreSQL for benchmark runs without a database server.
+
+Uses the optional ``pgserver`` package (``pip install pgserver``), which
+ships PostgreSQL binaries and runs a private cluster in a directory. The
+cluster has no ``pg_trgm`` / ``unaccent`` contrib modules, so the schema
+comes from ``Base.metadata.create_all`` rather than the Alembic migrations
+and ``q=`` text search is unavailable (``benchmarks.run`` skips those cases).
+
+Import this before anything from ``app``: ``use_embedded`` points
+``DATABASE_URL`` at the cluster, and settings are read at import time.
+"""
+import os
+
+DATABASE = "bench"
+
+
+def use_embedded(directory: str) -> str:
+    """Start (or reuse) the cluster in ``directory`` and export its URL as ``DATABASE_URL``."""
+    try:
+        import pgserver
+    except ImportError:
+        raise SystemExit("--embedded needs the optional 'pgserver' package: pip install pgserver")
+
+    server = pgserver.get_server(directory, cleanup_mode=None)
+    exists = server.psql(f"SELECT 1 FROM pg_database WHERE datname = '{DATABASE}';")
+    if "1 row" not in exists:
+        server.psql(f"CREATE DATABASE {DATABASE};")
+    url = server.get_uri(DATABASE).replace("postgresql://", "postgresql+asyncpg://", 1)
+    os.environ["DATABASE_URL"] = url
+    return url
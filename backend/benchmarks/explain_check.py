@@ -0,0 +1,174 @@
+"""
+EXPLAIN check: no endpoint query may sequentially scan a large table.
+
+Drives every case of the benchmark suite (``benchmarks.run``) once through
+the app, records each distinct SELECT it sends, and runs ``EXPLAIN`` on it
+with the same parameters. Any full scan of a table in ``LARGE_TABLES`` is
+a failure (exit code 1), reported with the endpoints that issued it.
+
+By default the plans are taken with ``enable_seqscan = off``. The planner
+then avoids a sequential scan whenever some index can serve the query, so
+one that remains means a missing index. That holds on a 1k catalog as
+well as at 1M. Without a usable index it walks the primary key end to end
+instead, so an index scan with no ``Index Cond`` counts as a full scan too.
+A walk a ``LIMIT`` is expected to stop early is a page read in id order:
+it passes under ``EARLY_STOP`` of the table and is only a warning above
+it (a filter combination the planner finds cheaper to page through than
+to intersect). ``--natural`` keeps the planner defaults instead, for
+checking the plans a production-sized catalog actually gets.
+
+The in-memory indexes (notes, similarity, autocomplete, leaderboards) are
+built before recording: their full-table rebuild reads are intentional and
+not endpoint queries.
+
+    python -m benchmarks.explain_check
+    python -m benchmarks.explain_check --embedded /tmp/bench-pg --only 'perfumes/search'
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+LARGE_TABLES = {
+    "perfumes", "perfume_notes", "perfume_main_accords", "perfume_tags", "perfume_documents", "reviews",
+    "perfume_rating_stats",
+}
+
+
+FULL_INDEX_SCANS = {"Index Scan", "Index Only Scan"}
+# Nodes that pull rows from their first child one at a time, so a LIMIT above them stops that child early
+STREAMING_NODES = {"Limit", "Nested Loop", "Hash Join", "Merge Join", "Memoize", "Result", "Subquery Scan"}
+EARLY_STOP = 0.1
+
+
+def full_scans(plan: Dict[str, Any], fraction: float = 1.0) -> Iterator[Tuple[Dict[str, Any], float]]:
+    """
+    ``(node, fraction)`` for every node of an ``EXPLAIN (FORMAT JSON)`` plan
+    tree that scans a whole table. ``fraction`` is the share of the node's
+    output the plan above is expected to consume, taken from the cost ratio
+    of the nearest ``Limit``; a ``Seq Scan`` is always reported as 1.
+    """
+    node_type = plan.get("Node Type")
+    if node_type == "Seq Scan":
+        yield plan, 1.0
+    elif node_type in FULL_INDEX_SCANS and "Index Cond" not in plan and fraction > EARLY_STOP:
+        yield plan, fraction
+    children = plan.get("Plans", ())
+    for position, child in enumerate(children):
+        if position == 0 and node_type in STREAMING_NODES:
+            child_fraction = fraction
+            if node_type == "Limit" and child.get("Total Cost"):
+                child_fraction = min(fraction, plan["Total Cost"] / child["Total Cost"])
+            yield from full_scans(child, child_fraction)
+        else:
+            yield from full_scans(child)
+
+
+async def record_statements(args: argparse.Namespace) -> Dict[str, Tuple[Tuple[Any, ...], Set[str]]]:
+    """Run the benchmark cases once each; ``{statement: (parameters, case names)}`` for every SELECT."""
+    from sqlalchemy import event
+
+    from app.db.session import engine, read_engine
+    from app.services.autocomplete import autocomplete_index
+    from app.services.leaderboards import leaderboard_index
+    from app.services.note_index import note_index
+    from app.services.recommendations import similarity_index
+    from benchmarks.common import app_client
+    from benchmarks.run import build_cases, run_case, sample_catalog
+
+    for index in (note_index, similarity_index, autocomplete_index, leaderboard_index):
+        await index.ensure_fresh()
+
+    sample = await sample_catalog(args.seed)
+    cases = build_cases(sample, args.max_filters, batch_size=4)
+    if not sample["has_text_search"]:
+        print("pg_trgm/unaccent not installed: skipping q= search cases")
+        cases = [case for case in cases if not case.needs_text_search]
+    if args.only:
+        cases = [case for case in cases if re.search(args.only, case.name)]
+
+    statements: Dict[str, Tuple[Tuple[Any, ...], Set[str]]] = {}
+    current_case = ""
+
+    def record(conn, cursor, statement, parameters, context, executemany) -> None:
+        if executemany or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return
+        _, cases_seen = statements.setdefault(statement, (tuple(parameters or ()), set()))
+        cases_seen.add(current_case)
+
+    engines = {engine.sync_engine, read_engine.sync_engine}
+    for sync_engine in engines:
+        event.listen(sync_engine, "before_cursor_execute", record)
+    try:
+        async with app_client() as client:
+            for case in cases:
+                current_case = case.name
+                await run_case(client, case, sample, iterations=args.iterations, warmup=0)
+    finally:
+        for sync_engine in engines:
+            event.remove(sync_engine, "before_cursor_execute", record)
+    return statements
+
+
+async def explain(statement: str, parameters: Tuple[Any, ...], natural: bool) -> Dict[str, Any]:
+    from app.db.session import read_engine
+
+    async with read_engine.connect() as conn:
+        driver = (await conn.get_raw_connection()).driver_connection
+        async with driver.transaction():
+            if not natural:
+                await driver.execute("SET LOCAL enable_seqscan = off")
+            plan = await driver.fetchval(f"EXPLAIN (FORMAT JSON) {statement}", *parameters)
+    # SQLAlchemy registers a JSON codec on its asyncpg connections; plain ones return text
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    return plan[0]["Plan"]
+
+
+async def run(args: argparse.Namespace) -> bool:
+    from app.db.session import read_engine
+
+    if read_engine.dialect.name != "postgresql":
+        raise SystemExit("The EXPLAIN check needs PostgreSQL (use --embedded for a local one)")
+
+    statements = await record_statements(args)
+    failures: List[str] = []
+    warnings: List[str] = []
+    for statement, (parameters, cases) in statements.items():
+        plan = await explain(statement, parameters, args.natural)
+        for scan, fraction in full_scans(plan):
+            if scan.get("Relation Name") not in LARGE_TABLES:
+                continue
+            condition = scan.get("Filter", "no filter")
+            index = f" using {scan['Index Name']}" if "Index Name" in scan else ""
+            read = f", ~{fraction:.0%} read before the LIMIT" if fraction < 1 else ""
+            (warnings if fraction < 1 else failures).append(
+                f"{scan['Node Type']} on {scan['Relation Name']}{index} ({condition}{read})\n"
+                f"    endpoints: {', '.join(sorted(cases))}\n"
+                f"    {' '.join(statement.split())[:400]}"
+            )
+    for warning in warnings:
+        print(f"WARN {warning}")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(
+        f"{len(statements)} distinct queries explained, "
+        f"{len(failures)} full scans of large tables, {len(warnings)} long LIMIT walks"
+    )
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--natural", action="store_true", help="keep enable_seqscan on (use a large catalog)")
+    parser.add_argument("--iterations", type=int, default=2, help="calls per case, with varying parameters")
+    parser.add_argument("--max-filters", type=int, default=2, help="largest search filter combination")
+    parser.add_argument("--only", help="regex selecting case names")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--embedded", metavar="DIR", help="use a throwaway pgserver cluster in DIR")
+    args = parser.parse_args()
+    if args.embedded:
+        from benchmarks.embedded import use_embedded
+        use_embedded(args.embedded)
+    sys.exit(0 if asyncio.run(run(args)) else 1)
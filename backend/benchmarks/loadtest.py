@@ -0,0 +1,348 @@
+"""
+Closed-loop load test replaying browse sessions.
+
+Each virtual user runs sessions back to back, pausing for an exponentially
+distributed think time (mean ``--think-ms``) between page views:
+
+1. home: the latest, leaderboards, featured (batch) and brand sections,
+   fetched concurrently as a browser would
+2. browse: ``/perfumes/`` and up to ``--pages`` follow-up pages by cursor
+3. search: ``--searches`` filtered ``/perfumes/search/`` calls
+4. detail: up to ``--details`` perfumes from those results, each with its
+   ``/similar`` list
+5. note: a note page plus ``/perfumes/by-notes/`` for that note
+
+The users are closed-loop: a user only sends its next request after the
+previous one finished, so offered load rises with ``--concurrency`` until
+the server saturates. Every level in ``--concurrency`` (e.g. ``1,8,32,128``)
+runs for ``--duration`` seconds after ``--ramp`` seconds of warm-up. Each level
+reports throughput, latency percentiles overall and per page type, errors
+and DB pool checkout waits. The summary names the saturation point: the
+highest throughput, and the first level where adding users stopped adding
+throughput.
+
+By default the app from ``app/main.py`` runs in this process, sharing the
+event loop with the load generator, which is useful for comparing commits.
+To size workers and pool settings, point ``--url`` at a real deployment
+(e.g. ``uvicorn app.main:app --workers 4``). Pool waits are then read from
+its ``/metrics`` endpoint, summed over workers in multiprocess mode.
+
+    python -m benchmarks.loadtest --concurrency 1,8,32 --duration 30 --think-ms 500
+    python -m benchmarks.loadtest --url http://localhost:8000 --concurrency 16,64,256 --think-ms 0
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+@dataclass
+class Catalog:
+    """Filter values and ids the sessions draw from, read through the API itself."""
+    api: str
+    perfume_ids: List[int]
+    note_ids: List[int]
+    filters: Dict[str, List[str]]
+    text_queries: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Stage:
+    concurrency: int
+    started: float = 0.0
+    finished: float = 0.0
+    session_ends: List[float] = field(default_factory=list)
+    samples: List[Tuple[str, float]] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    pool: Dict[str, float] = field(default_factory=dict)
+
+
+async def load_catalog(client: httpx.AsyncClient, api: str, text_search: bool) -> Catalog:
+    async def names(path: str, **params) -> List[str]:
+        response = await client.get(f"{api}{path}", params={"limit": 100, **params})
+        response.raise_for_status()
+        return [item["name"] for item in response.json()]
+
+    perfumes = (await client.get(f"{api}/perfumes/", params={"limit": 200})).json()
+    notes = (await client.get(f"{api}/notes/", params={"limit": 200})).json()
+    if not perfumes:
+        raise SystemExit("No perfumes behind the API; load a catalog (python -m benchmarks.synthetic) first.")
+    filters = {
+        "brand": await names("/brands/"),
+        "gender": ["Male", "Female", "Unisex"],
+        "family": await names("/families/"),
+        "type": await names("/types/"),
+        "concentration": await names("/concentrations/"),
+        "tag": await names("/perfumes/tags/"),
+    }
+    return Catalog(
+        api=api,
+        perfume_ids=[perfume["id"] for perfume in perfumes],
+        note_ids=[note["id"] for note in notes],
+        filters={name: values for name, values in filters.items() if values},
+        text_queries=[perfume["name"].split(" ")[0].lower() for perfume in perfumes] if text_search else [],
+    )
+
+
+class User:
+    """One closed-loop virtual user."""
+
+    def __init__(self, client: httpx.AsyncClient, catalog: Catalog, stage: Stage, args: argparse.Namespace,
+                 seed: int) -> None:
+        self.client = client
+        self.catalog = catalog
+        self.stage = stage
+        self.args = args
+        self.rng = random.Random(seed)
+
+    async def get(self, page: str, path: str, **params) -> Optional[httpx.Response]:
+        return await self.request(page, "GET", path, params=params)
+
+    async def post(self, page: str, path: str, body: Any) -> Optional[httpx.Response]:
+        return await self.request(page, "POST", path, json=body)
+
+    async def request(self, page: str, method: str, path: str, **kwargs) -> Optional[httpx.Response]:
+        """Send one request and record its latency under ``page``; None on errors."""
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, f"{self.catalog.api}{path}", **kwargs)
+        except httpx.HTTPError as error:
+            self.stage.errors[type(error).__name__] += 1
+            return None
+        self.stage.samples.append((page, (time.perf_counter() - start) * 1000))
+        if response.status_code >= 400:
+            self.stage.errors[str(response.status_code)] += 1
+            return None
+        return response
+
+    async def think(self) -> None:
+        if self.args.think_ms > 0:
+            await asyncio.sleep(self.rng.expovariate(1000 / self.args.think_ms))
+
+    async def session(self) -> None:
+        rng, catalog = self.rng, self.catalog
+        featured = rng.sample(catalog.perfume_ids, min(12, len(catalog.perfume_ids)))
+        await asyncio.gather(
+            self.get("home", "/perfumes/", limit=12),
+            self.get("home", "/leaderboards/", limit=12),
+            self.post("home", "/perfumes/batch", {"ids": featured}),
+            self.get("home", "/brands/", limit=20),
+        )
+        await self.think()
+
+        response = await self.get("browse", "/perfumes/", limit=24)
+        for _ in range(rng.randint(0, self.args.pages)):
+            cursor = response.headers.get("x-next-cursor") if response is not None else None
+            if not cursor:
+                break
+            await self.think()
+            response = await self.get("browse", "/perfumes/", limit=24, cursor=cursor)
+        await self.think()
+
+        found: List[int] = []
+        for _ in range(self.args.searches):
+            params: Dict[str, Any] = {"limit": 24}
+            for name in rng.sample(list(catalog.filters), rng.randint(1, 2)):
+                params[name] = rng.choice(catalog.filters[name])
+            if catalog.text_queries and rng.random() < 0.5:
+                params["q"] = rng.choice(catalog.text_queries)
+            response = await self.get("search", "/perfumes/search/", **params)
+            if response is not None:
+                found.extend(item["id"] for item in response.json())
+            await self.think()
+
+        candidates = found or catalog.perfume_ids
+        for perfume_id in rng.sample(candidates, min(self.args.details, len(candidates))):
+            await self.get("detail", f"/perfumes/{perfume_id}")
+            await self.get("detail", f"/perfumes/{perfume_id}/similar")
+            await self.think()
+
+        if catalog.note_ids:
+            note_id = rng.choice(catalog.note_ids)
+            await self.get("note", f"/notes/{note_id}")
+            await self.get("note", "/perfumes/by-notes/", include=str(note_id), limit=24)
+            await self.think()
+
+    async def run(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            await self.session()
+            self.stage.session_ends.append(time.perf_counter())
+
+
+class PoolProbe:
+    """Cumulative pool checkouts and waits, in process or from a server's ``/metrics``."""
+
+    def __init__(self, client: httpx.AsyncClient, remote: bool) -> None:
+        self.client = client
+        self.remote = remote
+
+    async def snapshot(self) -> Dict[str, float]:
+        if not self.remote:
+            from app.db.session import pool_stats
+            totals = defaultdict(float)
+            for status in pool_stats().values():
+                for key in ("checkouts", "waited", "timeouts", "wait_ms_total"):
+                    totals[key] += (status or {}).get(key, 0)
+            return dict(totals)
+
+        from prometheus_client.parser import text_string_to_metric_families
+        response = await self.client.get("/metrics")
+        if response.status_code != 200:
+            return {}
+        totals = defaultdict(float)
+        for family in text_string_to_metric_families(response.text):
+            for sample in family.samples:
+                if sample.name == "db_pool_checkout_wait_seconds_total":
+                    totals["wait_ms_total"] += sample.value * 1000
+                elif sample.name == "db_pool_checkouts_total":
+                    outcome = sample.labels.get("outcome")
+                    totals["checkouts"] += sample.value
+                    if outcome in ("waited", "timeout"):
+                        totals["waited" if outcome == "waited" else "timeouts"] += sample.value
+        return dict(totals)
+
+
+async def run_stage(client: httpx.AsyncClient, catalog: Catalog, probe: PoolProbe, concurrency: int,
+                    args: argparse.Namespace) -> Stage:
+    stage = Stage(concurrency)
+    now = time.perf_counter()
+    measure_from, deadline = now + args.ramp, now + args.ramp + args.duration
+    users = [User(client, catalog, stage, args, seed=args.seed * 100_003 + index) for index in range(concurrency)]
+    tasks = [asyncio.create_task(user.run(deadline)) for user in users]
+
+    await asyncio.sleep(args.ramp)
+    stage.samples.clear()
+    stage.errors.clear()
+    before = await probe.snapshot()
+    stage.started = time.perf_counter()
+    await asyncio.sleep(max(0.0, deadline - stage.started))
+    stage.finished = time.perf_counter()
+    after = await probe.snapshot()
+    measured = len(stage.samples)
+
+    # Let sessions in flight finish so the next level starts from a quiet server
+    await asyncio.gather(*tasks)
+    del stage.samples[measured:]
+    stage.pool = {key: after.get(key, 0) - before.get(key, 0) for key in after}
+    return stage
+
+
+def summarize_stage(stage: Stage) -> Dict[str, Any]:
+    from benchmarks.common import percentile
+
+    elapsed = stage.finished - stage.started
+    latencies = [ms for _, ms in stage.samples]
+    by_page = defaultdict(list)
+    for page, ms in stage.samples:
+        by_page[page].append(ms)
+    checkouts = stage.pool.get("checkouts", 0)
+    return {
+        "concurrency": stage.concurrency,
+        "requests": len(latencies),
+        "sessions": sum(stage.started <= end <= stage.finished for end in stage.session_ends),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies, default=0.0), 2),
+        "errors": dict(stage.errors),
+        "pages": {
+            page: {"count": len(samples), "p50_ms": round(percentile(samples, 50), 2),
+                   "p99_ms": round(percentile(samples, 99), 2)}
+            for page, samples in sorted(by_page.items())
+        },
+        "pool": {
+            "checkouts": int(checkouts),
+            "waited_pct": round(stage.pool.get("waited", 0) / checkouts * 100, 1) if checkouts else 0.0,
+            "wait_ms_mean": round(stage.pool.get("wait_ms_total", 0) / checkouts, 3) if checkouts else 0.0,
+            "timeouts": int(stage.pool.get("timeouts", 0)),
+        },
+    }
+
+
+def print_stage(summary: Dict[str, Any]) -> None:
+    pool = summary["pool"]
+    errors = sum(summary["errors"].values())
+    print(
+        f"users={summary['concurrency']:<5} rps={summary['rps']:>8.1f} p50={summary['p50_ms']:>8.2f}ms "
+        f"p90={summary['p90_ms']:>8.2f}ms p99={summary['p99_ms']:>8.2f}ms errors={errors:<4} "
+        f"pool wait={pool['wait_ms_mean']:.2f}ms waited={pool['waited_pct']}% timeouts={pool['timeouts']}"
+    )
+    for page, stats in summary["pages"].items():
+        print(f"    {page:<8} n={stats['count']:<7} p50={stats['p50_ms']:>8.2f}ms p99={stats['p99_ms']:>8.2f}ms")
+
+
+def saturation(summaries: List[Dict[str, Any]], gain: float = 0.1) -> Dict[str, Any]:
+    """Peak throughput, and the first level whose throughput grew less than ``gain`` over the previous one."""
+    peak = max(summaries, key=lambda summary: summary["rps"])
+    knee = next(
+        (current for previous, current in zip(summaries, summaries[1:])
+         if current["rps"] < previous["rps"] * (1 + gain)),
+        None,
+    )
+    return {
+        "peak_rps": peak["rps"],
+        "peak_concurrency": peak["concurrency"],
+        "saturated_at_concurrency": knee["concurrency"] if knee else None,
+    }
+
+
+async def run(args: argparse.Namespace) -> bool:
+    # Imported late so --embedded can set DATABASE_URL first
+    from app.core.config import settings
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                   limits=httpx.Limits(max_connections=None, max_keepalive_connections=None))
+    else:
+        from benchmarks.common import app_client
+        client = app_client()
+        client.timeout = httpx.Timeout(args.timeout)
+
+    summaries = []
+    async with client:
+        catalog = await load_catalog(client, settings.API_V1_STR, args.text_search)
+        probe = PoolProbe(client, remote=bool(args.url))
+        for concurrency in args.concurrency:
+            summary = summarize_stage(await run_stage(client, catalog, probe, concurrency, args))
+            print_stage(summary)
+            summaries.append(summary)
+
+    result = saturation(summaries)
+    knee = result["saturated_at_concurrency"]
+    print(f"Peak {result['peak_rps']} rps at {result['peak_concurrency']} users; "
+          + (f"throughput stopped scaling at {knee} users" if knee else "not saturated at the levels tried"))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({"target": args.url or "in-process", "think_ms": args.think_ms, "stages": summaries,
+                       "saturation": result}, output_file, indent=2)
+    return not any(summary["errors"] for summary in summaries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="base URL of a running server (default: the app in process)")
+    parser.add_argument("--concurrency", type=lambda value: [int(level) for level in value.split(",")],
+                        default=[1, 4, 16, 64], help="comma-separated virtual user counts, one stage each")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds per stage")
+    parser.add_argument("--ramp", type=float, default=5.0, help="unmeasured warm-up seconds per stage")
+    parser.add_argument("--think-ms", type=float, default=300.0, help="mean think time between page views")
+    parser.add_argument("--pages", type=int, default=3, help="most follow-up list pages per session")
+    parser.add_argument("--searches", type=int, default=2)
+    parser.add_argument("--details", type=int, default=2)
+    parser.add_argument("--text-search", action="store_true", help="mix q= into searches (needs pg_trgm)")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write the stage summaries as JSON")
+    parser.add_argument("--embedded", metavar="DIR", help="use a throwaway pgserver cluster in DIR (in process)")
+    args = parser.parse_args()
+    if args.embedded:
+        from benchmarks.embedded import use_embedded
+        use_embedded(args.embedded)
+    sys.exit(0 if asyncio.run(run(args)) else 1)
@@ -0,0 +1,115 @@
+"""
+Compare the perfume detail loaders.
+
+``legacy`` is the previous ``get_perfume`` implementation (one ``selectinload``
+per relationship, then ``Perfume.model_validate``); ``document`` is
+``app.crud.perfume.get_perfume_document``. Reports latency and the number of
+SQL statements per call for each.
+
+    python -m benchmarks.perfume_detail --iterations 300
+"""
+import argparse
+import asyncio
+import random
+from typing import Any, Dict
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import selectinload
+
+from app.crud.perfume import get_perfume_document
+from app.db.session import async_session, engine
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.schemas.perfume import Perfume
+from benchmarks.common import measure, print_summary, summarize
+
+
+async def legacy_loader(db, perfume_id: int) -> Dict[str, Any]:
+    query = (
+        select(PerfumeModel)
+        .options(
+            selectinload(PerfumeModel.brand),
+            selectinload(PerfumeModel.type),
+            selectinload(PerfumeModel.family),
+            selectinload(PerfumeModel.concentration),
+            selectinload(PerfumeModel.country),
+            selectinload(PerfumeModel.perfumer),
+            selectinload(PerfumeModel.main_accords),
+            selectinload(PerfumeModel.perfume_notes).selectinload(PerfumeNoteModel.note),
+            selectinload(PerfumeModel.perfume_notes).selectinload(PerfumeNoteModel.note).selectinload(NoteModel.family),
+            selectinload(PerfumeModel.perfume_notes).selectinload(PerfumeNoteModel.note).selectinload(NoteModel.moods),
+            selectinload(PerfumeModel.tags)
+        )
+        .filter(PerfumeModel.id == perfume_id)
+    )
+    perfume = (await db.execute(query)).scalar_one()
+    return Perfume.model_validate({
+        "id": perfume.id,
+        "name": perfume.name,
+        "local_image_path": perfume.local_image_path,
+        "gender": perfume.gender,
+        "category": perfume.category,
+        "release_year": perfume.release_year,
+        "description": perfume.description,
+        "longevity": perfume.longevity,
+        "sillage": perfume.sillage,
+        "occasion": perfume.occasion,
+        "season": perfume.season,
+        "inspiration": perfume.inspiration,
+        "brand": perfume.brand.name if perfume.brand else None,
+        "concentration": perfume.concentration.name if perfume.concentration else None,
+        "type": perfume.type.name if perfume.type else None,
+        "family": perfume.family.name if perfume.family else None,
+        "country": perfume.country.name if perfume.country else None,
+        "perfumer": perfume.perfumer.name if perfume.perfumer else None,
+        "perfume_notes": [
+            {"note_type": note.note_type, "note": note.note.name, "image_filename": note.note.image_filename}
+            for note in perfume.perfume_notes
+        ],
+        "main_accords": [accord.name for accord in perfume.main_accords],
+        "tags": [tag.name for tag in perfume.tags],
+    }).model_dump()
+
+
+async def document_loader(db, perfume_id: int) -> Dict[str, Any]:
+    return Perfume.model_validate(await get_perfume_document(db, perfume_id)).model_dump()
+
+
+async def run(args: argparse.Namespace) -> None:
+    statements = 0
+
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    async with async_session() as db:
+        max_id = (await db.execute(select(func.max(PerfumeModel.id)))).scalar()
+        ids = (await db.execute(select(PerfumeModel.id).limit(5000))).scalars().all()
+    if not max_id:
+        raise SystemExit("No perfumes in the database; load a catalog first.")
+    rng = random.Random(args.seed)
+    sample = [rng.choice(ids) for _ in range(args.iterations)]
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        for name, loader in (("legacy", legacy_loader), ("document", document_loader)):
+            async with async_session() as db:
+                async def call(i: int) -> None:
+                    await loader(db, sample[i % len(sample)])
+                    db.expunge_all()
+
+                statements = 0
+                samples = await measure(call, args.iterations, warmup=0)
+                summary = summarize(f"perfume detail [{name}]", samples)
+                print_summary(summary)
+                print(f"{'':<40} statements/call={statements / args.iterations:.1f}")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,278 @@
+"""
+Endpoint benchmark suite covering every router in ``app/api/v1/api.py``.
+
+Each case is one endpoint with one parameter shape: the perfume list (plain,
+paged by cursor, sparse fields), search with every combination of up to
+``--max-filters`` filters (``q``, brand, gender, country, type, family,
+category, concentration, perfumer, tag), facets, by-notes, detail, similar,
+batch, tags, the note endpoints, every lookup router and autocomplete.
+Parameter values are sampled from the catalog with a fixed seed, so runs
+against the same data issue the same requests.
+
+Latencies are measured sequentially in process (see ``benchmarks.common``).
+Results go to ``benchmarks/results/<commit>-<perfumes>.json``. With
+``--baseline`` the run fails (exit code 1) when a case's p99 grows, or its
+throughput drops, by more than ``--tolerance`` compared with an earlier
+results file. Regressions under the ``--noise-ms`` floor are ignored.
+
+    python -m benchmarks.synthetic --scale 100k --reset
+    python -m benchmarks.run --iterations 100
+    python -m benchmarks.run --baseline benchmarks/results/<commit>-100000.json
+    python -m benchmarks.run --embedded /tmp/bench-pg --only 'perfumes/search'
+
+``/perfumes/export`` (a full catalog stream), ``/images`` (needs files under
+``STATIC_DIR``) and ``/diagnostics`` are not benchmarked.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from itertools import combinations
+from typing import Any, Callable, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+SEARCH_FILTERS = ("q", "brand", "gender", "country", "type", "family", "category", "concentration", "perfumer", "tag")
+
+
+@dataclass
+class Case:
+    name: str
+    path: str
+    params: Callable[[int], Dict[str, Any]] = lambda i: {}
+    method: str = "GET"
+    body: Optional[Callable[[int], Any]] = None
+    needs_text_search: bool = False
+
+
+async def sample_catalog(seed: int, size: int = 20) -> Dict[str, Any]:
+    """The perfume count plus filter values, ids and names drawn from the catalog, ``size`` of each."""
+    from sqlalchemy import func, select, text
+
+    from app.db.session import async_session
+    from app.models.brand import Brand as BrandModel
+    from app.models.concentration import Concentration as ConcentrationModel
+    from app.models.country import Country as CountryModel
+    from app.models.family import Family as FamilyModel
+    from app.models.note import Note as NoteModel
+    from app.models.perfume import Perfume as PerfumeModel
+    from app.models.perfume import Tag as TagModel
+    from app.models.perfumer import Perfumer as PerfumerModel
+    from app.models.type import Type as TypeModel
+
+    rng = random.Random(seed)
+    lookups = {
+        "brand": BrandModel, "country": CountryModel, "type": TypeModel, "family": FamilyModel,
+        "concentration": ConcentrationModel, "perfumer": PerfumerModel, "tag": TagModel,
+    }
+    sample: Dict[str, Any] = {}
+    async with async_session() as db:
+        count = (await db.execute(select(func.count()).select_from(PerfumeModel))).scalar()
+        if not count:
+            raise SystemExit("No perfumes in the database; run python -m benchmarks.synthetic first.")
+        sample["perfumes"] = count
+        max_id = (await db.execute(select(func.max(PerfumeModel.id)))).scalar()
+        ids = (await db.execute(
+            select(PerfumeModel.id).where(PerfumeModel.id.in_([rng.randint(1, max_id) for _ in range(size * 5)]))
+        )).scalars().all()
+        sample["perfume_id"] = [rng.choice(ids) for _ in range(size)]
+        names = (await db.execute(select(PerfumeModel.name).where(PerfumeModel.id.in_(ids)))).scalars().all()
+        sample["q"] = [rng.choice(names).split(" ")[0].lower() for _ in range(size)]
+        sample["prefix"] = [name[:rng.randint(2, 4)] for name in rng.sample(names, min(size, len(names)))]
+        for filter, model in lookups.items():
+            values = (await db.execute(select(model.name).order_by(model.id).limit(size))).scalars().all()
+            sample[filter] = values or [""]
+        categories = (await db.execute(
+            select(PerfumeModel.category).where(PerfumeModel.category.is_not(None)).distinct().limit(size)
+        )).scalars().all()
+        sample["category"] = categories or [""]
+        sample["gender"] = ["Male", "Female", "Unisex"]
+        note_ids = (await db.execute(select(NoteModel.id).order_by(NoteModel.id).limit(200))).scalars().all()
+        sample["note_id"] = [rng.choice(note_ids) for _ in range(size)]
+        # Without them (e.g. --embedded) q= search on PostgreSQL cannot run
+        sample["has_text_search"] = db.get_bind().dialect.name != "postgresql" or bool((await db.execute(text(
+            "SELECT count(*) = 2 FROM pg_extension WHERE extname IN ('pg_trgm', 'unaccent')"
+        ))).scalar())
+    return sample
+
+
+def build_cases(sample: Dict[str, Any], max_filters: int, batch_size: int) -> List[Case]:
+    from app.core.config import settings
+
+    api = settings.API_V1_STR
+    perfume_ids = sample["perfume_id"]
+    note_ids = sample["note_id"]
+    batch = lambda ids: lambda i: {"ids": [ids[(i + offset) % len(ids)] for offset in range(batch_size)]}
+    cases = [
+        Case("perfumes/ list", f"{api}/perfumes/", lambda i: {"limit": 24}),
+        Case("perfumes/ list skip=2000", f"{api}/perfumes/", lambda i: {"limit": 24, "skip": 2000}),
+        Case("perfumes/ list fields=name,brand,season", f"{api}/perfumes/",
+             lambda i: {"limit": 24, "fields": "name,brand,season"}),
+        Case("perfumes/ list fields=+notes,accords", f"{api}/perfumes/",
+             lambda i: {"limit": 24, "fields": "name,perfume_notes,main_accords"}),
+        Case("perfumes/tags", f"{api}/perfumes/tags/"),
+        Case("perfumes/{id}", f"{api}/perfumes/{{perfume_id}}"),
+        Case("perfumes/{id} fields=name,brand", f"{api}/perfumes/{{perfume_id}}",
+             lambda i: {"fields": "name,brand"}),
+        Case("perfumes/{id}/similar", f"{api}/perfumes/{{perfume_id}}/similar"),
+        Case("perfumes/{id}/ratings", f"{api}/perfumes/{{perfume_id}}/ratings"),
+        Case("perfumes/{id}/reviews", f"{api}/perfumes/{{perfume_id}}/reviews"),
+        Case(f"perfumes/batch ids={batch_size}", f"{api}/perfumes/batch", method="POST", body=batch(perfume_ids)),
+        Case("perfumes/by-notes include=1", f"{api}/perfumes/by-notes/",
+             lambda i: {"include": [f"base:{note_ids[i % len(note_ids)]}"], "limit": 24}),
+        Case("perfumes/by-notes include=2 exclude=1", f"{api}/perfumes/by-notes/",
+             lambda i: {"include": [str(note_ids[i % len(note_ids)]), str(note_ids[(i + 1) % len(note_ids)])],
+                        "exclude": [str(note_ids[(i + 2) % len(note_ids)])], "limit": 24}),
+        Case("notes/ list", f"{api}/notes/", lambda i: {"limit": 50}),
+        Case("notes/search", f"{api}/notes/search/", lambda i: {"q": "an", "limit": 20}),
+        Case("notes/families", f"{api}/notes/families/"),
+        Case("notes/moods", f"{api}/notes/moods/"),
+        Case("notes/{id}", f"{api}/notes/{{note_id}}"),
+        Case(f"notes/batch ids={batch_size}", f"{api}/notes/batch", method="POST", body=batch(note_ids)),
+        Case("leaderboards", f"{api}/leaderboards/", lambda i: {"limit": 12}),
+        Case("leaderboards/trending", f"{api}/leaderboards/trending", lambda i: {"limit": 24}),
+        Case("autocomplete", f"{api}/autocomplete/", lambda i: {"q": sample["prefix"][i % len(sample["prefix"])]}),
+    ]
+    for router in ("brands", "types", "countries", "families", "concentrations", "perfumers", "main-accords"):
+        cases.append(Case(f"{router}/ list", f"{api}/{router}/"))
+
+    for size in range(0, max_filters + 1):
+        for filters in combinations(SEARCH_FILTERS, size):
+            def params(i: int, filters=filters) -> Dict[str, Any]:
+                values = {filter: sample[filter][(i + offset) % len(sample[filter])]
+                          for offset, filter in enumerate(filters)}
+                return {**values, "limit": 24}
+            label = ",".join(filters) or "none"
+            cases.append(Case(f"perfumes/search [{label}]", f"{api}/perfumes/search/", params,
+                              needs_text_search="q" in filters))
+    for sort in ("rating", "popularity"):
+        cases.append(Case(f"perfumes/search sort={sort}", f"{api}/perfumes/search/",
+                          lambda i, sort=sort: {"sort": sort, "limit": 24}))
+    cases.append(Case("perfumes/search [gender] sort=rating", f"{api}/perfumes/search/",
+                      lambda i: {"sort": "rating", "gender": "Female", "limit": 24}))
+    cases.append(Case("perfumes/search [brand] facets", f"{api}/perfumes/search/",
+                      lambda i: {"brand": sample["brand"][i % len(sample["brand"])], "facets": "true", "limit": 24}))
+    return cases
+
+
+async def run_case(client, case: Case, sample: Dict[str, Any], iterations: int, warmup: int) -> List[float]:
+    from benchmarks.common import measure
+
+    async def call(i: int) -> None:
+        path = case.path.format(
+            perfume_id=sample["perfume_id"][i % len(sample["perfume_id"])],
+            note_id=sample["note_id"][i % len(sample["note_id"])],
+        )
+        if case.method == "POST":
+            response = await client.post(path, json=case.body(i))
+        else:
+            response = await client.get(path, params=case.params(i))
+        if response.status_code >= 400 and response.status_code != 404:
+            raise RuntimeError(f"{case.name}: {path} returned {response.status_code}: {response.text[:200]}")
+
+    return await measure(call, iterations, warmup)
+
+
+def current_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float, noise_ms: float) -> bool:
+    """Print per-case changes against ``baseline_path``; False when any case regressed."""
+    with open(baseline_path) as baseline_file:
+        baseline = {summary["name"]: summary for summary in json.load(baseline_file)["results"]}
+    is_ok = True
+    for summary in results:
+        before = baseline.get(summary["name"])
+        if before is None:
+            continue
+        p99_change = summary["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        rps_change = summary["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        slower = p99_change > tolerance and summary["p99_ms"] - before["p99_ms"] > noise_ms
+        fewer = rps_change < -tolerance and summary["mean_ms"] - before["mean_ms"] > noise_ms
+        if slower or fewer:
+            is_ok = False
+        print(f"{'REGRESSION' if slower or fewer else 'ok':<10} {summary['name']:<50} "
+              f"p99 {before['p99_ms']:>8.2f} -> {summary['p99_ms']:>8.2f}ms ({p99_change:+.0%})  "
+              f"rps {before['rps']:>8.1f} -> {summary['rps']:>8.1f} ({rps_change:+.0%})")
+    return is_ok
+
+
+async def run(args: argparse.Namespace) -> bool:
+    # Imported late so --embedded can set DATABASE_URL first
+    from app.core.config import settings
+    from benchmarks.common import app_client, print_summary, summarize
+
+    sample = await sample_catalog(args.seed)
+    cases = build_cases(sample, args.max_filters, args.batch_size)
+    if not sample["has_text_search"]:
+        print("pg_trgm/unaccent not installed: skipping q= search cases")
+        cases = [case for case in cases if not case.needs_text_search]
+    if args.only:
+        cases = [case for case in cases if re.search(args.only, case.name)]
+
+    started = time.perf_counter()
+    results = []
+    async with app_client() as client:
+        for case in cases:
+            summary = summarize(case.name, await run_case(client, case, sample, args.iterations, args.warmup))
+            print_summary(summary)
+            results.append(summary)
+
+    commit = current_commit()
+    report = {
+        "commit": commit,
+        "perfumes": sample["perfumes"],
+        "iterations": args.iterations,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "duration_s": round(time.perf_counter() - started, 1),
+        "python": platform.python_version(),
+        "settings": {
+            name: getattr(settings, name)
+            for name in ("FAST_JSON_RESPONSES", "HTTP_CACHE_ENABLED", "COMPRESSION_ENABLED", "DB_POOL_SIZE")
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-{sample['perfumes']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"{len(results)} cases in {report['duration_s']}s, results written to {output}")
+
+    if args.baseline:
+        return compare(results, args.baseline, args.tolerance, args.noise_ms)
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--max-filters", type=int, default=2, help="largest search filter combination")
+    parser.add_argument("--batch-size", type=int, default=12, help="ids per batch request")
+    parser.add_argument("--only", help="regex selecting case names")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="results file (default benchmarks/results/<commit>-<perfumes>.json)")
+    parser.add_argument("--baseline", help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative p99/rps change")
+    parser.add_argument("--noise-ms", type=float, default=1.0, help="ignore regressions smaller than this")
+    parser.add_argument("--embedded", metavar="DIR", help="use a throwaway pgserver cluster in DIR")
+    args = parser.parse_args()
+    if args.embedded:
+        from benchmarks.embedded import use_embedded
+        use_embedded(args.embedded)
+    sys.exit(0 if asyncio.run(run(args)) else 1)
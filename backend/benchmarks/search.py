@@ -0,0 +1,76 @@
+"""
+Latency benchmark for ``GET /perfumes/search/``.
+
+Builds a query mix from the perfume and brand names in the database
+(prefixes, accent-stripped and lower-cased variants, a one-letter typo) and
+fails with exit code 1 when p50/p99 miss the targets.
+
+    python -m benchmarks.search --iterations 500 --p50-ms 25 --p99-ms 100
+"""
+import argparse
+import asyncio
+import random
+import sys
+from typing import List
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.brand import Brand as BrandModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.services.search import fold
+from benchmarks.common import app_client, measure, meets_targets, print_summary, summarize
+
+
+async def build_queries(count: int, seed: int) -> List[str]:
+    async with async_session() as db:
+        result = await db.execute(
+            select(PerfumeModel.name, BrandModel.name).join(BrandModel).limit(5000)
+        )
+        rows = result.all()
+    if not rows:
+        raise SystemExit("No perfumes in the database; load a catalog first.")
+
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        name, brand = rng.choice(rows)
+        source = rng.choice([name, name, brand])
+        variant = rng.randrange(4)
+        if variant == 0:
+            queries.append(source[: rng.randint(3, 8)])
+        elif variant == 1:
+            queries.append(fold(source))
+        elif variant == 2 and len(source) > 4:
+            i = rng.randrange(1, len(source) - 1)
+            queries.append(source[:i] + source[i + 1:])
+        else:
+            queries.append(source.lower())
+    return queries
+
+
+async def run(args: argparse.Namespace) -> bool:
+    queries = await build_queries(args.iterations, args.seed)
+    async with app_client() as client:
+        async def call(i: int) -> None:
+            response = await client.get(
+                f"{settings.API_V1_STR}/perfumes/search/",
+                params={"q": queries[i % len(queries)], "limit": args.limit},
+            )
+            response.raise_for_status()
+
+        samples = await measure(call, args.iterations)
+    summary = summarize("perfumes/search q=<mixed>", samples)
+    print_summary(summary)
+    return meets_targets(summary, args.p50_ms, args.p99_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=42)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--p50-ms", type=float, default=25.0)
+    parser.add_argument("--p99-ms", type=float, default=100.0)
+    sys.exit(0 if asyncio.run(run(parser.parse_args())) else 1)
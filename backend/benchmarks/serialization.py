@@ -0,0 +1,54 @@
+"""
+Throughput of the list endpoints with and without ``FAST_JSON_RESPONSES``.
+
+Each endpoint is driven sequentially in process, first through FastAPI's
+``response_model`` validation and then through the orjson fast path. The
+script prints requests per second for both and the gain. Both modes run
+the same queries, so the difference is validation and encoding. Large
+pages (``--limit``) make it stand out.
+
+    python -m benchmarks.serialization --iterations 300 --limit 500
+"""
+import argparse
+import asyncio
+from typing import List, Tuple
+
+from app.core.config import settings
+from benchmarks.common import app_client, measure, print_summary, summarize
+
+
+def endpoints(limit: int) -> List[Tuple[str, str, dict]]:
+    return [
+        ("perfumes", "/perfumes/", {"limit": limit}),
+        ("perfumes/search q", "/perfumes/search/", {"q": "a", "limit": limit}),
+        ("perfumes/search facets", "/perfumes/search/", {"gender": "Unisex", "limit": limit, "facets": "true"}),
+        ("notes", "/notes/", {"limit": limit}),
+        ("brands", "/brands/", {"limit": limit}),
+        ("autocomplete", "/autocomplete/", {"q": "a", "limit": 25}),
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with app_client() as client:
+        for name, path, params in endpoints(args.limit):
+            results = {}
+            for fast in (False, True):
+                settings.FAST_JSON_RESPONSES = fast
+
+                async def call(i: int) -> None:
+                    response = await client.get(f"{settings.API_V1_STR}{path}", params=params)
+                    response.raise_for_status()
+
+                samples = await measure(call, args.iterations)
+                label = f"{name} ({'orjson' if fast else 'validated'})"
+                results[fast] = summarize(label, samples)
+                print_summary(results[fast])
+            gain = results[True]["rps"] / results[False]["rps"] - 1 if results[False]["rps"] else 0.0
+            print(f"{'':<40} gain {gain:+.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,337 @@
+"""
+Synthetic catalog generator for the benchmark suite.
+
+Fills the lookup tables, notes, ``perfumes``, ``perfume_notes``,
+``perfume_main_accords``, ``perfume_tags`` and ``reviews`` with a
+deterministic catalog of 1k, 100k or 1M perfumes. Popularity is skewed the
+way real catalogs are: a few brands, notes and accords cover most perfumes,
+half the perfumes have no reviews while a few have dozens, and names carry
+accents so search folding is exercised. ``perfume_rating_stats`` is then
+computed from the reviews. Rows are generated in NumPy chunks and
+written with ``COPY``, so the 1M catalog (about 12M note rows) loads in
+minutes.
+
+Tables are created with ``Base.metadata.create_all`` when missing; run the
+Alembic migrations first for the search indexes and document triggers. The
+target must be empty unless ``--reset`` is given, which truncates every
+catalog table.
+
+    python -m benchmarks.synthetic --scale 100k --reset
+    python -m benchmarks.synthetic --scale 1k --embedded /tmp/bench-pg
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import product
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+CHUNK_SIZE = 50_000
+
+BRAND_STEMS = (
+    "Maison", "Atelier", "Parfums", "Casa", "House of", "Studio", "Les", "Officine", "Jardin", "Nouvelle",
+)
+BRAND_ROOTS = (
+    "Hermès", "Lumière", "Solène", "Aurèle", "Verano", "Orsay", "Kōri", "Belmont", "Cyrène", "Dalmar",
+    "Elwood", "Fénix", "Galant", "Hallström", "Isère", "Jovan", "Kalmar", "Lévis", "Mireaux", "Noémi",
+    "Oberon", "Péral", "Quillon", "Rivaz", "Séville", "Tamsin", "Ulmo", "Varenne", "Wrenfield", "Ysolde",
+)
+NAME_FIRST = (
+    "Noir", "Ambre", "Rose", "Oud", "Vétiver", "Santal", "Iris", "Cuir", "Musc", "Fleur", "Bois", "Néroli",
+    "Encens", "Tabac", "Vanille", "Jasmin", "Figue", "Thé", "Ciel", "Lune", "Soleil", "Nuit", "Velours", "Épice",
+)
+NAME_SECOND = (
+    "Absolu", "Intense", "Élixir", "Sauvage", "Royal", "Secret", "Mystère", "Éclat", "Blanc", "Doré",
+    "Fumé", "Poudré", "Glacé", "Boisé", "Sacré", "Nomade", "Céleste", "Profond", "Léger", "Infini",
+)
+FLANKERS = ("", "", "", "", " Eau Fraîche", " Extrême", " Privé", " Nuit", " Légère", " No. 5")
+NOTE_MATERIALS = (
+    "Bergamot", "Lemon", "Mandarin", "Grapefruit", "Neroli", "Orange Blossom", "Lavender", "Rose", "Jasmine",
+    "Tuberose", "Iris", "Violet", "Ylang-Ylang", "Peony", "Magnolia", "Lily", "Geranium", "Pink Pepper",
+    "Black Pepper", "Cardamom", "Cinnamon", "Clove", "Saffron", "Nutmeg", "Ginger", "Vanilla", "Tonka Bean",
+    "Benzoin", "Labdanum", "Myrrh", "Frankincense", "Oud", "Sandalwood", "Cedarwood", "Vetiver", "Patchouli",
+    "Oakmoss", "Ambergris", "Musk", "Leather", "Tobacco", "Coffee", "Cacao", "Honey", "Almond", "Coconut",
+    "Fig", "Apple", "Pear", "Blackcurrant", "Raspberry", "Peach", "Plum", "Mint", "Basil", "Sage", "Rosemary",
+    "Tea", "Birch", "Guaiac Wood",
+)
+NOTE_ORIGINS = (
+    "", "Calabrian", "Sicilian", "Bulgarian", "Turkish", "Egyptian", "Indian", "Madagascan", "Haitian",
+    "Javanese", "Virginian", "Atlas", "Mysore", "Laotian", "Tahitian", "Italian", "Persian", "Moroccan",
+    "Sri Lankan", "Grasse", "Absolute of", "Green", "White", "Smoked", "Wild",
+)
+CONCENTRATIONS = ("Parfum", "Eau de Parfum", "Eau de Toilette", "Eau de Cologne", "Extrait de Parfum",
+                  "Eau Fraîche", "Parfum Intense", "Body Mist")
+TYPES = ("Designer", "Niche", "Indie", "Celebrity", "Vintage", "Artisan", "Mass Market", "Luxury",
+         "Drugstore", "Limited Edition", "Layering", "Attar")
+FAMILIES = ("Citrus", "Floral", "Floral Fruity", "Oriental", "Amber", "Woody", "Chypre", "Fougère",
+            "Gourmand", "Aromatic", "Leather", "Green", "Aquatic", "Spicy")
+COUNTRIES = tuple(f"Country {code}" for code in ("FR", "IT", "US", "GB", "ES", "DE", "AE", "JP", "BR", "CH"))
+COUNTRIES += tuple(f"Country {index:02d}" for index in range(30))
+ACCORDS = tuple(f"{material.lower()}" for material in NOTE_MATERIALS) + tuple(
+    f"{family.lower()} accord" for family in FAMILIES
+)[:10]
+TAGS = ("trending", "new", "bestseller", "classic", "discontinued", "limited", "summer pick", "winter pick",
+        "office safe", "date night", "unisex favorite", "budget", "luxury", "compliment getter", "beast mode",
+        "skin scent", "layering", "travel size", "award winner", "cult", "vegan", "natural", "refillable",
+        "gift set", "staff pick", "hidden gem", "clone", "inspired by", "flanker", "exclusive")
+GENDERS = ("Male", "Female", "Unisex")
+CATEGORIES = ("Eau de Parfum", "Eau de Toilette", "Cologne", "Oil", "Solid")
+LONGEVITY = ("weak", "moderate", "long lasting", "eternal")
+SILLAGE = ("intimate", "moderate", "strong", "enormous")
+OCCASIONS = ("day", "night", "office", "evening", "casual", "formal")
+SEASONS = ("spring", "summer", "autumn", "winter")
+NOTE_LAYERS = ("top", "middle", "base")
+
+
+def lookup_sizes(perfumes: int) -> Dict[str, int]:
+    return {
+        "brands": max(50, perfumes // 200),
+        "perfumer": max(20, perfumes // 1000),
+        "notes": min(len(NOTE_MATERIALS) * len(NOTE_ORIGINS), max(300, perfumes // 20)),
+        "note_families": 20,
+        "note_moods": 16,
+    }
+
+
+def unique_names(parts: Sequence[Sequence[str]], count: int, rng: np.random.Generator) -> List[str]:
+    """``count`` distinct names from the product of ``parts``, numbered once combinations run out."""
+    combos = [" ".join(part for part in combo if part) for combo in product(*parts)]
+    combos = [combos[index] for index in rng.permutation(len(combos))]
+    names = combos[:count]
+    index = 1
+    while len(names) < count:
+        names.extend(f"{combo} {index}" for combo in combos[:count - len(names)])
+        index += 1
+    return names
+
+
+def skewed(rng: np.random.Generator, size: int, population: int, exponent: float = 0.9) -> np.ndarray:
+    """1-based ids drawn with Zipf-like popularity: id 1 is the most common."""
+    weights = 1.0 / np.arange(1, population + 1) ** exponent
+    return rng.choice(population, size=size, p=weights / weights.sum()) + 1
+
+
+def subsets(rng: np.random.Generator, choices: Sequence[str], size: int, low: int, high: int) -> List[List[str]]:
+    counts = rng.integers(low, high + 1, size=size)
+    return [list(rng.choice(choices, size=count, replace=False)) if count else [] for count in counts]
+
+
+def pairs(
+    rng: np.random.Generator,
+    perfume_ids: np.ndarray,
+    population: int,
+    low: int,
+    high: int,
+    exponent: float = 0.9
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct ``(perfume_id, other_id)`` pairs, ``low``-``high`` per perfume before de-duplication."""
+    counts = rng.integers(low, high + 1, size=len(perfume_ids))
+    owners = np.repeat(perfume_ids, counts)
+    others = skewed(rng, len(owners), population, exponent)
+    keys = np.unique(owners.astype(np.int64) * (population + 1) + others)
+    return keys // (population + 1), keys % (population + 1)
+
+
+def lookup_rows(rng: np.random.Generator, perfumes: int) -> Dict[str, List[Tuple[Any, ...]]]:
+    from app.services.search import fold
+
+    sizes = lookup_sizes(perfumes)
+    note_names = unique_names((NOTE_ORIGINS, NOTE_MATERIALS), sizes["notes"], rng)
+    note_families = skewed(rng, len(note_names), sizes["note_families"], 0.5)
+    notes = [
+        (id, name, fold(name), f"{fold(name).replace(' ', '_')}.jpg", int(family_id))
+        for id, (name, family_id) in enumerate(zip(note_names, note_families.tolist()), start=1)
+    ]
+    moods_owner, moods = pairs(rng, np.arange(1, len(notes) + 1), sizes["note_moods"], 0, 2, 0.3)
+    numbered = lambda names: [(id, name) for id, name in enumerate(names, start=1)]
+    return {
+        "brands": numbered(unique_names((BRAND_STEMS, BRAND_ROOTS), sizes["brands"], rng)),
+        "concentration": numbered(CONCENTRATIONS),
+        "type": numbered(TYPES),
+        "family": numbered(FAMILIES),
+        "country": numbered(COUNTRIES),
+        "perfumer": numbered(unique_names((NAME_FIRST, BRAND_ROOTS), sizes["perfumer"], rng)),
+        "main_accords": numbered(ACCORDS),
+        "tags": numbered(TAGS),
+        "note_families": numbered(f"Note family {index}" for index in range(1, sizes["note_families"] + 1)),
+        "note_moods": numbered(f"Mood {index}" for index in range(1, sizes["note_moods"] + 1)),
+        "notes": notes,
+        "note_mood_relations": list(zip(moods_owner.tolist(), moods.tolist())),
+    }
+
+
+def perfume_chunks(
+    rng: np.random.Generator,
+    perfumes: int,
+    sizes: Dict[str, int]
+) -> Iterator[Dict[str, List[Tuple[Any, ...]]]]:
+    """Rows for ``perfumes``, its association tables and reviews, ``CHUNK_SIZE`` perfumes at a time."""
+    from app.models.review import LONGEVITY_VOTES, RATING_MAX, SILLAGE_VOTES
+
+    review_id = 1
+    now = datetime.now(timezone.utc)
+    for start in range(1, perfumes + 1, CHUNK_SIZE):
+        ids = np.arange(start, min(start + CHUNK_SIZE, perfumes + 1))
+        size = len(ids)
+        brands = skewed(rng, size, sizes["brands"])
+        perfumers = np.where(rng.random(size) < 0.7, skewed(rng, size, sizes["perfumer"]), 0)
+        countries = np.where(rng.random(size) < 0.9, skewed(rng, size, len(COUNTRIES), 1.2), 0)
+        columns = {
+            "concentration": skewed(rng, size, len(CONCENTRATIONS), 1.0),
+            "type": skewed(rng, size, len(TYPES), 1.0),
+            "family": skewed(rng, size, len(FAMILIES), 0.7),
+        }
+        years = np.clip(2025 - rng.exponential(15, size).astype(int), 1920, 2025)
+        first = rng.integers(0, len(NAME_FIRST), size)
+        second = rng.integers(0, len(NAME_SECOND), size)
+        flanker = rng.integers(0, len(FLANKERS), size)
+        genders = rng.choice(GENDERS, size=size, p=(0.4, 0.4, 0.2))
+        categories = rng.choice(CATEGORIES, size=size)
+        longevity = rng.choice(LONGEVITY, size=size)
+        sillage = rng.choice(SILLAGE, size=size)
+        occasions = subsets(rng, OCCASIONS, size, 1, 3)
+        seasons = subsets(rng, SEASONS, size, 1, 2)
+
+        rows = []
+        for index, id in enumerate(ids.tolist()):
+            name = f"{NAME_FIRST[first[index]]} {NAME_SECOND[second[index]]}{FLANKERS[flanker[index]]}"
+            family = FAMILIES[columns["family"][index] - 1]
+            rows.append((
+                id, name, int(brands[index]), int(columns["concentration"][index]), f"perfumes/{id}.jpg",
+                str(genders[index]), int(columns["type"][index]), int(columns["family"][index]),
+                str(categories[index]), int(years[index]), int(countries[index]) or None,
+                f"A {family.lower()} fragrance built around {name.lower()}.",
+                str(longevity[index]), str(sillage[index]), occasions[index], seasons[index],
+                int(perfumers[index]) or None, None,
+            ))
+
+        note_rows = []
+        for layer in NOTE_LAYERS:
+            owners, notes = pairs(rng, ids, sizes["notes"], 2, 5)
+            note_rows.extend(zip(owners.tolist(), notes.tolist(), [layer] * len(owners)))
+        accord_owners, accords = pairs(rng, ids, len(ACCORDS), 3, 6)
+        tag_owners, tags = pairs(rng, ids, len(TAGS), 0, 3, 0.6)
+
+        # Each perfume has its own quality; reviews scatter around it
+        review_counts = np.where(rng.random(size) < 0.5, 0, rng.geometric(0.12, size))
+        reviewed = np.repeat(ids, review_counts)
+        quality = np.repeat(rng.normal(3.6, 0.6, size), review_counts)
+        ratings = np.clip(np.rint(quality + rng.normal(0, 0.9, len(reviewed))), 1, RATING_MAX).astype(int)
+        longevity_votes = np.where(rng.random(len(reviewed)) < 0.6,
+                                   rng.integers(0, len(LONGEVITY_VOTES), len(reviewed)), -1)
+        sillage_votes = np.where(rng.random(len(reviewed)) < 0.6,
+                                 rng.integers(0, len(SILLAGE_VOTES), len(reviewed)), -1)
+        ages = rng.exponential(400, len(reviewed))
+        review_rows = [
+            (review_id + index, perfume_id, f"reviewer{index % 5000}", rating,
+             longevity if longevity >= 0 else None, sillage if sillage >= 0 else None,
+             None, None, now - timedelta(days=age))
+            for index, (perfume_id, rating, longevity, sillage, age) in enumerate(zip(
+                reviewed.tolist(), ratings.tolist(), longevity_votes.tolist(), sillage_votes.tolist(), ages.tolist()
+            ))
+        ]
+        review_id += len(review_rows)
+        yield {
+            "perfumes": rows,
+            "perfume_notes": note_rows,
+            "perfume_main_accords": list(zip(accord_owners.tolist(), accords.tolist())),
+            "perfume_tags": list(zip(tag_owners.tolist(), tags.tolist())),
+            "reviews": review_rows,
+        }
+
+
+COLUMNS = {
+    "brands": ("id", "name"),
+    "concentration": ("id", "name"),
+    "type": ("id", "name"),
+    "family": ("id", "name"),
+    "country": ("id", "name"),
+    "perfumer": ("id", "name"),
+    "main_accords": ("id", "name"),
+    "tags": ("id", "name"),
+    "note_families": ("id", "name"),
+    "note_moods": ("id", "name"),
+    "notes": ("id", "name", "normalized_name", "image_filename", "family_id"),
+    "note_mood_relations": ("note_id", "mood_id"),
+    "perfumes": (
+        "id", "name", "brand_id", "concentration_id", "local_image_path", "gender", "type_id", "family_id",
+        "category", "release_year", "country_id", "description", "longevity", "sillage", "occasion", "season",
+        "perfumer_id", "inspiration",
+    ),
+    "perfume_notes": ("perfume_id", "note_id", "note_type"),
+    "perfume_main_accords": ("perfume_id", "accord_id"),
+    "perfume_tags": ("perfume_id", "tag_id"),
+    "reviews": ("id", "perfume_id", "author", "rating", "longevity", "sillage", "title", "body", "created_at"),
+}
+SEQUENCED = [table for table, columns in COLUMNS.items() if columns[0] == "id"]
+
+
+async def generate(scale: str, seed: int, reset: bool) -> int:
+    """Load the ``scale`` catalog; returns the number of perfumes written."""
+    # Imported late so --embedded can set DATABASE_URL first
+    from app.crud.review import recompute_rating_stats
+    from app.db.base import Base
+    from app.db.session import async_session, engine
+
+    perfumes = SCALES[scale]
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    async with engine.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            raise SystemExit("The synthetic catalog needs PostgreSQL (use --embedded for a local one)")
+        await conn.run_sync(Base.metadata.create_all)
+        existing = (await conn.execute(text("SELECT count(*) FROM perfumes"))).scalar()
+        if existing and not reset:
+            raise SystemExit(f"perfumes already holds {existing} rows; pass --reset to replace them")
+        if reset:
+            tables = ", ".join([*COLUMNS, "perfume_documents", "perfume_rating_stats"])
+            await conn.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+        driver = (await conn.get_raw_connection()).driver_connection
+
+        async def copy(table: str, rows: List[Tuple[Any, ...]]) -> None:
+            if rows:
+                await driver.copy_records_to_table(table, records=rows, columns=COLUMNS[table])
+
+        for table, rows in lookup_rows(rng, perfumes).items():
+            await copy(table, rows)
+        written = 0
+        for chunk in perfume_chunks(rng, perfumes, lookup_sizes(perfumes)):
+            for table, rows in chunk.items():
+                await copy(table, rows)
+            written += len(chunk["perfumes"])
+            elapsed = time.perf_counter() - started
+            print(f"Generated {written:,}/{perfumes:,} perfumes ({written / elapsed:,.0f}/s)")
+
+        for table in SEQUENCED:
+            await conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+            ))
+
+    async with async_session() as db:
+        rated = await recompute_rating_stats(db)
+    print(f"Computed rating aggregates for {rated:,} perfumes")
+
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("ANALYZE"))
+    print(f"Synthetic catalog '{scale}' loaded in {time.perf_counter() - started:.1f}s")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--reset", action="store_true", help="truncate the catalog tables first")
+    parser.add_argument("--embedded", metavar="DIR", help="use a throwaway pgserver cluster in DIR")
+    args = parser.parse_args()
+    if args.embedded:
+        from benchmarks.embedded import use_embedded
+        use_embedded(args.embedded)
+    asyncio.run(generate(args.scale, args.seed, args.reset))
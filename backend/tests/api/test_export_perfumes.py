@@ -0,0 +1,5 @@
+async def test_export_on_sqlite_is_a_clean_400(client, catalog):
+    await catalog.perfume("Ambre Nuit")
+    response = await client.get("/api/v1/perfumes/export", params={"format": "csv"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Catalog export requires PostgreSQL"
@@ -0,0 +1,62 @@
+import pytest
+
+from app.services.ratings import rating_aggregator
+
+
+@pytest.fixture(autouse=True)
+def no_pending_deltas():
+    yield
+    rating_aggregator._pending.clear()
+
+
+async def test_add_review(client, catalog):
+    perfume = await catalog.perfume("Rated")
+    response = await client.post(
+        f"/api/v1/perfumes/{perfume.id}/reviews",
+        json={"author": "Ana", "rating": 4, "longevity": "eternal", "sillage": "strong", "title": "Lovely"},
+    )
+    assert response.status_code == 201
+    review = response.json()
+    assert (review["perfume_id"], review["rating"], review["longevity"], review["sillage"]) == (
+        perfume.id, 4, "eternal", "strong"
+    )
+    assert rating_aggregator._pending[perfume.id].count == 1
+
+
+@pytest.mark.parametrize("review", [
+    {"author": "Ana", "rating": 6},
+    {"author": "Ana", "rating": 0},
+    {"author": "", "rating": 3},
+    {"author": "Ana", "rating": 3, "sillage": "loud"},
+])
+async def test_invalid_reviews_are_rejected(client, catalog, review):
+    perfume = await catalog.perfume("Rated")
+    assert (await client.post(f"/api/v1/perfumes/{perfume.id}/reviews", json=review)).status_code == 422
+
+
+async def test_unknown_perfume(client):
+    assert (await client.post("/api/v1/perfumes/999/reviews", json={"author": "Ana", "rating": 3})).status_code == 404
+    assert (await client.get("/api/v1/perfumes/999/reviews")).status_code == 404
+    assert (await client.get("/api/v1/perfumes/999/ratings")).status_code == 404
+
+
+async def test_reviews_are_listed_newest_first_by_cursor(client, catalog):
+    perfume = await catalog.perfume("Rated")
+    for rating in range(1, 6):
+        await client.post(f"/api/v1/perfumes/{perfume.id}/reviews", json={"author": f"Reviewer {rating}", "rating": rating})
+
+    url = f"/api/v1/perfumes/{perfume.id}/reviews"
+    first = await client.get(url, params={"limit": 3})
+    rest = await client.get(url, params={"limit": 3, "cursor": first.headers["X-Next-Cursor"]})
+    assert [review["rating"] for review in first.json() + rest.json()] == [5, 4, 3, 2, 1]
+    assert "X-Next-Cursor" not in rest.headers
+    assert first.headers["Cache-Control"] == "no-cache"
+
+
+async def test_unrated_perfume_has_empty_stats(client, catalog):
+    perfume = await catalog.perfume("Unrated")
+    stats = (await client.get(f"/api/v1/perfumes/{perfume.id}/ratings")).json()
+    assert stats["count"] == 0
+    assert stats["mean"] is None
+    assert stats["histogram"] == {"1": 0, "2": 0, "3": 0, "4": 0, "5": 0}
+    assert set(stats["sillage"]) == {"intimate", "moderate", "strong", "enormous"}
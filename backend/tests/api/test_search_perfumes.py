@@ -0,0 +1,99 @@
+"""``/perfumes/search/`` on SQLite, where ``q`` is ranked in process."""
+import pytest
+
+from app.models.review import PerfumeRatingStats as PerfumeRatingStatsModel
+from app.services.ratings import score
+
+SEARCH = "/api/v1/perfumes/search/"
+
+
+@pytest.fixture
+async def hermes(catalog):
+    await catalog.perfume("Terre d'Hermès", brand="Hermès")
+    await catalog.perfume("Hermessence Vanille Galante", brand="Hermès")
+    await catalog.perfume("Un Jardin sur le Nil", brand="Hermès")
+    await catalog.perfume("Hermes Blue", brand="Other House")
+    await catalog.perfume("Oud Wood", brand="Tom Ford")
+
+
+async def test_query_folds_accents(client, hermes):
+    response = await client.get(SEARCH, params={"q": "hermes"})
+    assert response.status_code == 200
+    names = [item["name"] for item in response.json()]
+    assert "Oud Wood" not in names
+    assert {"Terre d'Hermès", "Un Jardin sur le Nil"} <= set(names)  # brand match on "Hermès"
+
+
+async def test_name_prefix_matches_rank_first(client, hermes):
+    names = [item["name"] for item in (await client.get(SEARCH, params={"q": "hermes"})).json()]
+    assert set(names[:2]) == {"Hermessence Vanille Galante", "Hermes Blue"}
+
+
+async def test_cursor_pages_continue_the_ranking(client, hermes):
+    everything = [item["id"] for item in (await client.get(SEARCH, params={"q": "hermes"})).json()]
+    paged, cursor = [], None
+    while True:
+        params = {"q": "hermes", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(SEARCH, params=params)
+        paged += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert paged == everything
+
+
+async def test_skip_pages_the_ranking(client, hermes):
+    everything = [item["id"] for item in (await client.get(SEARCH, params={"q": "hermes"})).json()]
+    page = (await client.get(SEARCH, params={"q": "hermes", "skip": 1, "limit": 2})).json()
+    assert [item["id"] for item in page] == everything[1:3]
+
+
+async def test_facets_and_sorted_queries_need_postgres(client, hermes):
+    assert (await client.get(SEARCH, params={"q": "hermes", "facets": "true"})).status_code == 400
+    assert (await client.get(SEARCH, params={"q": "hermes", "sort": "rating"})).status_code == 400
+
+
+async def rate(db, perfume, count, total):
+    db.add(PerfumeRatingStatsModel(
+        perfume_id=perfume.id, rating_count=count, rating_sum=total, score=score(count, total),
+        rating_histogram=[0] * 5, longevity_votes=[0] * 5, sillage_votes=[0] * 4,
+    ))
+    await db.commit()
+
+
+async def sorted_ids(client, sort, limit=2, **params):
+    ids, cursor = [], None
+    while True:
+        page = {"sort": sort, "limit": limit, **params, **({"cursor": cursor} if cursor else {})}
+        response = await client.get(SEARCH, params=page)
+        ids += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return ids
+
+
+async def test_sort_on_an_unrated_catalog_lists_everything(client, hermes):
+    response = await client.get(SEARCH, params={"sort": "rating"})
+    assert [item["id"] for item in response.json()] == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.parametrize("sort, expected", [("rating", [4, 2, 1, 3, 5]), ("popularity", [2, 4, 1, 3, 5])])
+async def test_sort_lists_rated_perfumes_first_and_unrated_ones_by_id(db, catalog, client, sort, expected):
+    perfumes = [await catalog.perfume(f"Perfume {number}") for number in range(1, 6)]
+    await rate(db, perfumes[1], 40, 160)  # score 4.0 from many reviews
+    await rate(db, perfumes[3], 10, 50)  # score 4.5
+    await rate(db, perfumes[4], 0, 0)  # every review deleted again
+    assert await sorted_ids(client, sort) == expected
+    skipped = await client.get(SEARCH, params={"sort": sort, "skip": 1, "limit": 3})
+    assert [item["id"] for item in skipped.json()] == expected[1:4]
+
+
+async def test_sort_with_filters_and_fields(db, catalog, client, hermes):
+    await rate(db, await catalog.perfume("Eau des Merveilles", brand="Hermès"), 3, 15)
+    response = await client.get(SEARCH, params={"sort": "rating", "brand": "herm", "fields": "name"})
+    assert response.json() == [
+        {"id": 6, "name": "Eau des Merveilles"},
+        {"id": 1, "name": "Terre d'Hermès"},
+        {"id": 2, "name": "Hermessence Vanille Galante"},
+        {"id": 3, "name": "Un Jardin sur le Nil"},
+    ]
@@ -0,0 +1,46 @@
+from benchmarks.explain_check import full_scans
+
+
+def scan(node_type, relation="perfumes", **fields):
+    return {"Node Type": node_type, "Relation Name": relation, "Total Cost": 1000.0, **fields}
+
+
+def found(plan):
+    return [(node["Node Type"], node["Relation Name"], round(fraction, 3)) for node, fraction in full_scans(plan)]
+
+
+def test_seq_scans_are_always_reported():
+    plan = {"Node Type": "Limit", "Total Cost": 1.0, "Plans": [scan("Seq Scan")]}
+    assert found(plan) == [("Seq Scan", "perfumes", 1.0)]
+
+
+def test_index_scans_with_a_condition_are_fine():
+    assert found(scan("Index Scan", **{"Index Cond": "(id = 1)"})) == []
+
+
+def test_unbounded_index_walk_is_a_full_scan():
+    sort = {"Node Type": "Sort", "Total Cost": 2000.0, "Plans": [scan("Index Only Scan")]}
+    assert found(sort) == [("Index Only Scan", "perfumes", 1.0)]
+
+
+def test_limit_stops_an_index_walk_early():
+    page = {"Node Type": "Limit", "Total Cost": 20.0, "Plans": [scan("Index Scan")]}
+    assert found(page) == []
+    half = {"Node Type": "Limit", "Total Cost": 500.0, "Plans": [scan("Index Scan")]}
+    assert found(half) == [("Index Scan", "perfumes", 0.5)]
+
+
+def test_limit_fraction_reaches_only_the_streamed_side_of_a_join():
+    join = {
+        "Node Type": "Nested Loop",
+        "Total Cost": 1000.0,
+        "Plans": [scan("Index Scan"), scan("Index Only Scan", "perfume_tags")],
+    }
+    plan = {"Node Type": "Limit", "Total Cost": 10.0, "Plans": [join]}
+    assert found(plan) == [("Index Only Scan", "perfume_tags", 1.0)]
+
+
+def test_blocking_nodes_consume_everything():
+    aggregate = {"Node Type": "Aggregate", "Total Cost": 1000.0, "Plans": [scan("Index Scan")]}
+    plan = {"Node Type": "Limit", "Total Cost": 10.0, "Plans": [aggregate]}
+    assert found(plan) == [("Index Scan", "perfumes", 1.0)]
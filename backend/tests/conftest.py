@@ -0,0 +1,92 @@
+"""
+Shared fixtures.
+
+Tests run the app against a throwaway SQLite file whose schema comes from
+``Base.metadata.create_all`` (ARRAY columns are JSON there). Paths that
+need PostgreSQL answer 400 on SQLite, or are covered by compiling their
+statements for the PostgreSQL dialect.
+"""
+import os
+import tempfile
+
+# Settings are read at import time, so this has to come before any app import
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='parfum-tests-')}/test.db"
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import reference_cache
+from app.db.base import Base
+from app.db.session import async_session, engine
+from app.main import app
+from app.models.brand import Brand as BrandModel
+from app.models.note import Note as NoteModel
+from app.models.perfume import Perfume as PerfumeModel
+from app.models.perfume import PerfumeNote as PerfumeNoteModel
+from app.models.perfume import Tag as TagModel
+from app.services.search import fold
+
+
+class Catalog:
+    """Builds perfumes with their brand, notes and tags, creating lookups on first use."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+        self._brands: Dict[str, BrandModel] = {}
+        self._notes: Dict[str, NoteModel] = {}
+        self._tags: Dict[str, TagModel] = {}
+
+    async def perfume(
+        self,
+        name: str,
+        brand: str = "Maison Test",
+        notes: Iterable[Tuple[str, str]] = (),
+        tags: Iterable[str] = (),
+        id: Optional[int] = None,
+        **fields
+    ) -> PerfumeModel:
+        """Add and commit a perfume; ``notes`` are ``(note name, layer)`` pairs."""
+        if brand not in self._brands:
+            self._brands[brand] = BrandModel(name=brand)
+        perfume = PerfumeModel(id=id, name=name, brand=self._brands[brand], **fields)
+        perfume.tags = [self._tag(tag) for tag in tags]
+        self.db.add(perfume)
+        for note, layer in notes:
+            self.db.add(PerfumeNoteModel(perfume=perfume, note=self.note(note), note_type=layer))
+        await self.db.commit()
+        return perfume
+
+    def note(self, name: str) -> NoteModel:
+        if name not in self._notes:
+            self._notes[name] = NoteModel(name=name, normalized_name=fold(name))
+        return self._notes[name]
+
+    def _tag(self, name: str) -> TagModel:
+        if name not in self._tags:
+            self._tags[name] = TagModel(name=name)
+        return self._tags[name]
+
+
+@pytest.fixture
+async def db():
+    """A session on an empty schema, rebuilt for every test."""
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    reference_cache.invalidate()
+    async with async_session() as session:
+        yield session
+
+
+@pytest.fixture
+def catalog(db) -> Catalog:
+    return Catalog(db)
+
+
+@pytest.fixture
+async def client(db):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
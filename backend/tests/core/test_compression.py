@@ -0,0 +1,120 @@
+import gzip
+import json
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.config import settings
+from app.core.http_cache import ConditionalGetMiddleware, make_etag
+
+LARGE = json.dumps([{"id": number, "name": f"Perfume {number}"} for number in range(200)]).encode()
+SMALL = b'{"id": 1}'
+
+
+def endpoint(chunks, content_type=b"application/json", extra_headers=()):
+    async def app(scope, receive, send):
+        scope.setdefault("state", {})["cache_control"] = "public, max-age=60"
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", content_type), *extra_headers],
+        })
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+async def request(app, **headers):
+    transport = ASGITransport(app=CompressionMiddleware(app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/", headers={"Accept-Encoding": "identity", **headers})
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("", None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("br;q=0, gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.1, gzip;q=0.5", "gzip"),
+    ("gzip;q=bogus", None),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+async def test_large_json_is_gzipped():
+    response = await request(endpoint([LARGE]), **{"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(LARGE)
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == LARGE
+
+
+async def test_brotli_when_accepted():
+    response = await request(endpoint([LARGE]), **{"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.content == LARGE
+
+
+@pytest.mark.parametrize("app", [
+    endpoint([SMALL]),
+    endpoint([gzip.compress(LARGE)], extra_headers=[(b"content-encoding", b"gzip")]),
+    endpoint([LARGE], content_type=b"image/webp"),
+])
+async def test_bypasses_small_encoded_and_binary_bodies(app):
+    response = await request(app, **{"Accept-Encoding": "br"})
+    assert response.headers.get("content-encoding") != "br"
+
+
+async def test_small_body_is_sent_as_is():
+    assert len(SMALL) < settings.COMPRESSION_MIN_SIZE
+    response = await request(endpoint([SMALL]), **{"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == SMALL
+
+
+async def test_no_accept_encoding_is_sent_as_is():
+    response = await request(endpoint([LARGE]))
+    assert "content-encoding" not in response.headers
+    assert response.content == LARGE
+
+
+async def test_streams_are_compressed_chunk_by_chunk():
+    chunks = [line + b"\n" for line in LARGE.split(b", ")]
+    response = await request(endpoint(chunks, content_type=b"application/x-ndjson"), **{"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.content == b"".join(chunks)
+
+
+async def conditional_request(**headers):
+    app = CompressionMiddleware(ConditionalGetMiddleware(endpoint([LARGE])))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        return await client.get("/", headers=headers)
+
+
+@pytest.mark.parametrize("encoding", ["gzip", "br"])
+async def test_compressed_etag_revalidates(encoding):
+    etag = make_etag(LARGE)
+    first = await conditional_request(**{"Accept-Encoding": encoding})
+    assert first.headers["etag"] == f'{etag[:-1]}-{encoding}"'
+
+    again = await conditional_request(**{"Accept-Encoding": encoding, "If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
+
+
+async def test_uncompressed_etag_still_matches_a_compressed_request():
+    response = await conditional_request(**{"Accept-Encoding": "gzip", "If-None-Match": make_etag(LARGE)})
+    assert response.status_code == 304
+
+
+async def test_other_encoding_suffix_matches_too():
+    etag = make_etag(LARGE)
+    response = await conditional_request(**{"Accept-Encoding": "gzip", "If-None-Match": f'{etag[:-1]}-br"'})
+    assert response.status_code == 304
@@ -0,0 +1,93 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.core.http_cache import ConditionalGetMiddleware, etag_matches, make_etag
+
+POLICY = "public, max-age=60"
+BODY = b'{"name": "Terre d\'Herm\xc3\xa8s"}'
+
+
+def endpoint(status=200, policy=POLICY, chunks=(BODY,)):
+    """An ASGI app answering with ``chunks`` that records ``policy`` like ``cache_control`` does."""
+    async def app(scope, receive, send):
+        if policy is not None:
+            scope.setdefault("state", {})["cache_control"] = policy
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    return app
+
+
+async def request(app, method="GET", **headers):
+    transport = ASGITransport(app=ConditionalGetMiddleware(app))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, "/", headers=headers)
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ("*", True),
+    ('"abcd"', False),
+    ("", False),
+    (None, False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches('"abc"', if_none_match) is expected
+    assert etag_matches('W/"abc"', if_none_match) is expected
+
+
+async def test_adds_policy_and_etag():
+    response = await request(endpoint())
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["cache-control"] == POLICY
+    assert response.headers["etag"] == make_etag(BODY)
+
+
+async def test_matching_if_none_match_is_a_bare_304():
+    response = await request(endpoint(), **{"If-None-Match": make_etag(BODY)})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == make_etag(BODY)
+    assert response.headers["cache-control"] == POLICY
+    assert "content-type" not in response.headers
+
+
+async def test_stale_if_none_match_gets_the_body():
+    response = await request(endpoint(), **{"If-None-Match": make_etag(b"older")})
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+@pytest.mark.parametrize("app, method", [
+    (endpoint(), "POST"),
+    (endpoint(status=404), "GET"),
+    (endpoint(policy=None), "GET"),
+])
+async def test_leaves_other_responses_alone(app, method):
+    response = await request(app, method, **{"If-None-Match": make_etag(BODY)})
+    assert response.status_code != 304
+    assert "etag" not in response.headers
+
+
+async def test_streams_get_cache_control_but_no_etag():
+    response = await request(endpoint(chunks=(b"a\n", b"b\n")), **{"If-None-Match": "*"})
+    assert response.status_code == 200
+    assert response.content == b"a\nb\n"
+    assert response.headers["cache-control"] == POLICY
+    assert "etag" not in response.headers
+
+
+async def test_reference_endpoint_revalidates(client, catalog):
+    await catalog.perfume("Terre d'Hermès", brand="Hermès")
+    first = await client.get("/api/v1/brands/")
+    assert first.status_code == 200
+    again = await client.get("/api/v1/brands/", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+    assert again.headers["etag"] == first.headers["etag"]
@@ -0,0 +1,89 @@
+import base64
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.pagination import decode_cursor, encode_cursor, next_cursor, paginate, slice_after_cursor
+from app.models.perfume import Perfume as PerfumeModel
+
+
+@pytest.mark.parametrize("sort_value", ["Dior", 4.25, 7, None])
+def test_cursor_round_trip(sort_value):
+    token = encode_cursor(sort_value, 42)
+    assert "=" not in token
+    assert decode_cursor(token) == (sort_value, 42)
+
+
+@pytest.mark.parametrize("token", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"{}").decode(),
+    base64.urlsafe_b64encode(b'["Dior"]').decode(),
+    base64.urlsafe_b64encode(b'["Dior", "7"]').decode(),
+])
+def test_malformed_cursor_is_a_400(token):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(token)
+    assert error.value.status_code == 400
+
+
+def test_next_cursor_only_for_full_pages():
+    rows = [(3, 1), (2, 2)]
+    assert next_cursor(rows, 3, lambda row: row) is None
+    assert next_cursor([], 3, lambda row: row) is None
+    assert decode_cursor(next_cursor(rows, 2, lambda row: row)) == (2, 2)
+
+
+# Sorted by sort key descending, ties by id ascending, as paginate(descending=True) orders them
+RANKED = [(9, 4), (7, 1), (7, 3), (7, 8), (2, 5)]
+
+
+def test_slice_after_cursor_breaks_descending_ties_by_id():
+    after = slice_after_cursor(RANKED, encode_cursor(7, 3), lambda item: item, descending=True)
+    assert after == [(7, 8), (2, 5)]
+
+
+def test_slice_after_cursor_ascending():
+    items = sorted(RANKED)
+    after = slice_after_cursor(items, encode_cursor(7, 3), lambda item: item)
+    assert after == [(7, 8), (9, 4)]
+    assert slice_after_cursor(items, encode_cursor(9, 4), lambda item: item) == []
+
+
+async def _pages(db, descending: bool, limit: int = 2):
+    pages, cursor = [], None
+    while True:
+        query = paginate(
+            select(PerfumeModel.release_year, PerfumeModel.id), PerfumeModel.release_year, PerfumeModel.id,
+            limit=limit, cursor=cursor, descending=descending
+        )
+        rows = [tuple(row) for row in await db.execute(query)]
+        pages.append(rows)
+        cursor = next_cursor(rows, limit, lambda row: row)
+        if cursor is None:
+            return pages
+
+
+@pytest.mark.parametrize("descending", [False, True])
+async def test_paginate_walks_ties_without_gaps_or_repeats(db, catalog, descending):
+    for year in (2001, 2010, 2010, 2010, 1999, 2010, 2020):
+        await catalog.perfume(f"Perfume {year}", release_year=year)
+    pages = await _pages(db, descending)
+    walked = [row for page in pages for row in page]
+    expected = sorted(walked, key=lambda row: (-row[0] if descending else row[0], row[1]))
+    assert walked == expected
+    assert len(walked) == 7 == len(set(walked))
+
+
+async def test_list_endpoint_cursor_and_skip_agree(client, catalog):
+    for number in range(5):
+        await catalog.perfume(f"Perfume {number}")
+    first = await client.get("/api/v1/perfumes/", params={"limit": 2})
+    second = await client.get("/api/v1/perfumes/", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    skipped = await client.get("/api/v1/perfumes/", params={"limit": 2, "skip": 2})
+    assert second.json() == skipped.json()
+    assert [item["id"] for item in first.json() + second.json()] == [1, 2, 3, 4]
+
+
+async def test_list_endpoint_rejects_a_bad_cursor(client):
+    assert (await client.get("/api/v1/perfumes/", params={"cursor": "%%%"})).status_code == 400
@@ -0,0 +1,80 @@
+import pytest
+from fastapi import HTTPException
+
+from app.crud.perfume import FIELDS, get_perfume_documents, parse_fields
+
+
+@pytest.fixture
+async def terre(catalog):
+    return await catalog.perfume(
+        "Terre d'Hermès",
+        brand="Hermès",
+        release_year=2006,
+        season=["fall", "winter"],
+        notes=[("Vetiver", "base"), ("Orange", "top"), ("Pepper", "middle"), ("Grapefruit", "top")],
+        tags=["classic", "bestseller"],
+    )
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields("") == ("id",)
+    assert parse_fields(" name, brand ,,tags,name,id") == ("id", "name", "brand", "tags")
+    assert set(parse_fields(",".join(FIELDS))) == set(FIELDS)
+
+
+def test_parse_fields_rejects_unknown_fields():
+    with pytest.raises(HTTPException) as error:
+        parse_fields("name,price,brand,stock")
+    assert error.value.status_code == 400
+    assert error.value.detail.startswith("Unknown fields: price, stock.")
+
+
+async def test_documents_load_only_the_requested_fields(db, terre):
+    documents = await get_perfume_documents(db, [terre.id, 999], ("id", "brand", "season", "tags"))
+    assert documents == {
+        terre.id: {"id": terre.id, "brand": "Hermès", "season": ["fall", "winter"], "tags": ["bestseller", "classic"]}
+    }
+
+
+async def test_full_document_orders_notes_by_layer(db, terre):
+    document = (await get_perfume_documents(db, [terre.id]))[terre.id]
+    assert document["name"] == "Terre d'Hermès"
+    assert document["brand"] == "Hermès"
+    assert document["family"] is None
+    assert document["main_accords"] == []
+    assert [(note["note_type"], note["note"]) for note in document["perfume_notes"]] == [
+        ("top", "Grapefruit"), ("top", "Orange"), ("middle", "Pepper"), ("base", "Vetiver"),
+    ]
+
+
+async def test_detail_endpoint_fields(client, terre):
+    response = await client.get(f"/api/v1/perfumes/{terre.id}", params={"fields": "name,release_year,perfume_notes"})
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body) == ["id", "name", "release_year", "perfume_notes"]
+    assert body["perfume_notes"][0] == {"note_type": "top", "note": "Grapefruit", "image_filename": None}
+
+    assert (await client.get("/api/v1/perfumes/999", params={"fields": "name"})).status_code == 404
+    assert (await client.get(f"/api/v1/perfumes/{terre.id}", params={"fields": "price"})).status_code == 400
+
+
+async def test_detail_endpoint_without_fields_is_the_full_schema(client, terre):
+    body = (await client.get(f"/api/v1/perfumes/{terre.id}")).json()
+    assert {"id", "name", "brand", "perfume_notes", "main_accords", "tags", "season"} <= set(body)
+    assert body["tags"] == ["bestseller", "classic"]
+
+
+async def test_list_endpoint_fields(client, catalog, terre):
+    await catalog.perfume("Un Jardin sur le Nil", brand="Hermès", tags=["classic"])
+    response = await client.get("/api/v1/perfumes/", params={"fields": "brand_name,tags"})
+    assert response.json() == [
+        {"id": terre.id, "brand_name": "Hermès", "tags": ["bestseller", "classic"]},
+        {"id": terre.id + 1, "brand_name": "Hermès", "tags": ["classic"]},
+    ]
+
+
+async def test_search_endpoint_fields(client, terre):
+    response = await client.get("/api/v1/perfumes/search/", params={"q": "terre", "fields": "name,season"})
+    assert response.status_code == 200
+    assert response.json() == [{"id": terre.id, "name": "Terre d'Hermès", "season": ["fall", "winter"]}]
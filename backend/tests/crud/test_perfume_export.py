@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.crud import perfume_export
+from app.crud.perfume_export import export_statement, start_stream, stream_csv, stream_ndjson
+
+RECORD = {
+    **dict.fromkeys(perfume_export.EXPORT_FIELDS),
+    **{field: [] for field in perfume_export.LIST_FIELDS},
+    "id": 1, "name": "Ambre Nuit", "brand": "Dior", "top_notes": ["bergamot", "pink pepper"], "tags": ["amber"],
+}
+
+
+async def _collect(chunks):
+    return "".join([chunk async for chunk in chunks])
+
+
+@pytest.fixture
+def one_record(monkeypatch):
+    async def records(batch_size=1000):
+        yield [RECORD]
+    monkeypatch.setattr(perfume_export, "stream_records", records)
+
+
+async def test_ndjson_is_one_feed_record_per_line(one_record):
+    lines = (await _collect(stream_ndjson())).splitlines()
+    assert [json.loads(line) for line in lines] == [RECORD]
+
+
+async def test_csv_joins_list_fields_with_pipes(one_record):
+    rows = list(csv.DictReader(io.StringIO(await _collect(stream_csv()))))
+    assert len(rows) == 1
+    assert rows[0]["top_notes"] == "bergamot|pink pepper"
+    assert rows[0]["main_accords"] == ""
+    assert rows[0]["brand"] == "Dior"
+
+
+async def test_start_stream_raises_before_the_first_chunk():
+    async def failing():
+        raise RuntimeError("statement failed")
+        yield ""
+
+    with pytest.raises(RuntimeError):
+        await start_stream(failing())
+
+
+async def test_start_stream_keeps_every_chunk():
+    async def chunks():
+        for chunk in ("a", "b", "c"):
+            yield chunk
+
+    assert await _collect(await start_stream(chunks())) == "abc"
+
+    async def empty():
+        return
+        yield ""
+
+    assert await _collect(await start_stream(empty())) == ""
+
+
+def test_export_statement_compiles_for_postgres():
+    sql = str(export_statement.compile(dialect=postgresql.dialect()))
+    assert "array_agg(notes.name ORDER BY notes.name)" in sql
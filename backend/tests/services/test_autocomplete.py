@@ -0,0 +1,80 @@
+from app.services.autocomplete import MAX_KEY_BYTES, AutocompleteIndex, PrefixTable, prefix_keys
+
+
+def names(suggestions):
+    return [suggestion["name"] for suggestion in suggestions]
+
+
+def table(*entries):
+    """``entries`` are ``(name, popularity)``; ids are their positions from 1."""
+    return PrefixTable([
+        (id, name, None, popularity, (name,)) for id, (name, popularity) in enumerate(entries, start=1)
+    ])
+
+
+def test_prefix_keys_start_at_every_word():
+    assert prefix_keys(["Terre d'Hermès"]) == {b"terre d'hermes", b"d'hermes", b"hermes"}
+    assert prefix_keys([None, ""]) == set()
+
+
+def test_prefix_keys_are_truncated():
+    (key,) = prefix_keys(["x" * 100])
+    assert key == b"x" * MAX_KEY_BYTES
+
+
+def test_matches_word_starts_only():
+    prefixes = table(("Terre d'Hermès", 1), ("Hermessence", 1), ("Chermes", 1))
+    assert names(prefixes.suggest(b"herm", 10)) == ["Hermessence", "Terre d'Hermès"]
+    assert names(prefixes.suggest(b"terre d", 10)) == ["Terre d'Hermès"]
+    assert prefixes.suggest(b"ermes", 10) == []
+
+
+def test_ranked_by_popularity_then_shorter_name():
+    prefixes = table(("Rose Oud", 1), ("Rose", 1), ("Rosewood", 5), ("Roses Vanille", 0))
+    assert names(prefixes.suggest(b"ros", 10)) == ["Rosewood", "Rose", "Rose Oud", "Roses Vanille"]
+    assert names(prefixes.suggest(b"ros", 2)) == ["Rosewood", "Rose"]
+
+
+def test_precomputed_short_prefixes_agree_with_the_scan():
+    prefixes = table(("Amber", 3), ("Ambrette", 2), ("Aldehydes", 4), ("Bergamot", 9), ("Oud Ambre", 1))
+    for prefix in (b"a", b"am"):
+        assert prefixes.suggest(prefix, 10) == [
+            {"id": int(prefixes.ids[rank]), "name": prefixes.names[rank]} for rank in prefixes._scan(prefix, 10)
+        ]
+    assert names(prefixes.suggest(b"a", 10)) == ["Aldehydes", "Amber", "Ambrette", "Oud Ambre"]
+    assert names(prefixes.suggest(b"am", 2)) == ["Amber", "Ambrette"]
+    assert prefixes.suggest(b"z", 10) == []
+
+
+def test_prefix_range_is_bounded():
+    # Neighbours in byte order on both sides of the "oud" range
+    prefixes = table(("Otto", 1), ("Oud", 1), ("Oudh", 1), ("Oue", 1), ("Ou", 1))
+    assert names(prefixes.suggest(b"oud", 10)) == ["Oud", "Oudh"]
+    assert prefixes.suggest(b"oudhx", 10) == []
+
+
+def test_long_queries_match_truncated_keys():
+    name = "Eau de Parfum Intense Extraordinaire Absolue"
+    prefixes = table((name, 1))
+    assert names(prefixes.suggest(name.lower().encode()[:MAX_KEY_BYTES], 10)) == [name]
+
+
+def test_empty_table():
+    assert table().suggest(b"a", 10) == []
+    assert table().suggest(b"abc", 10) == []
+
+
+async def test_index_completes_each_kind(db, catalog):
+    await catalog.perfume("Terre d'Hermès", brand="Hermès", notes=[("Vetiver", "base")])
+    await catalog.perfume("Hermessence Vetiver", brand="Hermès", tags=["bestseller"])
+    await catalog.perfume("Vetiver Extraordinaire", brand="Frédéric Malle")
+    index = AutocompleteIndex()
+    await index.rebuild(db)
+
+    suggestions = index.complete("HERM")
+    assert names(suggestions["perfumes"]) == ["Hermessence Vetiver", "Terre d'Hermès"]
+    assert suggestions["perfumes"][0]["brand_name"] == "Hermès"
+    assert names(suggestions["brands"]) == ["Hermès"]
+    assert names(index.complete("vét", kinds=["notes"])["notes"]) == ["Vetiver"]
+    assert index.complete("vet", kinds=["notes"])["perfumes"] == []
+    assert index.complete("  ") == {"perfumes": [], "brands": [], "notes": [], "perfumers": []}
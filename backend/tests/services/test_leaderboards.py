@@ -0,0 +1,38 @@
+import orjson
+
+from app.models.review import PerfumeRatingStats as PerfumeRatingStatsModel
+from app.services.leaderboards import LeaderboardIndex
+from app.services.ratings import score
+
+
+def ids(rendered: bytes):
+    return [item["id"] for item in orjson.loads(rendered)]
+
+
+async def test_boards(db, catalog):
+    await catalog.perfume("Old Favourite", tags=["trending", "classic", "bestseller", "cult"])
+    await catalog.perfume("Untagged")
+    await catalog.perfume("Just Landed", tags=["trending"])
+    await catalog.perfume("Classic", tags=["classic"])
+    await catalog.perfume("Newest", tags=["new", "trending"])
+    for perfume_id, count, total in ((1, 40, 160), (4, 10, 50), (2, 0, 0)):
+        db.add(PerfumeRatingStatsModel(
+            perfume_id=perfume_id, rating_count=count, rating_sum=total, score=score(count, total),
+            rating_histogram=[0] * 5, longevity_votes=[0] * 5, sillage_votes=[0] * 4,
+        ))
+    await db.commit()
+
+    index = LeaderboardIndex()
+    await index.rebuild(db)
+    # Every perfume carrying the tag, however many other tags it has, newest first
+    assert ids(index.render("trending", 10)) == [5, 3, 1]
+    assert ids(index.render("trending", 2)) == [5, 3]
+    assert ids(index.render("top-rated", 10)) == [4, 1]
+    assert ids(index.render("most-loved", 10)) == [1, 4]
+    assert index.render("classic", 10) is None
+
+    boards = orjson.loads(index.render_all(1))
+    assert list(boards) == ["trending", "top-rated", "most-loved"]
+    assert boards["trending"] == [
+        {"id": 5, "name": "Newest", "brand_name": "Maison Test", "local_image_path": None}
+    ]
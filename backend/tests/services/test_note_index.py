@@ -0,0 +1,67 @@
+import pytest
+
+from app.services.note_index import NoteIndex, UnknownNoteError
+
+
+@pytest.fixture
+async def index(db, catalog):
+    """Four perfumes over vanilla, oud, patchouli and bergamot, with a perfume without notes."""
+    await catalog.perfume("Vanilla Oud", notes=[("Bergamot", "top"), ("Vanilla", "base"), ("Oud", "base")])
+    await catalog.perfume("Vanilla Top", notes=[("Vanilla", "top"), ("Patchouli", "base")])
+    await catalog.perfume("Oud Heart", notes=[("Oud", "middle"), ("Vanilla", "base"), ("Patchouli", "base")])
+    await catalog.perfume("Bergamot", notes=[("Bergamot", "top")])
+    await catalog.perfume("No Notes")
+    index = NoteIndex()
+    await index.rebuild(db)
+    return index
+
+
+def ids(index, include=(), exclude=()):
+    return index.find([index.resolve(term) for term in include], [index.resolve(term) for term in exclude]).tolist()
+
+
+async def test_include_intersects(index):
+    assert ids(index, ["vanilla"]) == [1, 2, 3]
+    assert ids(index, ["vanilla", "oud"]) == [1, 3]
+    assert ids(index, ["oud", "bergamot", "vanilla"]) == [1]
+    assert ids(index, ["bergamot", "patchouli"]) == []
+
+
+async def test_layers_narrow_the_postings(index):
+    assert ids(index, ["base:vanilla"]) == [1, 3]
+    assert ids(index, ["top:vanilla"]) == [2]
+    assert ids(index, ["base:oud"]) == [1]
+    assert ids(index, ["top:oud"]) == []
+
+
+async def test_exclude_subtracts(index):
+    assert ids(index, ["vanilla"], ["patchouli"]) == [1]
+    assert ids(index, ["vanilla"], ["base:patchouli", "top:bergamot"]) == []
+    assert ids(index, ["vanilla"], ["top:patchouli"]) == [1, 2, 3]
+
+
+async def test_exclude_alone_starts_from_every_perfume(index):
+    assert ids(index, exclude=["vanilla"]) == [4, 5]
+    assert ids(index) == [1, 2, 3, 4, 5]
+
+
+async def test_resolve(index):
+    vanilla, _ = index.resolve("vanilla")
+    assert index.resolve("  Base : VANILLA ") == (vanilla, "base")
+    assert index.resolve(str(vanilla)) == (vanilla, None)
+    assert index.resolve("top:12345") == (12345, "top")
+    assert ids(index, ["12345"]) == []
+
+
+@pytest.mark.parametrize("term", ["amber", "heart:vanilla", ""])
+async def test_resolve_rejects_unknown_terms(index, term):
+    with pytest.raises(UnknownNoteError):
+        index.resolve(term)
+
+
+async def test_resolve_folds_accents(db, catalog):
+    await catalog.perfume("Fleur", notes=[("Fleur d'Oranger", "middle"), ("Orchidée", "base")])
+    index = NoteIndex()
+    await index.rebuild(db)
+    assert index.resolve("fleur d'oranger") == index.resolve("FLEUR D'ORANGER")
+    assert ids(index, ["orchidee"]) == ids(index, ["Orchidée"]) == [1]
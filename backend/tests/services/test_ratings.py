@@ -0,0 +1,128 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.review import Review as ReviewModel
+from app.services import ratings
+from app.services.ratings import PRIOR_MEAN, RatingAggregator, RatingDelta, rating_aggregator, score
+
+
+@pytest.fixture(autouse=True)
+def aggregator():
+    rating_aggregator._pending.clear()
+    yield rating_aggregator
+    rating_aggregator._pending.clear()
+
+
+class FakeSession:
+    """Stands in for ``async_session()``: keeps the statements instead of running them."""
+
+    def __init__(self, error=None) -> None:
+        self.statements = []
+        self.committed = False
+        self.error = error
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        if self.error:
+            raise self.error
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.committed = True
+
+
+def summary(delta: RatingDelta):
+    return delta.count, delta.total, delta.histogram, delta.longevity, delta.sillage
+
+
+def test_score_pulls_few_reviews_towards_the_prior():
+    assert score(0, 0) == PRIOR_MEAN
+    assert score(1, 5) < score(100, 450)
+    assert score(1000, 5000) == pytest.approx(5, abs=0.02)
+
+
+def test_delta_add_and_merge():
+    delta = RatingDelta()
+    delta.add(5, 4, None, 1)
+    delta.add(3, None, 0, 1)
+    other = RatingDelta()
+    other.add(5, 4, None, -1)
+    delta.merge(other)
+    assert summary(delta) == (1, 3, [0, 0, 1, 0, 0], [0] * 5, [1, 0, 0, 0])
+
+
+async def test_committed_review_changes_become_deltas(db, catalog, aggregator):
+    perfume = await catalog.perfume("Rated")
+    review = ReviewModel(perfume_id=perfume.id, author="a", rating=4, longevity=2)
+    db.add(review)
+    await db.commit()
+    assert summary(aggregator._pending[perfume.id]) == (1, 4, [0, 0, 0, 1, 0], [0, 0, 1, 0, 0], [0] * 4)
+
+    # An edit retracts the old values and adds the new ones
+    review.rating = 2
+    review.sillage = 3
+    await db.commit()
+    assert summary(aggregator._pending[perfume.id]) == (1, 2, [0, 1, 0, 0, 0], [0, 0, 1, 0, 0], [0, 0, 0, 1])
+
+    # Edits outside the aggregated columns add nothing
+    review.title = "Changed my mind"
+    await db.commit()
+    assert summary(aggregator._pending[perfume.id]) == (1, 2, [0, 1, 0, 0, 0], [0, 0, 1, 0, 0], [0, 0, 0, 1])
+
+    await db.delete(review)
+    await db.commit()
+    assert summary(aggregator._pending[perfume.id]) == (0, 0, [0] * 5, [0] * 5, [0] * 4)
+
+
+async def test_rolled_back_reviews_are_not_recorded(db, catalog, aggregator):
+    perfume = await catalog.perfume("Rated")
+    db.add(ReviewModel(perfume_id=perfume.id, author="a", rating=4))
+    await db.flush()
+    await db.rollback()
+    assert aggregator.pending == 0
+
+
+async def test_flush_upserts_pending_deltas(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(ratings, "async_session", session)
+    aggregator = RatingAggregator()
+    aggregator.record([(1, (7, 5, None, 1)), (1, (3, 4, 2, None)), (1, (7, 3, None, None))])
+
+    assert await aggregator.flush() == 2
+    assert aggregator.pending == 0
+    assert session.committed
+    (statement,) = session.statements
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (perfume_id) DO UPDATE" in sql
+    assert "perfume_rating_stats.rating_count + excluded.rating_count" in sql
+    params = statement.compile(dialect=postgresql.dialect()).params
+    # Rows go in perfume order so concurrent workers lock them in the same order
+    assert [params["perfume_id_m0"], params["perfume_id_m1"]] == [3, 7]
+    assert [params["rating_count_m1"], params["rating_sum_m1"]] == [2, 8]
+    assert params["rating_histogram_m1"] == [0, 0, 1, 0, 1]
+    assert params["score_m1"] == score(2, 8)
+
+    assert await aggregator.flush() == 0
+    assert len(session.statements) == 1
+
+
+async def test_failed_flush_keeps_the_deltas(monkeypatch):
+    monkeypatch.setattr(ratings, "async_session", FakeSession(error=RuntimeError("database is down")))
+    aggregator = RatingAggregator()
+    aggregator.record([(1, (7, 5, None, None))])
+    with pytest.raises(RuntimeError):
+        await aggregator.flush()
+
+    # Deltas recorded meanwhile are merged with the returned batch
+    aggregator.record([(1, (7, 3, None, None))])
+    monkeypatch.setattr(ratings, "async_session", FakeSession())
+    aggregator.record([(-1, (7, 5, None, None))])
+    assert summary(aggregator._pending[7]) == (1, 3, [0, 0, 1, 0, 0], [0] * 5, [0] * 4)
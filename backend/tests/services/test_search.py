@@ -0,0 +1,27 @@
+from app.services.search import fold, rank_rows, word_similarity
+
+
+def test_fold_strips_accents_and_case():
+    assert fold("Hermès") == "hermes"
+    assert fold("  ÉCLAT de Rosé ") == "eclat de rose"
+    assert fold("Straße") == "strasse"
+
+
+def test_word_similarity_matches_within_a_longer_name():
+    assert word_similarity("vanille", "tobacco vanille") == 1.0
+    assert word_similarity("vanille", "vanilla") < 1.0
+    assert word_similarity("", "anything") == 0.0
+
+
+def test_rank_rows_puts_prefix_matches_first_and_drops_non_matches():
+    rows = [
+        (1, "Rose de Nuit", "Hermès"),
+        (2, "Hermessence Vanille", "Hermès"),
+        (3, "Oud Wood", "Tom Ford"),
+    ]
+    assert [row[0] for _, row in rank_rows("hermes", rows)] == [2, 1]
+
+
+def test_rank_rows_breaks_ties_by_id():
+    rows = [(5, "Iris", "Maison"), (2, "Iris", "Maison"), (9, "Iris", "Maison")]
+    assert [row[0] for _, row in rank_rows("iris", rows)] == [2, 5, 9]